@@ -0,0 +1,83 @@
+"""
+Benchmarks of the auction scheduling and order paths.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from zipline.finance.commission import PerShare
+from zipline.utils.factory import create_simulation_parameters
+
+from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.finance.auction import TradingAlgorithmAuction, \
+    BeforeEpexAuction
+from powerline.utils.data.epex_simulator import EpexSimulator
+
+__author__ = 'Warren'
+
+
+class ShouldTrigger(object):
+    """
+    BeforeEpexAuction.should_trigger for every minute of a simulated year.
+    """
+
+    def setup(self):
+        self.rule = BeforeEpexAuction(minutes=30)
+        self.minutes = pd.date_range('2015-01-01', '2015-12-31 23:59',
+                                     freq='min', tz='UTC')
+        # builds the trigger table
+        self.rule.should_trigger(self.minutes[0], None)
+
+    def time_should_trigger_year(self):
+        should_trigger = self.rule.should_trigger
+        for dt in self.minutes:
+            should_trigger(dt, None)
+
+
+def order_every_auction(algo, data):
+    algo.order_auction(amounts=algo.amounts)
+
+
+class DailyAuctionAlgorithm(TradingAlgorithmAuction):
+
+    def initialize(self, amounts):
+        self.amounts = amounts
+        self.set_commission(PerShare(0))
+        self.schedule_function(func=self.auction,
+                               time_rule=BeforeEpexAuction(minutes=30))
+
+    def handle_data(self, data):
+        pass
+
+
+class OrderAuction(object):
+    """
+    A backtest of simulated EPEX data that orders all hourly products of
+    every day through order_auction.
+    """
+
+    params = [7, 30]
+    param_names = ['days']
+    timeout = 300
+
+    def setup(self, days):
+        start = pd.Timestamp('2015-06-01')
+        end = start + timedelta(days=days - 1)
+        self.simulator = EpexSimulator(start, end, seed=1)
+
+        # the auction on the last day orders the products of the day after,
+        # which get the same sids in a simulator of one more day
+        metadata = EpexSimulator(start, end + timedelta(days=1),
+                                 seed=1).asset_metadata()
+        self.exchange = EpexExchange(seed=1)
+        self.exchange.env.write_data(futures_data=metadata)
+        self.sim_params = create_simulation_parameters(
+            start=self.simulator.start, end=self.simulator.end)
+
+    def time_order_auction(self, days):
+        algo = DailyAuctionAlgorithm(
+            amounts=np.ones(24), auction=order_every_auction,
+            env=self.exchange.env, sim_params=self.sim_params,
+            data_frequency='minute')
+        algo.run(self.simulator.source())
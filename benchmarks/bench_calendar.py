@@ -0,0 +1,45 @@
+"""
+Benchmarks of the EPEX and EEX trading calendars.
+"""
+
+import pandas as pd
+
+from powerline.utils import tradingcalendar_eex, tradingcalendar_epex
+
+__author__ = 'Warren'
+
+
+class CalendarImport(object):
+    """
+    Importing a calendar and computing its days on first access, in a fresh
+    interpreter each time.
+    """
+
+    def timeraw_import_epex(self):
+        return """
+        from powerline.utils import tradingcalendar_epex
+        tradingcalendar_epex.open_and_closes
+        """
+
+    def timeraw_import_eex(self):
+        return """
+        from powerline.utils import tradingcalendar_eex
+        tradingcalendar_eex.open_and_closes
+        """
+
+
+class OpenAndCloses(object):
+
+    params = ['epex', 'eex']
+    param_names = ['calendar']
+
+    def setup(self, calendar):
+        self.calendar = {'epex': tradingcalendar_epex,
+                         'eex': tradingcalendar_eex}[calendar]
+        self.days = pd.date_range('2011-01-01', '2020-12-31', tz='UTC')
+
+    def time_get_open_and_closes(self, calendar):
+        self.calendar.get_open_and_closes(self.days, [])
+
+    def peakmem_get_open_and_closes(self, calendar):
+        self.calendar.get_open_and_closes(self.days, [])
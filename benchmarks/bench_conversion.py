@@ -0,0 +1,51 @@
+"""
+Benchmarks of the hourly and quarter hourly product conversion.
+"""
+
+import numpy as np
+import pandas as pd
+
+from powerline.utils.hour_quarter_hour_converter import \
+    convert_between_h_and_qh, hourly_products, quarterly_products
+
+__author__ = 'Warren'
+
+
+class ProductConversion(object):
+    """
+    Conversion of multi-year frames of delivery days.
+    """
+
+    params = [1, 5]
+    param_names = ['years']
+
+    def setup(self, years):
+        days = pd.date_range('2011-01-01', periods=365 * years, tz='UTC')
+        random_state = np.random.RandomState(1)
+        self.hourly = pd.DataFrame(
+            random_state.rand(len(days), 24), index=days,
+            columns=hourly_products)
+        self.quarterly = pd.DataFrame(
+            random_state.rand(len(days), 96), index=days,
+            columns=quarterly_products)
+        self.volume = pd.DataFrame(
+            random_state.rand(len(days), 96), index=days,
+            columns=quarterly_products)
+
+    def time_hourly_to_quarterly(self, years):
+        convert_between_h_and_qh(self.hourly)
+
+    def time_quarterly_to_hourly(self, years):
+        convert_between_h_and_qh(self.quarterly)
+
+    def time_volume_weighted(self, years):
+        convert_between_h_and_qh(self.quarterly, self.volume)
+
+    def time_mask_missing(self, years):
+        convert_between_h_and_qh(self.quarterly, mask_missing=True)
+
+    def peakmem_quarterly_to_hourly(self, years):
+        convert_between_h_and_qh(self.quarterly)
+
+    def peakmem_hourly_to_quarterly(self, years):
+        convert_between_h_and_qh(self.hourly)
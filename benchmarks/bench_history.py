@@ -0,0 +1,65 @@
+"""
+Benchmarks of the EPEX history container.
+"""
+
+import pandas as pd
+from zipline.history.history import HistorySpec
+from zipline.protocol import BarData
+
+from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.history.history_container import EpexHistoryContainer
+from powerline.utils.hour_quarter_hour_converter import hourly_products, \
+    quarterly_products
+
+__author__ = 'Warren'
+
+
+class HistoryUpdate(object):
+    """
+    EpexHistoryContainer.update with bars holding the auction and intraday
+    prices of many delivery days, i.e. 120 sids per day.
+    """
+
+    params = [1, 10, 100]
+    param_names = ['days']
+
+    def setup(self, days):
+        # seeded benchmark and stored treasury curves, no downloads
+        self.env = EpexExchange(seed=1).shared_env()
+        spec = HistorySpec(bar_count=30, frequency='1m', field='price',
+                           ffill=False, data_frequency='minute',
+                           env=self.env)
+        self.specs = {spec.key_str: spec}
+
+        self.dt = pd.Timestamp('2015-07-01 10:00', tz='UTC')
+        delivery_days = pd.date_range('2015-07-01', periods=days, tz='UTC')
+        data = {}
+        for day in delivery_days:
+            for market, products in [('epex_auction', hourly_products),
+                                     ('intraday', quarterly_products)]:
+                for product in products:
+                    data[len(data)] = {'dt': self.dt, 'day': day,
+                                       'market': market,
+                                       'product': product,
+                                       'price': float(len(data))}
+        self.bar = BarData(data)
+
+    def new_container(self):
+        return EpexHistoryContainer(self.specs, None, self.dt, 'minute',
+                                    env=self.env)
+
+    def time_first_update(self, days):
+        self.new_container().update(self.bar, self.dt)
+
+    def time_repeated_update(self, days):
+        container = self.new_container()
+        for _ in range(10):
+            container.update(self.bar, self.dt)
+
+    def time_update_and_get_history(self, days):
+        container = self.new_container()
+        container.update(self.bar, self.dt)
+        container.get_history()
+
+    def peakmem_update(self, days):
+        self.new_container().update(self.bar, self.dt)
@@ -0,0 +1,68 @@
+"""
+Benchmarks of the risk report and VaR engines.
+"""
+
+import numpy as np
+import pandas as pd
+from zipline.utils.factory import create_simulation_parameters
+
+from powerline.finance.risk import RiskReport, batch_risk_report
+from powerline.finance.var import HistoricalVaR, FilteredHistoricalVaR, \
+    MonteCarloVaR, ParametricVaR
+
+__author__ = 'Warren'
+
+
+def mock_perf(days, random_state):
+    index = pd.date_range('2011-01-01', periods=days, tz='UTC')
+    returns = random_state.normal(0.001, 0.02, days)
+    zeros = np.zeros(days)
+    return pd.DataFrame({'returns': returns,
+                         'pnl': returns * 1e6,
+                         'algorithm_period_return': np.cumprod(1 + returns),
+                         'max_drawdown': zeros,
+                         'benchmark_period_return': zeros,
+                         'sortino': zeros,
+                         'sharpe': zeros,
+                         'information': zeros}, index=index)
+
+
+class RiskReportConstruction(object):
+
+    params = [250, 2500]
+    param_names = ['days']
+
+    def setup(self, days):
+        self.perf = mock_perf(days, np.random.RandomState(1))
+        self.sim_params = create_simulation_parameters(
+            start=self.perf.index[0], end=self.perf.index[-1])
+
+    def time_risk_report(self, days):
+        RiskReport(self.perf, self.sim_params)
+
+    def time_to_dict(self, days):
+        RiskReport(self.perf, self.sim_params).to_dict()
+
+
+class BatchRisk(object):
+    """
+    Risk metrics of a sweep of 1000 runs over a year.
+    """
+
+    params = ['parametric', 'historical', 'filtered', 'monte_carlo']
+    param_names = ['engine']
+
+    def setup(self, engine):
+        random_state = np.random.RandomState(1)
+        self.returns = random_state.normal(0.001, 0.02, (1000, 250))
+        self.pnl = self.returns * 1e6
+        self.engine = {'parametric': ParametricVaR(),
+                       'historical': HistoricalVaR(),
+                       'filtered': FilteredHistoricalVaR(),
+                       'monte_carlo': MonteCarloVaR(seed=1)}[engine]
+
+    def time_batch_risk_report(self, engine):
+        batch_risk_report(self.returns, self.pnl, var_engine=self.engine)
+
+    def peakmem_batch_risk_report(self, engine):
+        batch_risk_report(self.returns, self.pnl, var_engine=self.engine)
@@ -0,0 +1,291 @@
+"""
+Columnar on-disk store of market events, e.g. EPEX auction and intraday
+prices or EEX weekly futures.
+
+Events are partitioned by market and UTC month. Every partition is a
+directory with one .npy file per field, which is memory-mapped when read:
+
+    root/epex_auction/2015-03/dt.npy
+                              sid.npy
+                              price.npy
+                              ...
+
+Reading a date range therefore only touches the months in it, and events are
+streamed one month at a time in time order, so backtests over many years run
+in bounded memory.
+
+A month is a symbolic link to a hidden directory holding its files. Writes
+go to a new directory and swap the link in one rename. A read resolves the
+link once and loads all files from the directory it points to, so readers
+see either the old or the new month. The directories of rewritten months are
+kept for the readers that still use them until cleanup is called.
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+
+__author__ = "Warren"
+
+
+# fields of an event and their dtype on disk, the market is given by the
+# partition
+event_dtype = np.dtype([('dt', 'M8[ns]'), ('sid', 'i8'), ('price', 'f8'),
+                        ('volume', 'f8'), ('type', 'i8'), ('product', 'U8')])
+fields = event_dtype.names
+
+# events as streamed by the store, with their market
+market_event_dtype = np.dtype(event_dtype.descr + [('market', 'U16')])
+
+# longest product name that fits into the product field
+max_product_length = event_dtype['product'].itemsize // \
+    np.dtype('U1').itemsize
+
+# atomically replaces files and links, os.rename does on POSIX
+_replace = getattr(os, 'replace', os.rename)
+
+
+def to_records(frame):
+    """
+    :param frame: DataFrame of events with the fields of event_dtype as
+        columns, dt may be the index instead. A missing volume is 0, a
+        missing product ''.
+    :return: structured array of event_dtype
+    :raises ValueError: for products longer than max_product_length
+    """
+    if 'dt' not in frame.columns:
+        frame = frame.reset_index().rename(
+            columns={frame.index.name or 'index': 'dt'})
+
+    dts = pd.DatetimeIndex(frame['dt'])
+    if dts.tz is not None:
+        dts = dts.tz_convert('UTC').tz_localize(None)
+
+    records = np.zeros(len(frame), dtype=event_dtype)
+    records['dt'] = dts.values
+    records['sid'] = frame['sid'].values
+    records['price'] = frame['price'].values
+    records['type'] = frame['type'].values
+    if 'volume' in frame.columns:
+        records['volume'] = np.nan_to_num(frame['volume'].values.astype(float))
+    if 'product' in frame.columns:
+        products = np.array(frame['product'].fillna('').tolist(), dtype='U')
+        _check_products(products)
+        records['product'] = products
+    return records
+
+
+def _check_products(products):
+    if len(products) and np.char.str_len(products).max() > \
+            max_product_length:
+        raise ValueError('Product names are limited to %d characters'
+                         % max_product_length)
+
+
+class ColumnarStore(object):
+    """
+    Store of events partitioned by market and month, see the module
+    docstring.
+
+    Example:
+
+        store = ColumnarStore('~/powerline/events')
+        store.write('epex_auction', auction_frame)
+        for chunk in store.iter_chunks(start=start, end=end):
+            ...
+    """
+
+    def __init__(self, root):
+        self.root = os.path.expanduser(root)
+
+    def markets(self):
+        """
+        :return: sorted list of the markets in the store
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def months(self, market):
+        """
+        :return: sorted list of the months of market, as 'YYYY-MM'
+        """
+        directory = os.path.join(self.root, market)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if not name.startswith('.'))
+
+    def write(self, market, events):
+        """
+        Adds events to the store. Events of months already in the store are
+        merged with the stored ones, an event replaces a stored one of the
+        same dt and sid.
+
+        :param market: name of the market, e.g. 'epex_auction'
+        :param events: DataFrame (see to_records) or structured array of
+            event_dtype
+        :raises ValueError: for products longer than max_product_length
+        """
+        if isinstance(events, pd.DataFrame):
+            events = to_records(events)
+        else:
+            _check_products(np.asarray(events['product']))
+        events = np.asarray(events, dtype=event_dtype)
+
+        months = events['dt'].astype('M8[M]')
+        for month in np.unique(months):
+            part = events[months == month]
+            name = str(month)
+            stored = self.read_month(market, name)
+            if stored is not None:
+                part = np.concatenate([_to_array(stored), part])
+            self._write_month(market, name, _drop_replaced(part))
+
+    def read_month(self, market, month):
+        """
+        :param market: name of the market
+        :param month: month as 'YYYY-MM'
+        :return: dict of field to memory-mapped array or None if the month
+            is not stored
+        """
+        # resolved once, so all fields come from the same version
+        directory = os.path.realpath(os.path.join(self.root, market, month))
+        try:
+            return dict((field, np.load(os.path.join(directory,
+                                                     field + '.npy'),
+                                        mmap_mode='r'))
+                        for field in fields)
+        except (IOError, OSError):
+            return None
+
+    def iter_chunks(self, markets=None, start=None, end=None):
+        """
+        Streams the events of the markets in time order, one month per
+        chunk. Events at the same time are in the order of markets and,
+        within a market, of their sids.
+
+        :param markets: markets to read, defaults to all markets
+        :param start: first timestamp to read
+        :param end: last timestamp to read
+        :return: generator of structured arrays of market_event_dtype
+        """
+        if markets is None:
+            markets = self.markets()
+        start = _to_datetime64(start)
+        end = _to_datetime64(end)
+
+        months = sorted(set(month for market in markets
+                            for month in self.months(market)))
+        for month in months:
+            if start is not None and \
+                    np.datetime64(month, 'M') < start.astype('M8[M]'):
+                continue
+            if end is not None and \
+                    np.datetime64(month, 'M') > end.astype('M8[M]'):
+                break
+
+            parts = []
+            for market in markets:
+                stored = self.read_month(market, month)
+                if stored is None:
+                    continue
+                mask = np.ones(len(stored['dt']), dtype=bool)
+                if start is not None:
+                    mask &= stored['dt'] >= start
+                if end is not None:
+                    mask &= stored['dt'] <= end
+
+                part = np.zeros(mask.sum(), dtype=market_event_dtype)
+                for field in fields:
+                    part[field] = stored[field][mask]
+                part['market'] = market
+                parts.append(part)
+
+            if not parts:
+                continue
+            chunk = np.concatenate(parts)
+            chunk = chunk[np.argsort(chunk['dt'], kind='mergesort')]
+            if len(chunk):
+                yield chunk
+
+    def cleanup(self, markets=None):
+        """
+        Removes the directories of rewritten months. Must not run while
+        other processes read from the store.
+
+        :param markets: markets to clean up, defaults to all markets
+        :return: number of directories removed
+        """
+        if markets is None:
+            markets = self.markets()
+
+        removed = 0
+        for market in markets:
+            directory = os.path.join(self.root, market)
+            if not os.path.isdir(directory):
+                continue
+            used = set(os.path.realpath(os.path.join(directory, month))
+                       for month in self.months(market))
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.startswith('.') and not os.path.islink(path) and \
+                        os.path.isdir(path) and \
+                        os.path.realpath(path) not in used:
+                    shutil.rmtree(path)
+                    removed += 1
+        return removed
+
+    def _write_month(self, market, month, events):
+        events = events[np.argsort(events['dt'], kind='mergesort')]
+
+        directory = os.path.join(self.root, market)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # the month is written to a new directory and the link to it swapped
+        # in, see the module docstring
+        month_directory = tempfile.mkdtemp(dir=directory,
+                                           prefix='.%s-' % month)
+        for field in fields:
+            np.save(os.path.join(month_directory, field + '.npy'),
+                    np.ascontiguousarray(events[field]))
+
+        link = os.path.join(directory, '.link-%s' % uuid.uuid4().hex)
+        os.symlink(os.path.basename(month_directory), link)
+        _replace(link, os.path.join(directory, month))
+
+
+def _drop_replaced(events):
+    """
+    :return: events without those followed by an event of the same dt and
+        sid, in the order of dt and sid
+    """
+    keys = np.zeros(len(events), dtype=[('dt', 'M8[ns]'), ('sid', 'i8')])
+    keys['dt'] = events['dt']
+    keys['sid'] = events['sid']
+
+    # the first of the reversed events is the last one written
+    _, last = np.unique(keys[::-1], return_index=True)
+    return events[len(events) - 1 - last]
+
+
+def _to_array(columns):
+    array = np.zeros(len(columns['dt']), dtype=event_dtype)
+    for field in fields:
+        array[field] = columns[field]
+    return array
+
+
+def _to_datetime64(dt):
+    if dt is None:
+        return None
+    dt = pd.Timestamp(dt)
+    if dt.tz is not None:
+        dt = dt.tz_convert('UTC').tz_localize(None)
+    return np.datetime64(dt.value, 'ns')
@@ -1,9 +1,13 @@
 import pandas as pd
 from math import pow
 import numpy as np
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from pandas.tseries.offsets import CustomBusinessDay
 
 from zipline.data.loader import ensure_treasury_data
 
+from powerline.data.treasury_store import default_treasury_store
+
 __author__ = "Warren"
 
 
@@ -16,35 +20,80 @@ INDEX_MAPPING = {
     ('treasuries', 'treasury_curves.csv', 'data.treasury.gov'),
 }
 
+# days on which treasury curves are published
+treasury_day = CustomBusinessDay(calendar=USFederalHolidayCalendar())
+
 
-def load_market_data(trading_day,
-                     trading_days, bm_symbol='^EEX'):
+def load_market_data(trading_day, trading_days, bm_symbol='^EEX', seed=None,
+                     treasury_store=None):
     """
     A patch of zipline loader which using the trading_days to generate a
     constant benchmark and treasury curve that matches the market days.
 
+    Treasury curves are read from the local treasury_store (by default the
+    one configured by POWERLINE_TREASURY_STORE) and only downloaded if the
+    store does not cover the trading days. Downloaded curves are merged into
+    the store. Without network access the stored curves are used.
+
     :param trading_day:
     :param trading_days:
     :param bm_symbol:
+    :param seed: seed for the benchmark noise, None uses numpy's global
+        random state
+    :param treasury_store: TreasuryCurveStore
     :return: benchmark, treasury
     """
-    # generate constant daily returns for an annualised rate of 12%
-    daily_return = pow(1.12, 1.0 / 365.0) - 1
-    benchmark_returns = pd.Series(daily_return, index=trading_days)
-
-    sd = 0.001
-    for dt, value in benchmark_returns.iteritems():
-        benchmark_returns[dt] = value + np.random.randn() * sd
+    benchmark_returns = generate_benchmark(trading_days, seed)
 
     first_date = trading_days[0]
     last_date = trading_days[
         trading_days.get_loc(pd.Timestamp.utcnow(), method='ffill') - 2
     ]
-    treasury_curves = ensure_treasury_data(
-        bm_symbol,
-        first_date,
-        last_date,
-    )
+    treasury_curves = load_treasury_curves(bm_symbol, first_date, last_date,
+                                           treasury_store)
     treasury_curves = treasury_curves.reindex(trading_days, method='ffill')
 
     return benchmark_returns, treasury_curves
+
+
+def generate_benchmark(trading_days, seed=None):
+    """
+    :return: Series of constant daily returns for an annualised rate of 12%
+        with normal noise
+    """
+    random_state = np.random if seed is None else \
+        np.random.RandomState(seed)
+
+    daily_return = pow(1.12, 1.0 / 365.0) - 1
+    sd = 0.001
+    noise = random_state.randn(len(trading_days)) * sd
+
+    return pd.Series(daily_return + noise, index=trading_days)
+
+
+def load_treasury_curves(bm_symbol, first_date, last_date,
+                         treasury_store=None):
+    if treasury_store is None:
+        treasury_store = default_treasury_store()
+    if treasury_store is None:
+        return ensure_treasury_data(bm_symbol, first_date, last_date)
+
+    # the curves of the requested range end on its last treasury trading
+    # day, weekends and holidays of the power calendars have none
+    stored = treasury_store.read()
+    if stored is not None and len(stored) and \
+            stored.index[0] <= first_date and \
+            stored.index[-1] >= treasury_day.rollback(last_date):
+        return stored
+
+    try:
+        treasury_curves = ensure_treasury_data(bm_symbol, first_date,
+                                               last_date)
+    except (IOError, OSError):
+        # offline, make do with what is stored
+        if stored is None:
+            raise
+        return stored
+
+    # a download of a shorter range must not drop stored curves
+    return treasury_store.merge(treasury_curves)
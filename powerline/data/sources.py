@@ -0,0 +1,235 @@
+"""
+zipline data sources reading powerline event data.
+"""
+
+from datetime import timedelta
+import heapq
+
+from six.moves import zip
+from zipline.gens.utils import hash_args
+from zipline.protocol import DATASOURCE_TYPE
+from zipline.sources.data_source import DataSource
+import numpy as np
+import pandas as pd
+
+from powerline.data.columnar_store import market_event_dtype
+
+__author__ = "Warren"
+
+
+# sid of the heartbeat events of AuctionClockSource, which is no asset
+clock_sid = -1
+
+
+class RecordArraySource(DataSource):
+    """
+    Emits events straight from NumPy structured arrays, one event per
+    record. Unlike DataPanelSource no Panel is built and only the records
+    that exist are emitted, so sparse data of many sids stays small.
+
+    The records need the fields dt (datetime64 in UTC), sid, price and type.
+    All other fields, e.g. volume, product and market, are passed on to the
+    events as they are, datetime64 fields like dt as UTC timestamps.
+
+    Example:
+
+        records = np.zeros(2, dtype=market_event_dtype)
+        records['dt'] = ...
+        source = RecordArraySource(records)
+    """
+
+    def __init__(self, records, start=None, end=None):
+        """
+        :param records: structured array sorted by dt, or an iterable of
+            such arrays in time order, e.g. chunks read from disk
+        :param start: first timestamp of the data, by default the first dt
+            of an array
+        :param end: last timestamp of the data, by default the last dt of an
+            array
+        """
+        if isinstance(records, np.ndarray):
+            if start is None and len(records):
+                start = pd.Timestamp(records['dt'][0], tz='UTC')
+            if end is None and len(records):
+                end = pd.Timestamp(records['dt'][-1], tz='UTC')
+            self.chunks = [records]
+            self.arg_string = hash_args(len(records), start, end)
+        else:
+            self.chunks = records
+            self.arg_string = hash_args(type(records).__name__, start, end)
+
+        self.start = start
+        self.end = end
+        self._source_id = None
+        self._raw_data = None
+
+    @property
+    def instance_hash(self):
+        return self.arg_string
+
+    def apply_mapping(self, raw_row):
+        """
+        The rows of raw_data are complete events already, including their
+        own type, so they only get the source id.
+        """
+        if self._source_id is None:
+            self._source_id = self.get_hash()
+        raw_row['source_id'] = self._source_id
+        return raw_row
+
+    def raw_data_gen(self):
+        for chunk in self.chunks:
+            names = list(chunk.dtype.names)
+            columns = [_column(chunk, name) for name in names]
+            if 'volume' not in names:
+                names.append('volume')
+                columns.append([0] * len(chunk))
+
+            for values in zip(*columns):
+                yield dict(zip(names, values))
+
+    @property
+    def raw_data(self):
+        if not self._raw_data:
+            self._raw_data = self.raw_data_gen()
+        return self._raw_data
+
+
+def _column(records, name):
+    """
+    :return: field of records as a list of the values the events hold
+    """
+    if records.dtype[name].kind == 'M':
+        return pd.DatetimeIndex(records[name]).tz_localize('UTC')
+    if name == 'price':
+        return records['price'].astype(float).tolist()
+    if name == 'volume':
+        return records['volume'].astype(int).tolist()
+    return records[name].tolist()
+
+
+class ColumnarSource(RecordArraySource):
+    """
+    Streams the events of a ColumnarStore into an algorithm in time order.
+    Only one month of events is held in memory at a time.
+
+    Example:
+
+        source = ColumnarSource(ColumnarStore(path),
+                                markets=['epex_auction', 'intraday'],
+                                start=sim_params.period_start,
+                                end=sim_params.period_end)
+        algo.run(source)
+    """
+
+    def __init__(self, store, markets=None, start=None, end=None):
+        """
+        :param store: ColumnarStore
+        :param markets: markets to stream, defaults to all markets of the
+            store
+        :param start: first timestamp to stream
+        :param end: last timestamp to stream
+        """
+        super(ColumnarSource, self).__init__(
+            store.iter_chunks(markets, start, end), start, end)
+        self.store = store
+        self.markets = markets
+        self.arg_string = hash_args(store.root, markets, start, end)
+
+
+class AuctionClockSource(RecordArraySource):
+    """
+    Emits an 'auction_signal' heartbeat event at every trigger time of
+    scheduled rules, e.g. BeforeEpexAuction, between start and end.
+
+    The simulation only steps through the timestamps that carry events, so
+    merged with the market data the algorithm wakes up exactly at the
+    trigger times and at the data, and minutes without either are skipped.
+    The heartbeats have the sid clock_sid, no price and no volume, and are
+    ignored by the history container.
+
+    Example:
+
+        clock = AuctionClockSource([BeforeEpexAuction(minutes=30)],
+                                   start, end)
+        algo.run(MergedSource([data, clock]))
+    """
+
+    def __init__(self, rules, start, end, sid=clock_sid):
+        """
+        :param rules: rules with a next_trigger(dt) method
+        :param start: first timestamp of the clock
+        :param end: last timestamp of the clock
+        :param sid: sid of the heartbeat events
+        """
+        start = _to_utc(start)
+        end = _to_utc(end)
+        times = trigger_times(rules, start, end)
+
+        records = np.zeros(len(times), dtype=market_event_dtype)
+        records['dt'] = times.tz_localize(None).values
+        records['sid'] = sid
+        records['price'] = np.nan
+        records['type'] = DATASOURCE_TYPE.TRADE
+        records['market'] = 'auction_signal'
+
+        super(AuctionClockSource, self).__init__(records, start, end)
+        self.rules = rules
+        self.arg_string = hash_args(len(records), sid, start, end)
+
+
+def trigger_times(rules, start, end):
+    """
+    :param rules: rules with a next_trigger(dt) method
+    :return: sorted DatetimeIndex of the times between start and end at
+        which any of the rules triggers
+    """
+    times = set()
+    for rule in rules:
+        dt = start
+        while True:
+            trigger = rule.next_trigger(dt)
+            if trigger > end:
+                break
+            times.add(trigger)
+            dt = trigger + timedelta(minutes=1)
+    return pd.DatetimeIndex(sorted(times), tz='UTC')
+
+
+class MergedSource(object):
+    """
+    Iterates the events of several sources in time order. Events at the
+    same time keep the order of the sources.
+
+    Unlike a list of sources it has a start and an end, so algo.run can
+    still take the simulation period from it.
+    """
+
+    def __init__(self, sources, start=None, end=None):
+        """
+        :param sources: sources of events in time order
+        :param start: first timestamp, by default the earliest start of the
+            sources
+        :param end: last timestamp, by default the latest end of the sources
+        """
+        self.sources = sources
+        if start is None:
+            start = min(source.start for source in sources)
+        if end is None:
+            end = max(source.end for source in sources)
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        streams = [(((event.dt, i, n), event) for n, event in
+                    enumerate(source))
+                   for i, source in enumerate(self.sources)]
+        for _, event in heapq.merge(*streams):
+            yield event
+
+
+def _to_utc(dt):
+    dt = pd.Timestamp(dt)
+    if dt.tz is None:
+        return dt.tz_localize('UTC')
+    return dt.tz_convert('UTC')
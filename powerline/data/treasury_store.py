@@ -0,0 +1,102 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+__author__ = "Warren"
+
+
+STORE_ENV = 'POWERLINE_TREASURY_STORE'
+
+# atomically replaces files, os.rename does on POSIX
+_replace = getattr(os, 'replace', os.rename)
+
+
+class TreasuryCurveStore(object):
+    """
+    Local, file-backed store of treasury curves. Dates, values and column
+    names are kept in one .npz file, which a write replaces in one rename,
+    so readers see either the old or the new curves. Populating a store once
+    allows building environments on machines without network access.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, 'curves.npz')
+
+    def read(self):
+        """
+        :return: DataFrame of treasury curves indexed by UTC dates, or None if
+            the store is empty
+        """
+        try:
+            stored = np.load(self.path)
+        except (IOError, OSError):
+            return None
+        try:
+            dates = stored['dates']
+            columns = stored['columns']
+            values = stored['values']
+        finally:
+            stored.close()
+
+        index = pd.DatetimeIndex(dates).tz_localize('UTC')
+        return pd.DataFrame(values, index=index, columns=columns.tolist())
+
+    def write(self, curves):
+        """
+        :param curves: DataFrame of treasury curves indexed by dates
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        index = pd.DatetimeIndex(curves.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+        with os.fdopen(handle, 'wb') as f:
+            np.savez(f, dates=index.values,
+                     columns=np.array([str(c) for c in curves.columns]),
+                     values=curves.values.astype(float))
+        _replace(tmp_path, self.path)
+
+    def merge(self, curves):
+        """
+        Adds curves to the stored ones. On dates in both, the new curves
+        replace the stored ones.
+
+        :param curves: DataFrame of treasury curves indexed by UTC dates
+        :return: DataFrame of all curves in the store after the merge
+        """
+        stored = self.read()
+        if stored is not None and len(stored):
+            index = pd.DatetimeIndex(curves.index)
+            if index.tz is None:
+                index = index.tz_localize('UTC')
+            curves = curves.copy()
+            curves.index = index
+            kept = stored[~stored.index.isin(curves.index)]
+            columns = curves.columns.tolist() + [
+                column for column in stored.columns
+                if column not in curves.columns]
+            curves = pd.concat([kept, curves]).sort_index()[columns]
+
+        self.write(curves)
+        return curves
+
+
+def default_treasury_store():
+    """
+    :return: store in the directory given by POWERLINE_TREASURY_STORE or None
+        if the variable is not set
+    """
+    directory = os.environ.get(STORE_ENV)
+    if not directory:
+        return None
+    return TreasuryCurveStore(directory)
@@ -10,6 +10,7 @@ class EexExchange(Exchange):
     """
     Implementing abstractproperties for the EEX exchange
     """
+    default_products = ('F1B1', 'F1B2', 'F1B3', 'F1B4', 'F1B5')
 
     @property
     def benchmark(self):
@@ -32,6 +33,6 @@ class EexExchange(Exchange):
     @property
     def products(self):
         if self._products is None:
-            self._products = ['F1B1', 'F1B2', 'F1B3', 'F1B4', 'F1B5']
+            self._products = self.default_products
 
         return self._products
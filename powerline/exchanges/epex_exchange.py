@@ -1,3 +1,4 @@
+from six.moves import intern
 from zipline.finance.commission import PerShare
 
 from powerline.utils import tradingcalendar_epex
@@ -6,10 +7,18 @@ from powerline.exchanges.exchange import Exchange
 __author__ = "Warren"
 
 
+hourly_products = tuple(intern("%(a)02d-%(b)02d" % {'a': i, 'b': i + 1})
+                        for i in range(24))
+quarterly_products = tuple(intern("%02dQ%d" % (j, i))
+                           for j in range(24) for i in range(1, 5))
+
+
 class EpexExchange(Exchange):
     """
     Implementing abstractproperties for the EPEX exchange
     """
+    default_products = (('hour', hourly_products), ('qh', quarterly_products))
+
     @property
     def benchmark(self):
         if self._benchmark is None:
@@ -31,14 +40,6 @@ class EpexExchange(Exchange):
     @property
     def products(self):
         if self._products is None:
-            self._products = {'hour': {}, 'qh': {}}
-            self._products['hour'] = ["%(a)02d-%(b)02d" % {'a': i, 'b': i + 1}
-                                      for i in range(24)]
-            self._products['qh'] = [
-                str(j).zfill(2) +
-                "Q" +
-                str(i) for j in range(24) for i in range(
-                    1,
-                    5)]
+            self._products = dict(self.default_products)
 
         return self._products
@@ -1,5 +1,8 @@
 from abc import ABCMeta, abstractproperty
-from six import with_metaclass
+from collections import OrderedDict
+from functools import partial
+from six import iteritems, with_metaclass
+from six.moves import intern
 
 from zipline.finance.trading import TradingEnvironment
 
@@ -8,6 +11,56 @@ from powerline.data.loader_power import load_market_data
 __author__ = "Warren, Stefan"
 
 
+# number of identifiers cached, the least recently used are dropped first
+ident_cache_size = 100000
+_ident_cache = OrderedDict()
+
+# benchmark and treasury data shared by all exchanges of the process
+_market_data_cache = {}
+
+
+# trading environments shared by all exchanges of the process, see
+# Exchange.shared_env
+_env_cache = {}
+
+
+def clear_market_data_cache():
+    _market_data_cache.clear()
+
+
+def clear_env_cache():
+    _env_cache.clear()
+
+
+def make_ident(day, product):
+    """
+    :return: identifier of product delivered on day, interned if it is a
+        native str
+    """
+    key = (day, product)
+    try:
+        ident = _ident_cache.pop(key)
+    except KeyError:
+        if len(_ident_cache) >= ident_cache_size:
+            _ident_cache.popitem(last=False)
+        ident = str(day) + '_' + product
+        if isinstance(ident, str):
+            # unicode can not be interned on Python 2
+            ident = intern(ident)
+    _ident_cache[key] = ident
+    return ident
+
+
+def _metadata_key(futures_data):
+    """
+    :return: hashable key of asset metadata, equal for equal metadata
+    """
+    if not futures_data:
+        return None
+    return tuple(sorted((sid, tuple(sorted(iteritems(metadata))))
+                        for sid, metadata in iteritems(futures_data)))
+
+
 class Exchange(with_metaclass(ABCMeta)):
     """
     A class to collect all exchange-relevant info.
@@ -20,21 +73,82 @@ class Exchange(with_metaclass(ABCMeta)):
         self._env = None
         self._products = kwargs.get("products", None)
         self.exchange_tz = "Europe/Berlin"
-        self.load = load_market_data
+        self._seed = kwargs.get('seed')
+        self._treasury_store = kwargs.get('treasury_store')
+        self.load = partial(load_market_data, seed=self._seed,
+                            treasury_store=self._treasury_store)
 
     @property
     def env(self):
         """
         passing relevant exchange objects to the environment
+
+        Every exchange gets its own environment and thus its own asset
+        database, but the benchmark and treasury data are loaded only once
+        per process, see load_shared. See shared_env for an environment
+        shared with other exchanges.
         """
         if self._env is None:
-            self._env = TradingEnvironment(
-                bm_symbol=self.benchmark,
-                exchange_tz=self.exchange_tz,
-                env_trading_calendar=self.calendar,
-                load=self.load)
+            self._env = self._build_env()
         return self._env
 
+    def shared_env(self, futures_data=None):
+        """
+        Environment shared by all exchanges of the process with the same
+        class, benchmark, calendar, seed, treasury store and asset metadata,
+        e.g. by the runs of a parameter sweep. The metadata is written once
+        when the environment is built.
+
+        Shared environments must not be written to. For different metadata
+        call shared_env with all of it, which builds a new environment and
+        leaves the shared one as it is.
+
+        :param futures_data: asset metadata as taken by
+            TradingEnvironment.write_data(futures_data=...)
+        :return: TradingEnvironment
+        """
+        key = (type(self), self.benchmark, self.calendar.__name__,
+               self._seed, self._treasury_key(), _metadata_key(futures_data))
+        try:
+            return _env_cache[key]
+        except KeyError:
+            env = self._build_env()
+            if futures_data:
+                env.write_data(futures_data=futures_data)
+            _env_cache[key] = env
+            return env
+
+    def _build_env(self):
+        return TradingEnvironment(
+            bm_symbol=self.benchmark,
+            exchange_tz=self.exchange_tz,
+            env_trading_calendar=self.calendar,
+            load=self.load_shared)
+
+    def load_shared(self, trading_day, trading_days, bm_symbol):
+        """
+        Calls self.load once per exchange class, benchmark, calendar, date
+        range, seed and treasury store and hands out copies of the result
+        afterwards.
+        """
+        key = (type(self), bm_symbol, self.calendar.__name__,
+               trading_days[0], trading_days[-1], len(trading_days),
+               self._seed, self._treasury_key())
+        try:
+            benchmark_returns, treasury_curves = _market_data_cache[key]
+        except KeyError:
+            benchmark_returns, treasury_curves = self.load(
+                trading_day, trading_days, bm_symbol)
+            _market_data_cache[key] = (benchmark_returns, treasury_curves)
+
+        return benchmark_returns.copy(), treasury_curves.copy()
+
+    def _treasury_key(self):
+        """
+        :return: directory of the treasury store, None for the default one
+        """
+        return getattr(self._treasury_store, 'directory', None)
+
     @abstractproperty
     def benchmark(self):
         """defined in subclass"""
@@ -48,4 +162,4 @@ class Exchange(with_metaclass(ABCMeta)):
         """defined in subclass"""
 
     def insert_ident(self, day, product):
-        return str(day) + '_' + product
+        return make_ident(day, product)
@@ -1,34 +1,193 @@
-from datetime import timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
 from zipline.algorithm import TradingAlgorithm
 from zipline.utils.api_support import api_method
 from zipline.utils.events import StatelessRule, _build_offset
 import numpy as np
+import pandas as pd
 
+from powerline.data.sources import AuctionClockSource, MergedSource
+from powerline.utils import tradingcalendar_epex
 from powerline.utils.tradingcalendar_epex import get_auctions
 from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.utils.hour_quarter_hour_converter import day_positions, \
+    day_products
 
 __author__ = 'Warren'
 
 
+# delivery days and grids kept in the asset index of an algorithm, the least
+# recently used are dropped first
+asset_index_size = 64
+
+
+class AssetIndex(object):
+    """
+    Bounded index of the assets of delivery days. The assets of a key are
+    looked up once from the asset finder and then served from the index,
+    which holds the size least recently used keys. It starts over when a
+    different asset finder is passed, call clear if the metadata of the same
+    finder changes.
+    """
+
+    def __init__(self, size=asset_index_size):
+        self.size = size
+        self._assets = OrderedDict()
+        self._asset_finder = None
+
+    def __len__(self):
+        return len(self._assets)
+
+    def get(self, asset_finder, key, symbols):
+        """
+        :param asset_finder: asset finder holding the futures
+        :param key: hashable key of the assets, e.g. the delivery day
+        :param symbols: function of key returning the symbols of the assets,
+            only called if key is not in the index
+        :return: list of the assets of key
+        """
+        if asset_finder is not self._asset_finder:
+            self.clear()
+            self._asset_finder = asset_finder
+
+        try:
+            assets = self._assets.pop(key)
+        except KeyError:
+            assets = [asset_finder.lookup_future_symbol(symbol)
+                      for symbol in symbols(key)]
+            if len(self._assets) >= self.size:
+                self._assets.popitem(last=False)
+        self._assets[key] = assets
+        return assets
+
+    def clear(self):
+        """
+        Empties the index, e.g. after new asset metadata was written.
+        """
+        self._assets.clear()
+        self._asset_finder = None
+
+
 class TradingAlgorithmAuction(TradingAlgorithm):
+    """
+    Algorithm trading the EPEX auction.
+
+    With auction_clock=True the BeforeEpexAuction rules passed to
+    schedule_function drive an auction clock: run merges heartbeat events at
+    their trigger times into the data, so the rules fire without auction
+    signals in the data and the simulation only steps through trigger times
+    and timestamps with data. The clock triggers on every day of the data,
+    so the asset metadata has to cover the day after the last one.
+    """
 
     def __init__(self, *args, **kwargs):
         if kwargs.get('auction'):
             self.auction = kwargs.pop('auction')
         else:
             raise ValueError('You must define an auction function.')
+        self.auction_clock = kwargs.pop('auction_clock', False)
+        self.auction_rules = []
         self.exchange = EpexExchange()
         self.products = self.exchange.products
+        self._auction_assets = AssetIndex()
         super(TradingAlgorithmAuction, self).__init__(*args, **kwargs)
 
+    def schedule_function(self, func, date_rule=None, time_rule=None,
+                          half_days=True):
+        if isinstance(time_rule, BeforeEpexAuction):
+            self.auction_rules.append(time_rule)
+        super(TradingAlgorithmAuction, self).schedule_function(
+            func, date_rule, time_rule, half_days)
+
+    def run(self, source, overwrite_sim_params=True, *args, **kwargs):
+        if self.auction_clock and self.auction_rules:
+            source = self._add_auction_clock(source, overwrite_sim_params)
+        return super(TradingAlgorithmAuction, self).run(
+            source, overwrite_sim_params, *args, **kwargs)
+
+    def _add_auction_clock(self, source, overwrite_sim_params):
+        """
+        :return: source with the heartbeats of the auction rules added
+        """
+        if isinstance(source, (list, tuple)):
+            # zipline keeps the sim params for a list of sources
+            return list(source) + [AuctionClockSource(
+                self.auction_rules, self.sim_params.first_open,
+                self.sim_params.last_close)]
+
+        if not (hasattr(source, 'start') and hasattr(source, 'end')):
+            # DataFrames and Panels are converted by zipline
+            return source
+
+        if overwrite_sim_params:
+            start, end = source.start, source.end
+        else:
+            start = self.sim_params.first_open
+            end = self.sim_params.last_close
+        clock = AuctionClockSource(self.auction_rules, start, end)
+        return MergedSource([source, clock], source.start, source.end)
+
     @api_method
-    def order_auction(self, amounts):
+    def order_auction(self, amounts, grid='hour'):
+        """
+        Orders target positions for all products of tomorrow's delivery day.
+
+        :param amounts: target positions of the products delivered tomorrow
+            in the order of day_products. Alternatively the 24 hourly or 96
+            quarter hour values of a regular day, or the 25 or 100 of a long
+            day, which are matched to tomorrow's products by name, see
+            day_positions.
+        :param grid: 'hour' for the hourly products or 'qh' for the
+            quarter-hourly products. The short day at the start of daylight
+            saving time has 23 and 92, the long day at its end 25 and 100.
+        :raises ValueError: if amounts fits neither
+        """
         day = self.get_datetime().date() + timedelta(days=1)
-        amounts = np.concatenate((amounts, [0]))
-        for i, product in enumerate(self.products['hour']):
-            ident = self.exchange.insert_ident(day, product)
-            self.order_target(self.future_symbol(ident), amounts[i])
+        assets = self.get_auction_assets(day, grid)
+
+        amounts = np.asarray(amounts)
+        if len(amounts) != len(assets):
+            amounts = amounts[day_positions(day, len(amounts), grid,
+                                            self.exchange.exchange_tz)]
+
+        self.batch_order_target(assets, amounts)
+
+    def get_auction_assets(self, day, grid='hour'):
+        """
+        The assets of a delivery day are looked up once per grid and then
+        served from a bounded index, see AssetIndex.
+
+        :param day: delivery day
+        :param grid: 'hour' or 'qh'
+        :return: list of the assets delivered on day in delivery order, only
+            of the products that exist on day, see day_products
+        """
+        return self._auction_assets.get(self.asset_finder, (day, grid),
+                                        self._auction_symbols)
+
+    def _auction_symbols(self, key):
+        day, grid = key
+        return [self.exchange.insert_ident(day, product) for product in
+                day_products(day, grid, self.exchange.exchange_tz)]
+
+    @api_method
+    def batch_order_target(self, assets, targets):
+        """
+        Same as calling order_target for every asset, but the portfolio is
+        only read once and no orders are placed for assets already at their
+        target.
+
+        :param assets: list of assets
+        :param targets: target positions, aligned with assets
+        """
+        positions = self.portfolio.positions
+        current = np.array([positions[asset].amount if asset in positions
+                            else 0 for asset in assets])
+        amounts = np.asarray(targets) - current
+
+        for i in np.flatnonzero(amounts):
+            self.order(assets[i], amounts[i])
 
 
 def auction(algo, data):
@@ -42,6 +201,9 @@ class BeforeEpexAuction(StatelessRule):
     Example that triggers triggers before 30 minutes of the auction close:
 
     BeforeEpexAuction(minutes=30)
+
+    The trigger times of all EPEX calendar days are computed once, so
+    should_trigger is a dictionary lookup.
     """
 
     def __init__(self, offset=None, **kwargs):
@@ -50,12 +212,46 @@ class BeforeEpexAuction(StatelessRule):
             kwargs,
             timedelta(minutes=60),  # Defaults to the first minute.
         )
-        self._dt = None
+        self._triggers = None
 
     def should_trigger(self, dt, env):
-        return (self._get_auction(dt) - self.offset).time() == dt.time()
+        return self._get_trigger(dt) == dt
+
+    def next_trigger(self, dt):
+        """
+        :param dt: UTC timestamp
+        :return: first UTC timestamp at or after dt at which the rule triggers
+        """
+        trigger = self._get_trigger(dt)
+        if trigger < dt:
+            trigger = self._get_trigger(dt + timedelta(days=1))
+        return trigger
+
+    def _get_trigger(self, dt):
+        if self._triggers is None:
+            self._triggers = self._build_triggers()
+
+        ordinal = dt.toordinal()
+        try:
+            return self._triggers[ordinal]
+        except KeyError:
+            # day outside of the calendar
+            trigger_time = (get_auctions(dt) - self.offset).time()
+            trigger = pd.Timestamp(datetime.combine(dt.date(), trigger_time),
+                                   tz='UTC')
+            self._triggers[ordinal] = trigger
+            return trigger
+
+    def _build_triggers(self):
+        """
+        :return: dict of date ordinal to the trigger time on that UTC day
+        """
+        days = tradingcalendar_epex.trading_days
+        triggers = (tradingcalendar_epex.auction_times - self.offset).values
+        day_values = days.values.astype('datetime64[D]')
 
-    def _get_auction(self, dt):
-        self._dt = get_auctions(dt)
+        trigger_times = triggers - triggers.astype('datetime64[D]')
+        on_day = pd.DatetimeIndex(day_values + trigger_times).tz_localize(
+            'UTC')
 
-        return self._dt
+        return dict(zip([day.toordinal() for day in days], on_day))
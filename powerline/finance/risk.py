@@ -1,25 +1,63 @@
 #!/usr/local/bin/python
 # -*- coding: utf-8 -*-
 
+import json
+
 from scipy.stats import norm
 import numpy as np
 from tabulate import tabulate
 import pandas as pd
-from pyfolio.timeseries import gen_drawdown_table
 
-number_drawdowns_for_longest = 20
+from powerline.finance.var import ParametricVaR
 
 __author__ = "Warren, Max"
 
 
+# metrics of a RiskReport in the order of its structured output
+report_fields = ['profit', 'pnl_max', 'pnl_min', 'returns_period',
+                 'returns_max', 'returns_min', 'max_drawdown', 'sharpe',
+                 'sortino', 'information', 'var_95', 'var_99',
+                 'five_day_var_95', 'five_day_var_99',
+                 'expected_shortfall_95', 'expected_shortfall_99',
+                 'win_loss', 'longest_drawdown_duration',
+                 'longest_drawdown_start', 'longest_drawdown_end',
+                 'benchmark_profits']
+
+
+def _to_builtin(value):
+    """
+    converts NumPy and pandas scalars to plain Python values
+    """
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
 class RiskReport(object):
     """
     Collects all zipline risk parameters and adds extra risk parameters
     e.g. VaR.
     A report can be displayed in the terminal by calling display_report()
+    or turned into a dict, JSON or an Arrow table with to_dict, to_json and
+    to_arrow, e.g. for every run of a sweep. Plotting is only done on
+    request, by plot() or display_report(plot=True).
     """
 
-    def __init__(self, perf, sim_params):
+    def __init__(self, perf, sim_params, trading_days=None, var_engine=None):
+        """
+        :param perf: perf frame of a zipline run
+        :param sim_params: simulation parameters of the run
+        :param trading_days: DatetimeIndex of the exchange calendar, e.g.
+            exchange.env.trading_days. Drawdown durations are counted in its
+            days. By default the days of perf are counted, which are the
+            trading days of the run.
+        :param var_engine: engine of powerline.finance.var used for VaR and
+            expected shortfall, defaults to ParametricVaR
+        """
+        self.trading_days = trading_days
+        self.var_engine = var_engine or ParametricVaR()
         self.returns = perf.returns
         self.returns_max = perf.returns.max()
         self.returns_min = perf.returns.min()
@@ -45,8 +83,12 @@ class RiskReport(object):
         self.var_99 = 0
         self.five_day_var_95 = 0
         self.five_day_var_99 = 0
+        self.expected_shortfall_95 = 0
+        self.expected_shortfall_99 = 0
         self.win_loss = 0
-        self.longest_drawdown_duration = pd.Timestamp(0)
+        self.longest_drawdown_duration = 0
+        self.longest_drawdown_start = None
+        self.longest_drawdown_end = None
 
         self.calculate_metrics()
 
@@ -55,16 +97,19 @@ class RiskReport(object):
         self.var_99 = self.calculate_var(c=0.99)
         self.five_day_var_95 = self.calculate_var(c=0.95, n=5)
         self.five_day_var_99 = self.calculate_var(c=0.99, n=5)
+        self.expected_shortfall_95 = self.calculate_expected_shortfall(c=0.95)
+        self.expected_shortfall_99 = self.calculate_expected_shortfall(c=0.99)
         self.win_loss = self.calculate_win_loss()
 
-        self.longest_drawdown_duration = \
-            self.calculate_longest_drawdown_duration()
+        self.longest_drawdown_duration, self.longest_drawdown_start, \
+            self.longest_drawdown_end = self.calculate_longest_drawdown()
 
     def calculate_var(self, c, n=1):
         """
-        Variance-Covariance calculation of daily Value-at-Risk based on a
+        Value-at-Risk on a portfolio of value P, computed by the var engine.
+        The default engine is the Variance-Covariance calculation based on a
         normal distribution model with mean of returns mu and standard
-        deviation of returns sigma, on a portfolio of value P.
+        deviation of returns sigma.
         see page 9: https://people.math.ethz.ch/~embrecht/ftp/LongTermRisk.pdf
 
         :param c: confidence level of the calculation
@@ -72,14 +117,27 @@ class RiskReport(object):
             interval; here generally number of days)
         :return: the value at risk (VaR) over given period n
         """
-        mu = self.returns.mean()
-        sigma = self.returns.std()
         P = self.profit
 
-        alpha = norm.ppf(1 - c, n * mu, np.sqrt(n) * sigma)
+        alpha = self.var_engine.quantile(self.returns.values, c, n)
 
         return - P * alpha
 
+    def calculate_expected_shortfall(self, c, n=1):
+        """
+        Expected shortfall (CVaR), the mean loss beyond the VaR.
+
+        :param c: confidence level of the calculation
+        :param n: length of the considered time period in days
+        :return: the expected shortfall over given period n
+        """
+        P = self.profit
+
+        shortfall = self.var_engine.expected_shortfall(self.returns.values,
+                                                       c, n)
+
+        return - P * shortfall
+
     def calculate_win_loss(self):
         """
         ratio of wins over loses
@@ -90,26 +148,86 @@ class RiskReport(object):
 
         return win_loss
 
-    def calculate_longest_drawdown_duration(self):
-        drawdown_table = gen_drawdown_table(self.returns,
-                                            top=number_drawdowns_for_longest)
-        if pd.isnull(drawdown_table['duration']).any():
-            last_peak = np.argmax(self.returns.cumsum())
-            if last_peak.tz is None:
-                last_peak = last_peak.tz_localize('UTC')
-
-            final_drawdown_duration = len(pd.date_range(last_peak, self.end_dt,
-                                                        freq='B'))
-            longest_drawdown_duration = max(final_drawdown_duration,
-                                            drawdown_table['duration'].max())
+    def calculate_longest_drawdown(self):
+        """
+        Exact longest drawdown of the cumulative returns, see
+        longest_drawdowns.
+
+        :return: duration in trading days, start (peak) and end date, or
+            0, None and None without a drawdown
+        """
+        duration, start, end = longest_drawdowns(self.returns.values)
+        if not duration[0]:
+            return 0, None, None
+        start = self.returns.index[start[0]]
+        end = self.returns.index[end[0]]
+
+        if self.trading_days is None:
+            duration = duration[0]
         else:
-            longest_drawdown_duration = drawdown_table['duration'].max()
+            # trading days after the peak up to and including the end
+            duration = \
+                self.trading_days.searchsorted(end, side='right') - \
+                self.trading_days.searchsorted(start, side='right')
+
+        return duration, start, end
+
+    def calculate_longest_drawdown_duration(self):
+        return self.calculate_longest_drawdown()[0]
+
+    def to_dict(self):
+        """
+        :return: dict of the metrics in report_fields and the period, with
+            plain Python values
+        """
+        report = dict((field, _to_builtin(getattr(self, field)))
+                      for field in report_fields)
+        report['period'] = self.period
+        return report
+
+    def to_json(self, **kwargs):
+        """
+        :param kwargs: passed on to json.dumps
+        :return: JSON string of to_dict with ISO dates and NaN as null
+        """
+        report = self.to_dict()
+        for field, value in report.items():
+            if isinstance(value, float) and np.isnan(value):
+                report[field] = None
+            elif hasattr(value, 'isoformat'):
+                report[field] = value.isoformat()
+        return json.dumps(report, **kwargs)
+
+    def to_arrow(self):
+        """
+        requires pyarrow
+
+        :return: pyarrow Table with the report as a single row
+        """
+        import pyarrow
+
+        report = self.to_dict()
+        return pyarrow.Table.from_pydict(
+            dict((field, [value]) for field, value in report.items()))
 
-        return longest_drawdown_duration
+    def plot(self):
+        """
+        plots the cumulative returns against the benchmark, requires
+        matplotlib
 
-    def display_report(self):
+        :return: matplotlib axes of the plot
+        """
+        import matplotlib.pyplot as plt
+
+        _, ax = plt.subplots()
+        pd.concat([self.returns.cumsum(), self.benchmark], axis=1).plot(ax=ax)
+        return ax
+
+    def display_report(self, plot=False):
         """
         displays ascii table in the terminal
+
+        :param plot: whether to plot the returns as well, see plot
         """
         table = [
                 [u"PnL (€)", self.profit],
@@ -122,19 +240,294 @@ class RiskReport(object):
                 ["Sharpe", self.sharpe],
                 ["Information", self.information],
                 [u"Max Drawdown (%)", self.max_drawdown * 100],
-                ["Longest Drawdown Duration*", self.longest_drawdown_duration],
+                ["Longest Drawdown Duration", self.longest_drawdown_duration],
+                ["Longest Drawdown Start", self.longest_drawdown_start],
+                ["Longest Drawdown End", self.longest_drawdown_end],
                 [u"VaR 95 (€)", self.var_95],
                 [u"VaR 99 (€)", self.var_99],
                 [u"VaR 95 (€), 5 days", self.five_day_var_95],
                 [u"VaR 99 (€), 5 days", self.five_day_var_99],
+                [u"Expected Shortfall 95 (€)", self.expected_shortfall_95],
+                [u"Expected Shortfall 99 (€)", self.expected_shortfall_99],
                 ["Win Loss Ratio", self.win_loss],
                 [u"Total Benchmark Profit (€)", self.benchmark_profits]]
         headers = ["Risk Report", self.period]
 
-        pd.concat([self.returns.cumsum(), self.benchmark], axis=1).plot()
+        if plot:
+            self.plot()
 
         print(tabulate(table, headers, tablefmt="fancy_grid",
                        numalign="right"))
 
-        print("* : " +
-              "Among the top %d drawdowns." % number_drawdowns_for_longest)
+
+def longest_drawdowns(returns):
+    """
+    Finds the longest drawdown of every row of a (runs x days) array of
+    returns in a single pass over the days. A drawdown lasts from the peak
+    of the cumulative returns to the first day back at or above the peak,
+    or to the last day if it has not recovered. Its duration is the number
+    of days between these two.
+
+    :param returns: 2-d array of daily returns, NaN counts as 0
+    :return: arrays of the durations, peak positions and end positions,
+        the positions are -1 for rows without a drawdown
+    """
+    returns = np.atleast_2d(np.asarray(returns, dtype=float))
+    positions = np.arange(returns.shape[1])
+    rows = np.arange(returns.shape[0])
+
+    cumulative = np.cumprod(1 + np.nan_to_num(returns), axis=1)
+    running_max = np.maximum.accumulate(cumulative, axis=1)
+    underwater = cumulative < running_max
+    last_peak = np.maximum.accumulate(np.where(underwater, 0, positions),
+                                      axis=1)
+
+    # duration so far of the drawdown a day is in or recovers from
+    durations = np.zeros(returns.shape, dtype=int)
+    durations[:, 1:] = np.where(underwater[:, :-1] | underwater[:, 1:],
+                                positions[1:] - last_peak[:, :-1], 0)
+
+    end = durations.argmax(axis=1)
+    start = last_peak[rows, np.maximum(end - 1, 0)]
+    duration = durations[rows, end]
+    start[duration == 0] = -1
+    end[duration == 0] = -1
+
+    return duration, start, end
+
+
+def batch_risk_report(returns, pnl, run_ids=None, var_engine=None):
+    """
+    Computes the RiskReport metrics of many runs at once with vectorized
+    NumPy operations, e.g. to rank the results of a parameter sweep.
+
+    :param returns: 2-d array or DataFrame (runs x days) of daily returns
+    :param pnl: 2-d array or DataFrame (runs x days) of daily pnl
+    :param run_ids: labels of the runs, defaults to the index of returns
+        if it is a DataFrame
+    :param var_engine: engine of powerline.finance.var, defaults to
+        ParametricVaR
+    :return: DataFrame with one row of metrics per run
+    """
+    if var_engine is None:
+        var_engine = ParametricVaR()
+
+    if run_ids is None and isinstance(returns, pd.DataFrame):
+        run_ids = returns.index
+
+    returns = np.asarray(returns, dtype=float)
+    pnl = np.asarray(pnl, dtype=float)
+
+    profit = np.nansum(pnl, axis=1)
+
+    wins = (returns > 0).sum(axis=1)
+    losses = (returns < 0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_loss = np.round(wins / losses.astype(float), 2)
+
+    metrics = {
+        'profit': profit,
+        'pnl_max': np.nanmax(pnl, axis=1),
+        'pnl_min': np.nanmin(pnl, axis=1),
+        'returns_max': np.nanmax(returns, axis=1),
+        'returns_min': np.nanmin(returns, axis=1),
+        'win_loss': win_loss,
+        'longest_drawdown_duration': longest_drawdowns(returns)[0],
+    }
+    for name, c, n in [('var_95', 0.95, 1), ('var_99', 0.99, 1),
+                       ('five_day_var_95', 0.95, 5),
+                       ('five_day_var_99', 0.99, 5)]:
+        alpha = var_engine.quantile(returns, c, n)
+        metrics[name] = - profit * alpha
+    for name, c in [('expected_shortfall_95', 0.95),
+                    ('expected_shortfall_99', 0.99)]:
+        shortfall = var_engine.expected_shortfall(returns, c)
+        metrics[name] = - profit * shortfall
+
+    return pd.DataFrame(metrics, index=run_ids,
+                        columns=['profit', 'pnl_max', 'pnl_min',
+                                 'returns_max', 'returns_min', 'var_95',
+                                 'var_99', 'five_day_var_95',
+                                 'five_day_var_99', 'expected_shortfall_95',
+                                 'expected_shortfall_99', 'win_loss',
+                                 'longest_drawdown_duration'])
+
+
+class RiskAccumulator(object):
+    """
+    Incremental counterpart of RiskReport for long or live runs. Every call
+    of update takes the pnl and returns of one day and updates all metrics in
+    O(1), so they can be read at any time during the run without going over
+    the history again.
+
+    Mean and variance of the returns are kept with Welford's algorithm, the
+    drawdowns follow the definition of longest_drawdowns.
+
+    Example, e.g. in handle_data of an algorithm:
+
+        risk = RiskAccumulator()
+        ...
+        risk.update(returns, pnl, dt=algo.get_datetime())
+        if risk.var_95 > limit:
+            ...
+    """
+
+    def __init__(self):
+        self.days = 0
+        self.profit = 0.
+        self.pnl_max = np.nan
+        self.pnl_min = np.nan
+        self.returns_max = np.nan
+        self.returns_min = np.nan
+        self.wins = 0
+        self.losses = 0
+
+        self._mean = 0.
+        self._m2 = 0.
+
+        self.cumulative = 1.
+        self.peak = None
+        self.max_drawdown = 0.
+        self.longest_drawdown_duration = 0
+        self.longest_drawdown_start = None
+        self.longest_drawdown_end = None
+
+        self.last_dt = None
+        self._peak_dt = None
+        self._peak_day = 0
+        self._underwater = False
+
+    def update(self, returns, pnl, dt=None):
+        """
+        Adds one day to the metrics. NaN returns and pnl count as 0, like in
+        batch_risk_report.
+
+        :param returns: return of the day
+        :param pnl: pnl of the day
+        :param dt: date of the day, used for the drawdown start and end.
+            Defaults to the number of the day.
+        """
+        returns = 0. if np.isnan(returns) else float(returns)
+        pnl = 0. if np.isnan(pnl) else float(pnl)
+        day = self.days
+        if dt is None:
+            dt = day
+
+        self.days += 1
+        self.profit += pnl
+        self.pnl_max = pnl if day == 0 else max(self.pnl_max, pnl)
+        self.pnl_min = pnl if day == 0 else min(self.pnl_min, pnl)
+        self.returns_max = returns if day == 0 else max(self.returns_max,
+                                                        returns)
+        self.returns_min = returns if day == 0 else min(self.returns_min,
+                                                        returns)
+        if returns > 0:
+            self.wins += 1
+        elif returns < 0:
+            self.losses += 1
+
+        delta = returns - self._mean
+        self._mean += delta / self.days
+        self._m2 += delta * (returns - self._mean)
+
+        self._update_drawdown(returns, day, dt)
+        self.last_dt = dt
+
+    def _update_drawdown(self, returns, day, dt):
+        self.cumulative *= 1 + returns
+        underwater = self.peak is not None and self.cumulative < self.peak
+
+        if underwater or self._underwater:
+            duration = day - self._peak_day
+            if duration > self.longest_drawdown_duration:
+                self.longest_drawdown_duration = duration
+                self.longest_drawdown_start = self._peak_dt
+                self.longest_drawdown_end = dt
+
+        if underwater:
+            self.max_drawdown = max(self.max_drawdown,
+                                    1 - self.cumulative / self.peak)
+        else:
+            self.peak = self.cumulative
+            self._peak_day = day
+            self._peak_dt = dt
+        self._underwater = underwater
+
+    @property
+    def mean(self):
+        return self._mean if self.days else np.nan
+
+    @property
+    def std(self):
+        """
+        sample standard deviation of the returns
+        """
+        if self.days < 2:
+            return np.nan
+        return np.sqrt(self._m2 / (self.days - 1))
+
+    @property
+    def returns_period(self):
+        return self.cumulative - 1
+
+    @property
+    def current_drawdown(self):
+        if self.peak is None:
+            return 0.
+        return max(0., 1 - self.cumulative / self.peak)
+
+    @property
+    def current_drawdown_duration(self):
+        if not self._underwater:
+            return 0
+        return self.days - 1 - self._peak_day
+
+    @property
+    def win_loss(self):
+        """
+        ratio of wins over loses
+        """
+        if not self.losses:
+            return np.nan
+        return np.round(self.wins / float(self.losses), 2)
+
+    @property
+    def var_95(self):
+        return self.calculate_var(c=0.95)
+
+    @property
+    def var_99(self):
+        return self.calculate_var(c=0.99)
+
+    @property
+    def five_day_var_95(self):
+        return self.calculate_var(c=0.95, n=5)
+
+    @property
+    def five_day_var_99(self):
+        return self.calculate_var(c=0.99, n=5)
+
+    def calculate_var(self, c, n=1):
+        """
+        Same Variance-Covariance VaR as RiskReport.calculate_var, based on
+        the running moments of the returns.
+
+        :param c: confidence level of the calculation
+        :param n: length of the considered time period in days
+        :return: the value at risk (VaR) over given period n
+        """
+        alpha = norm.ppf(1 - c, n * self.mean, np.sqrt(n) * self.std)
+        return - self.profit * alpha
+
+    def metrics(self):
+        """
+        :return: dict of the current metrics, named like the attributes of
+            RiskReport
+        """
+        fields = ['profit', 'pnl_max', 'pnl_min', 'returns_period',
+                  'returns_max', 'returns_min', 'max_drawdown', 'var_95',
+                  'var_99', 'five_day_var_95', 'five_day_var_99', 'win_loss',
+                  'longest_drawdown_duration', 'longest_drawdown_start',
+                  'longest_drawdown_end', 'current_drawdown',
+                  'current_drawdown_duration']
+        return dict((field, getattr(self, field)) for field in fields)
@@ -0,0 +1,119 @@
+"""
+Runs many backtests of the same algorithm with different parameters over a
+process pool.
+"""
+
+from copy import deepcopy
+from multiprocessing import Pool
+
+import pandas as pd
+
+from powerline.finance.auction import TradingAlgorithmAuction
+from powerline.finance.risk import RiskReport
+
+__author__ = 'Warren'
+
+
+# state of a worker process, filled once by _init_worker
+_worker = {}
+
+
+def _init_worker(setup, algo_class, keep_perf):
+    _worker.update(setup())
+    _worker['algo_class'] = algo_class
+    _worker['keep_perf'] = keep_perf
+
+
+def _run(task):
+    # every run gets its own copies, so that runs in the same process do not
+    # see what earlier runs changed in them
+    run_id, params = deepcopy(task)
+    sim_params = deepcopy(_worker['sim_params'])
+
+    algo = _worker['algo_class'](env=_worker['env'], sim_params=sim_params,
+                                 **params)
+    perf = algo.run(_worker['data']())
+
+    metrics = RiskReport(perf, sim_params).to_dict()
+
+    return run_id, metrics, perf if _worker['keep_perf'] else None
+
+
+class SweepRunner(object):
+    """
+    Fans parameter sets of an algorithm out over a process pool.
+
+    setup is called once in every worker and has to return a dict with
+     * 'env': the TradingEnvironment with the asset metadata written, e.g.
+       EpexExchange().shared_env(futures_data=metadata)
+     * 'sim_params': the simulation parameters
+     * 'data': a function returning a fresh data source, as sources can only
+       be consumed once
+
+    Both setup and the algorithm class have to be picklable, i.e. defined at
+    module level.
+
+    Example:
+
+        runner = SweepRunner(setup, processes=8)
+        results = runner.run({i: {'auction': auction, 'amount': amounts}
+                              for i, amounts in enumerate(candidates)})
+    """
+
+    def __init__(self, setup, algo_class=TradingAlgorithmAuction,
+                 processes=None, keep_perf=False):
+        """
+        :param setup: function building the per-worker environment
+        :param algo_class: algorithm to run
+        :param processes: number of worker processes, None for one per CPU
+            and 0 to run everything in this process
+        :param keep_perf: whether to hand back the perf frame of every run
+        """
+        self.setup = setup
+        self.algo_class = algo_class
+        self.processes = processes
+        self.keep_perf = keep_perf
+
+    def iter_results(self, param_sets):
+        """
+        Runs the parameter sets and yields the results as soon as they are
+        finished, in arbitrary order.
+
+        :param param_sets: dict of run id to keyword arguments of the
+            algorithm
+        :return: generator of (run id, dict of risk metrics, perf frame or
+            None)
+        """
+        tasks = list(param_sets.items())
+        initargs = (self.setup, self.algo_class, self.keep_perf)
+
+        if self.processes == 0:
+            _init_worker(*initargs)
+            for task in tasks:
+                yield _run(task)
+            return
+
+        pool = Pool(self.processes, _init_worker, initargs)
+        try:
+            for result in pool.imap_unordered(_run, tasks):
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def run(self, param_sets, callback=None):
+        """
+        :param param_sets: dict of run id to keyword arguments of the
+            algorithm
+        :param callback: optional function called with (run id, metrics,
+            perf) for every finished run, e.g. to store perf frames
+        :return: DataFrame with one row of risk metrics per run id
+        """
+        rows = {}
+        for run_id, metrics, perf in self.iter_results(param_sets):
+            rows[run_id] = metrics
+            if callback is not None:
+                callback(run_id, metrics, perf)
+
+        return pd.DataFrame.from_dict(rows, 'index')
@@ -0,0 +1,221 @@
+"""
+Value-at-Risk engines for RiskReport and batch_risk_report.
+
+Every engine works on a 1-d array of daily returns or on a 2-d array of
+(runs x days) and computes along the days, so thousands of runs are
+handled by single NumPy operations. Quantiles and expected shortfalls are
+returned on the return scale, i.e. as the n-day return that is only
+undercut with probability 1 - c and as the mean return below it.
+RiskReport turns them into money by multiplying with -profit.
+"""
+
+from abc import ABCMeta, abstractmethod
+
+import numpy as np
+from scipy.signal import lfilter
+from scipy.stats import norm
+from six import with_metaclass
+
+__author__ = "Warren"
+
+
+def _moments(returns):
+    mu = np.nanmean(returns, axis=-1)
+    sigma = np.nanstd(returns, axis=-1, ddof=1)
+    return mu, sigma
+
+
+def rolling_sums(returns, n):
+    """
+    :param returns: array of daily returns, days along the last axis
+    :param n: number of days
+    :return: overlapping n-day sums along the last axis
+    """
+    if n == 1:
+        return returns
+    cumulative = np.cumsum(returns, axis=-1)
+    sums = cumulative[..., n - 1:].copy()
+    sums[..., 1:] -= cumulative[..., :-n]
+    return sums
+
+
+class VaREngine(with_metaclass(ABCMeta)):
+    """
+    Base class of the VaR engines.
+    """
+
+    def quantile(self, returns, c, n=1):
+        """
+        :param returns: 1-d or 2-d array of daily returns
+        :param c: confidence level
+        :param n: horizon in days
+        :return: (1 - c) quantile of the n-day returns, one per run
+        """
+        return self.quantile_and_shortfall(returns, c, n)[0]
+
+    def expected_shortfall(self, returns, c, n=1):
+        """
+        :return: mean of the n-day returns at or below the (1 - c)
+            quantile, one per run
+        """
+        return self.quantile_and_shortfall(returns, c, n)[1]
+
+    @abstractmethod
+    def quantile_and_shortfall(self, returns, c, n=1):
+        """
+        :return: quantile and expected shortfall, see quantile and
+            expected_shortfall
+        """
+
+
+class ScenarioVaR(VaREngine):
+    """
+    Base class of the simulation engines. Subclasses provide the n-day
+    return scenarios of every run, the quantile and expected shortfall are
+    then read off these.
+
+    Histories shorter than n days have no n-day scenarios, their 1-day
+    scenarios are scaled by sqrt(n) instead. Without any returns the
+    quantile and expected shortfall are NaN.
+    """
+
+    @abstractmethod
+    def scenarios(self, returns, n):
+        """
+        :param returns: 2-d array (runs x days) of daily returns
+        :param n: horizon in days, at most the number of days
+        :return: 2-d array (runs x scenarios) of n-day returns
+        """
+
+    def quantile_and_shortfall(self, returns, c, n=1):
+        returns = np.asarray(returns, dtype=float)
+        history = np.nan_to_num(np.atleast_2d(returns))
+        days = history.shape[-1]
+
+        if days == 0:
+            quantile = shortfall = np.full(len(history), np.nan)
+        else:
+            if days < n:
+                scenarios = np.sqrt(n) * self.scenarios(history, 1)
+            else:
+                scenarios = self.scenarios(history, n)
+
+            quantile = np.percentile(scenarios, 100 * (1 - c), axis=-1)
+            tail = scenarios <= quantile[:, None]
+            shortfall = (scenarios * tail).sum(axis=-1) / tail.sum(axis=-1)
+
+        if returns.ndim == 1:
+            return quantile[0], shortfall[0]
+        return quantile, shortfall
+
+
+class ParametricVaR(VaREngine):
+    """
+    Variance-Covariance VaR based on a normal distribution with the mean
+    and standard deviation of the returns, see page 9:
+    https://people.math.ethz.ch/~embrecht/ftp/LongTermRisk.pdf
+    """
+
+    def quantile_and_shortfall(self, returns, c, n=1):
+        mu, sigma = _moments(np.asarray(returns, dtype=float))
+        mu = n * mu
+        sigma = np.sqrt(n) * sigma
+
+        z = norm.ppf(1 - c)
+        quantile = mu + sigma * z
+        shortfall = mu - sigma * norm.pdf(z) / (1 - c)
+        return quantile, shortfall
+
+
+class HistoricalVaR(ScenarioVaR):
+    """
+    Historical simulation: the scenarios are the observed overlapping
+    n-day sums of the returns. NaN returns count as 0.
+    """
+
+    def scenarios(self, returns, n):
+        return rolling_sums(returns, n)
+
+
+class FilteredHistoricalVaR(ScenarioVaR):
+    """
+    Filtered historical simulation: the returns are standardized by an
+    EWMA (RiskMetrics) volatility and rescaled with the volatility forecast
+    for the next day, so the scenarios keep the empirical shape of the
+    returns but reflect the current volatility regime.
+    """
+
+    def __init__(self, decay=0.94):
+        """
+        :param decay: EWMA decay factor lambda
+        """
+        self.decay = decay
+
+    def volatility(self, returns):
+        """
+        :param returns: 2-d array (runs x days) of daily returns
+        :return: EWMA volatility at every day, based on the days before, and
+            the forecast for the next day
+        """
+        initial = np.var(returns, axis=-1)
+        # variance[t + 1] = decay * variance[t] + (1 - decay) * returns[t]**2
+        updated = lfilter([1 - self.decay], [1, -self.decay], returns ** 2,
+                          axis=-1, zi=self.decay * initial[:, None])[0]
+        variance = np.hstack([initial[:, None], updated])
+
+        return np.sqrt(variance[:, :-1]), np.sqrt(variance[:, -1])
+
+    def scenarios(self, returns, n):
+        volatility, forecast = self.volatility(returns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            standardized = np.where(volatility > 0, returns / volatility, 0)
+        return rolling_sums(standardized * forecast[:, None], n)
+
+
+class MonteCarloVaR(ScenarioVaR):
+    """
+    Monte-Carlo simulation of n-day returns with the mean and standard
+    deviation of every run. All runs share the same random draws, which
+    keeps their VaRs comparable. As the scenarios of a run are an affine
+    function of the shared draws, the quantile and expected shortfall are
+    taken from the draws once and then scaled per run.
+    """
+
+    def __init__(self, paths=10000, df=None, seed=None):
+        """
+        :param paths: number of simulated paths
+        :param df: degrees of freedom of a Student t distribution for fat
+            tails, None for a normal distribution
+        :param seed: seed of the random draws
+        """
+        self.paths = paths
+        self.df = df
+        self.seed = seed
+        self._draws = {}
+
+    def draws(self, n):
+        """
+        :return: standardized n-day sums of the daily draws, one per path
+        """
+        if n not in self._draws:
+            random_state = np.random.RandomState(self.seed)
+            if self.df is None:
+                daily = random_state.standard_normal((self.paths, n))
+            else:
+                # scaled to unit variance
+                daily = random_state.standard_t(self.df, (self.paths, n)) * \
+                    np.sqrt((self.df - 2.) / self.df)
+            self._draws[n] = daily.sum(axis=-1)
+        return self._draws[n]
+
+    def scenarios(self, returns, n):
+        mu, sigma = _moments(returns)
+        return n * mu[:, None] + sigma[:, None] * self.draws(n)[None, :]
+
+    def quantile_and_shortfall(self, returns, c, n=1):
+        mu, sigma = _moments(np.asarray(returns, dtype=float))
+        draws = self.draws(n)
+
+        quantile = np.percentile(draws, 100 * (1 - c))
+        shortfall = draws[draws <= quantile].mean()
+        return n * mu + sigma * quantile, n * mu + sigma * shortfall
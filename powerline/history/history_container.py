@@ -1,8 +1,10 @@
 from zipline.history.history_container import HistoryContainer
+import numpy as np
 import pandas as pd
-from six import itervalues
+from six import iteritems, itervalues
 
 from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.history.rolling_buffer import DailyRingBuffer
 
 __author__ = 'Warren, Max'
 
@@ -24,99 +26,142 @@ class EpexHistoryContainer(HistoryContainer):
 
         products = EpexExchange().products
 
-        self.rolling_frame = {'epex_auction': pd.DataFrame(
-            columns=products['hour']),
-            'intraday': pd.DataFrame(columns=products['qh']),
-            'intraday_h': pd.DataFrame(columns=products['hour'])}
+        self.buffers = {
+            'epex_auction': DailyRingBuffer(self.length, products['hour']),
+            'intraday': DailyRingBuffer(self.length, products['qh']),
+            'intraday_h': DailyRingBuffer(self.length, products['hour'])}
 
         self.ignored_data = ['cascade', 'auction_signal']
+        self.sid_index = {}
 
-    def frame_from_bardata(self, data, algo_dt):
-        """Create a DataFrame from the given BarData and algo dt."""
-        data = data._data
-        frame_data = {}
+    def index_sid(self, sid, event):
+        """
+        Registers where the prices of a sid go in the history. Delivery day
+        and product of a sid never change, so the location is computed once
+        per (sid, market) and reused for every following bar.
+
+        :return: tuple of delivery day and product column, or None if the
+            event is not recorded in the history
+        """
+        market = event['market']
+        column = None
+        if market not in self.ignored_data and market in self.buffers:
+            column = self.buffers[market].column_index.get(event['product'])
+
+        location = None if column is None else (event['day'], column)
+        self.sid_index[(sid, market)] = location
+        return location
 
-        for sid in data:
-            event = data[sid]
+    def batch_from_bardata(self, data, algo_dt):
+        """
+        Collects the prices of the bar at algo_dt as flat lists of delivery
+        days, product columns and prices per market.
+        """
+        batch = {}
+        for sid, event in iteritems(data._data):
             if algo_dt != event['dt']:
                 continue
 
             market = event['market']
-            if market in self.ignored_data:
+            try:
+                location = self.sid_index[(sid, market)]
+            except KeyError:
+                location = self.index_sid(sid, event)
+            if location is None:
                 continue
 
-            day = event['day']
-            product = event['product']
-
-            if product != '02-03b':
-                try:
-                    # First naively try to add the data
-                    frame_data[market][day].update({product: event['price']})
-                except KeyError:
-                    try:
-                        # Now try as if the market is already seen
-                        frame_data[market].update(
-                            {day: {product: event['price']}})
-                    except KeyError:
-                        # If not even the market already exists, create it
-                        frame_data.update({market: {day: {product: event[
-                            'price']}}})
-
-        if not frame_data:
+            try:
+                days, columns, prices = batch[market]
+            except KeyError:
+                days, columns, prices = batch[market] = ([], [], [])
+            days.append(location[0])
+            columns.append(location[1])
+            prices.append(event['price'])
+
+        return batch
+
+    def frame_from_bardata(self, data, algo_dt):
+        """Create a DataFrame from the given BarData and algo dt."""
+        batch = self.batch_from_bardata(data, algo_dt)
+        if not batch:
             return None
 
         frame = {}
-        for market in frame_data.keys():
-            # Create pandas DataFrames for the individual markets
-            frame.update({market: pd.DataFrame.from_dict(frame_data[market],
-                                                         'index')})
-            # TODO for continuous intrady this needs to be a Panel
+        for market, (days, columns, prices) in iteritems(batch):
+            products = self.buffers[market].columns
+            frame_data = {}
+            for day, column, price in zip(days, columns, prices):
+                frame_data.setdefault(day, {})[products[column]] = price
+            frame[market] = pd.DataFrame.from_dict(frame_data, 'index')
         return frame
 
     def update(self, data, algo_dt):
         """
-        Takes the bar at @algo_dt's f@data, checks to see if we need to roll
-        any new digests, then adds new data to the buffer panel.
+        Takes the bar at @algo_dt's f@data and scatters its prices into the
+        buffers of the individual markets.
         """
-        frame = self.frame_from_bardata(data, algo_dt)
-        self.add_frame(frame)
+        batch = self.batch_from_bardata(data, algo_dt)
+        self.add_batch(batch)
+
+    def add_batch(self, batch):
+        for market, (days, columns, prices) in iteritems(batch):
+            self.buffers[market].scatter(days, columns, prices)
 
     def add_frame(self, frame, env=None):
         if frame is None:
             return
         for id in frame.keys():
-            current_df = self.rolling_frame[id]
-            new_df = frame[id]
-
-            if len(new_df.index) == 1:
-                if new_df.index[0] in current_df.index:
-                    current_df.update(new_df)
-                else:
-                    current_df = current_df.append(new_df)
-            else:
-                # If more than one line is added to the internal data we have
-                # to separate the data into already observed and entirely new
-                # dates.
-                current_dates = current_df.index
-                new_dates = new_df.index
-
-                try:
-                    update_dates = new_dates.intersection(current_dates)
-                    append_dates = new_dates.difference(update_dates)
-
-                    current_df.update(new_df.ix[update_dates])
-                    current_df = current_df.append(new_df.ix[append_dates])
-                except ValueError:
-                    current_df = current_df.append(new_df)
-
-            current_df = current_df.sort()
-            if len(current_df) > self.length:
-                current_df = current_df.ix[-self.length:]
-
-            self.rolling_frame[id] = current_df
+            buffer = self.buffers[id]
+            new_df = frame[id].sort_index()
+            new_df = new_df[[product for product in new_df.columns
+                             if product in buffer.column_index]]
+
+            columns = np.array([buffer.column_index[product]
+                                for product in new_df.columns], dtype=int)
+            values = new_df.values.astype(float)
+            for day, prices in zip(new_df.index, values):
+                buffer.write(day, columns, prices)
+
+    @property
+    def rolling_frame(self):
+        return self.get_history()
 
     def get_history(self, history_spec=None, algo_dt=None):
         """
-        Main API used by the algoscript is mapped to this function.
+        Main API used by the algoscript is mapped to this function. The
+        frames are cached snapshots which are only rebuilt when the history of
+        their market changed.
+        """
+        return dict((market, buffer.to_frame()) for market, buffer in
+                    iteritems(self.buffers))
+
+    @property
+    def versions(self):
+        """
+        Current version of every market. Versions only increase when new
+        prices actually changed the history of a market.
         """
-        return self.rolling_frame
+        return dict((market, buffer.version) for market, buffer in
+                    iteritems(self.buffers))
+
+    def changed_since(self, versions):
+        """
+        Allows strategies to skip recomputation on bars without new prices:
+
+            versions = container.versions
+            ...
+            if container.changed_since(versions):
+                recompute()
+
+        :param versions: dict of versions as returned by versions
+        :return: dict of market to the sorted delivery days which changed,
+            markets without changes are left out
+        """
+        changes = {}
+        for market, buffer in iteritems(self.buffers):
+            if buffer.version == versions.get(market, 0):
+                continue
+            days = buffer.changed_since(versions.get(market, 0))
+            if days:
+                changes[market] = days
+        return changes
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+__author__ = 'Warren, Max'
+
+
+class DailyRingBuffer(object):
+    """
+    Fixed-size buffer keeping the prices of the most recent delivery days of
+    one market. Every row is preallocated with a column per product and rows
+    are recycled once the buffer is full, so adding data never reallocates.
+
+    The buffer carries a version which is increased whenever its content
+    changes. The DataFrame returned by to_frame() is cached and only rebuilt
+    after such a change.
+    """
+
+    def __init__(self, length, columns):
+        self.length = length
+        self.columns = list(columns)
+        self.column_index = dict((column, i) for i, column in
+                                 enumerate(self.columns))
+
+        self.values = np.empty((length, len(self.columns)))
+        self.values.fill(np.nan)
+        self.slots = {}
+
+        self.version = 0
+        self.slot_versions = np.zeros(length, dtype=int)
+        self._frame = None
+        self._frame_version = None
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, day):
+        return day in self.slots
+
+    def _get_slot(self, day):
+        """
+        Returns the row holding day. A new day takes a free row or recycles
+        the row of the oldest day. None is returned if the buffer is full and
+        day is older than all stored days.
+        """
+        slot = self.slots.get(day)
+        if slot is not None:
+            return slot
+
+        if len(self.slots) < self.length:
+            slot = len(self.slots)
+        else:
+            oldest = min(self.slots)
+            if day < oldest:
+                return None
+            slot = self.slots.pop(oldest)
+
+        self.values[slot] = np.nan
+        self.slots[day] = slot
+        return slot
+
+    def _touch(self, rows):
+        if len(rows):
+            self.version += 1
+            self.slot_versions[list(rows)] = self.version
+
+    def write(self, day, columns, prices):
+        """
+        Writes prices for day into the given column positions. Like
+        DataFrame.update, NaN prices never overwrite stored values.
+
+        :param day: delivery day
+        :param columns: array of column positions
+        :param prices: array of prices, aligned with columns
+        """
+        is_new = day not in self.slots
+        slot = self._get_slot(day)
+        if slot is None:
+            return
+
+        mask = ~np.isnan(prices)
+        columns = columns[mask]
+        prices = prices[mask]
+
+        if is_new or (self.values[slot, columns] != prices).any():
+            self.values[slot, columns] = prices
+            self._touch([slot])
+
+    def scatter(self, days, columns, prices):
+        """
+        Writes a batch of prices for arbitrary days at once. Entries are
+        aligned, i.e. prices[i] belongs to days[i] and columns[i].
+        """
+        new_days = [day for day in sorted(set(days)) if day not in self.slots]
+        for day in new_days:
+            self._get_slot(day)
+
+        rows = np.array([self.slots.get(day, -1) for day in days], dtype=int)
+        columns = np.asarray(columns, dtype=int)
+        prices = np.asarray(prices, dtype=float)
+
+        mask = (rows >= 0) & ~np.isnan(prices)
+        rows = rows[mask]
+        columns = columns[mask]
+        prices = prices[mask]
+
+        changed = self.values[rows, columns] != prices
+        self.values[rows, columns] = prices
+
+        touched = set(rows[changed])
+        touched.update(self.slots[day] for day in new_days
+                       if day in self.slots)
+        self._touch(touched)
+
+    def changed_since(self, version):
+        """
+        :param version: a version previously read from this buffer
+        :return: sorted list of the stored days which changed after version
+        """
+        return sorted(day for day, slot in self.slots.items()
+                      if self.slot_versions[slot] > version)
+
+    def to_frame(self):
+        """
+        The returned DataFrame is shared between calls until the buffer
+        changes and should be treated as read-only.
+
+        :return: DataFrame of the stored days in ascending order
+        """
+        if self._frame_version != self.version:
+            days = sorted(self.slots)
+            rows = [self.slots[day] for day in days]
+            self._frame = pd.DataFrame(self.values[rows], index=days,
+                                       columns=self.columns)
+            self._frame_version = self.version
+        return self._frame
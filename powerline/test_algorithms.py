@@ -1,3 +1,4 @@
+from zipline.finance.commission import PerShare
 import pandas as pd
 
 from powerline.finance.auction import TradingAlgorithmAuction, \
@@ -45,3 +46,31 @@ class TestAuctionAlgorithm(TradingAlgorithmAuction):
 
     def handle_data(self, data):
         pass
+
+
+class OrderRecordingAlgorithm(TradingAlgorithmAuction):
+    """
+    Orders amounts on the grid for tomorrow's delivery day before every
+    auction and records the (dt, sid, amount) of every order placed.
+    """
+
+    def initialize(self, amounts, grid='hour'):
+        self.amounts = amounts
+        self.grid = grid
+        self.placed = []
+
+        self.set_commission(PerShare(0))
+        self.schedule_function(func=self.auction, time_rule=BeforeEpexAuction(
+            minutes=30))
+
+    def order(self, asset, amount, *args, **kwargs):
+        self.placed.append((self.get_datetime(), asset.sid, amount))
+        return super(OrderRecordingAlgorithm, self).order(asset, amount,
+                                                          *args, **kwargs)
+
+    def handle_data(self, data):
+        pass
+
+
+def order_grid(algo, data):
+    algo.order_auction(amounts=algo.amounts, grid=algo.grid)
@@ -0,0 +1,114 @@
+"""
+Optional on-disk cache for computed calendar days.
+
+The cache is switched on by pointing the environment variable
+POWERLINE_CALENDAR_CACHE to a directory. Entries are keyed by calendar name,
+calendar version and date range, so changing the rules of a calendar only
+requires increasing its version. Calendars are cached up to the
+cache_horizon of their end, zipline's end moves every day.
+
+The cache keeps the dates only, see with_freq to restore the frequency of
+trading days.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+__author__ = "Warren"
+
+
+CACHE_ENV = 'POWERLINE_CALENDAR_CACHE'
+
+
+def cache_horizon(end):
+    """
+    :return: last day of the year of end, which only changes once a year
+    """
+    return pd.Timestamp('%d-12-31' % end.year, tz=end.tz)
+
+
+def with_freq(index, freq):
+    """
+    :param index: DatetimeIndex read from the cache
+    :param freq: frequency of the index, e.g. the CDay of the trading days
+    :return: index with freq, which zipline relies on for trading days
+    """
+    if index.freq is None:
+        index = pd.DatetimeIndex(index, freq=freq)
+    return index
+
+
+def get_cache_path(name, version, start, end):
+    directory = os.environ.get(CACHE_ENV)
+    if not directory:
+        return None
+
+    filename = '%s_v%s_%s_%s.npz' % (name, version, start.strftime('%Y%m%d'),
+                                     end.strftime('%Y%m%d'))
+    return os.path.join(directory, filename)
+
+
+def read_days(path):
+    with np.load(path) as cached:
+        aware = set(cached['tz_aware'].tolist())
+        days = {}
+        for key in cached.files:
+            if key == 'tz_aware':
+                continue
+            index = pd.DatetimeIndex(cached[key])
+            days[key] = index.tz_localize('UTC') if key in aware else index
+    return days
+
+
+def write_days(path, days):
+    """
+    Writes the DatetimeIndexes in days to path. The file is written under a
+    temporary name first, so concurrent workers never read partial files.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    arrays = {'tz_aware': np.array([key for key in days
+                                    if days[key].tz is not None])}
+    for key, index in days.items():
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        arrays[key] = index.values
+
+    handle, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'wb') as f:
+        np.savez(f, **arrays)
+    os.rename(tmp_path, path)
+
+
+def load_days(name, version, start, end, build):
+    """
+    Returns the calendar days produced by build, reading them from the
+    cache if possible.
+
+    :param name: name of the calendar
+    :param version: version of the calendar rules
+    :param start: first day of the calendar
+    :param end: last day of the calendar
+    :param build: function returning a dict of DatetimeIndexes
+    :return: dict of DatetimeIndexes
+    """
+    path = get_cache_path(name, version, start, end)
+    if path is None:
+        return build()
+
+    try:
+        return read_days(path)
+    except (IOError, OSError, KeyError, ValueError):
+        pass
+
+    days = build()
+    try:
+        write_days(path, days)
+    except (IOError, OSError):
+        pass
+    return days
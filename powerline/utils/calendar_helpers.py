@@ -0,0 +1,51 @@
+"""
+Vectorized helpers shared by the EPEX and EEX trading calendars.
+"""
+
+import pandas as pd
+
+__author__ = "Warren"
+
+
+exchange_tz = 'Europe/Berlin'
+
+
+def local_times(days, offset, tz=exchange_tz):
+    """
+    Converts a local wall time on each of the given days to UTC in one go.
+    Naive days are taken by their calendar date, tz-aware days by their date
+    in tz. So UTC-midnight trading days, local midnights stored in UTC and
+    naive dates can all be passed. Daylight saving time is handled by
+    localizing the whole index at once.
+
+    :param days: DatetimeIndex of days
+    :param offset: timedelta of the wall time after local midnight, e.g.
+        timedelta(hours=12) for noon or timedelta(days=1) for the following
+        midnight
+    :param tz: timezone of the wall time
+    :return: tz-aware DatetimeIndex in UTC
+    """
+    days = pd.DatetimeIndex(days)
+    if days.tz is not None:
+        days = days.tz_convert(tz).tz_localize(None)
+
+    return (days.normalize() + offset).tz_localize(tz).tz_convert('UTC')
+
+
+def get_local_open_and_closes(trading_days, open_offset, close_offset,
+                              tz=exchange_tz):
+    """
+    Builds the open_and_closes frame needed by zipline from local opening
+    and closing wall times.
+
+    :param trading_days: DatetimeIndex of trading days
+    :param open_offset: timedelta of the market open after local midnight
+    :param close_offset: timedelta of the market close after local midnight
+    :param tz: timezone of the exchange
+    :return: DataFrame with market_open and market_close in UTC
+    """
+    return pd.DataFrame(
+        {'market_open': local_times(trading_days, open_offset, tz),
+         'market_close': local_times(trading_days, close_offset, tz)},
+        index=trading_days,
+        columns=('market_open', 'market_close'))
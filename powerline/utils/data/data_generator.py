@@ -1,10 +1,11 @@
 from datetime import timedelta
 
-from zipline.sources import DataPanelSource
 from zipline.protocol import DATASOURCE_TYPE
 import pandas as pd
 import numpy as np
 
+from powerline.data.columnar_store import market_event_dtype
+from powerline.data.sources import RecordArraySource
 from powerline.finance.auction import get_auctions
 
 __author__ = "Warren"
@@ -35,13 +36,15 @@ class DataGeneratorEex(object):
 
         # prices
         x = [1, 5, 10, np.nan]
-        data = pd.DataFrame([
-            [1, 1e9, int(DATASOURCE_TYPE.TRADE)],
-            [5, 168, int(DATASOURCE_TYPE.TRADE)],
-            [10, 0, int(DATASOURCE_TYPE.CLOSE_POSITION)],
-            [np.nan, 0, int(DATASOURCE_TYPE.TRADE)]],
-            columns=['price', 'volume', 'type'], index=index)
-        pan = pd.Panel({self.sid: data})
+        data = np.zeros(4, dtype=[('dt', 'M8[ns]'), ('sid', 'i8'),
+                                  ('price', 'f8'), ('volume', 'f8'),
+                                  ('type', 'i8')])
+        data['dt'] = _to_datetime64(index)
+        data['sid'] = self.sid
+        data['price'] = x
+        data['volume'] = [1e9, 168, 0, 0]
+        data['type'] = [DATASOURCE_TYPE.TRADE, DATASOURCE_TYPE.TRADE,
+                        DATASOURCE_TYPE.CLOSE_POSITION, DATASOURCE_TYPE.TRADE]
         if self.instant_fill:
             pnl = pd.DataFrame(
                 [0, 0, (x[1] - x[0]) * 168, (x[2] - x[1]) * 168],
@@ -54,7 +57,7 @@ class DataGeneratorEex(object):
             expected_positions = pd.DataFrame(
                 [0, 0, 1, 0], index=index)
 
-        return DataPanelSource(pan), pnl, expected_positions
+        return RecordArraySource(data), pnl, expected_positions
 
 
 class DataGeneratorEpex(object):
@@ -99,31 +102,31 @@ class DataGeneratorEpex(object):
         prices_qh = [[-2, 6, 6, 10]]
         products = ['01Q1', '01Q2', '01Q3', '01Q4']
 
-        # price, volume, type, product
+        # price, volume, type, product, market of the hourly product
+        # followed by its quarter hours
         product = '01-02'  # TODO defer from metadata
-        data_h = pd.DataFrame([[prices[0], 0, int(DATASOURCE_TYPE.TRADE),
-                                product, 'auction_signal'],
-                               [prices[1], 1e9, int(DATASOURCE_TYPE.TRADE),
-                                product, 'epex_auction'],
-                               [np.nan, 0,
-                                int(DATASOURCE_TYPE.CASCADE_POSITION),
-                                product, 'cascade']],
-                              columns=['price', 'volume', 'type', 'product',
-                                       'market'],
-                              index=index[0:3])
-        trade_dict = {self.sid: data_h}
-        for i, j in enumerate(self.sid_qh):
-            data_qh = pd.DataFrame(
-                [[prices_qh[0][i], 0, DATASOURCE_TYPE.TRADE, products[i],
-                  'intraday']],
-                columns=['price', 'volume', 'type', 'product', 'market'],
-                index=[index[-1]])
-
-            trade_dict.update({j: data_qh})
-
-        pan = pd.Panel.from_dict(trade_dict)
+        data = np.zeros(3 + len(self.sid_qh), dtype=market_event_dtype)
+        data['dt'] = _to_datetime64(index[0:3] +
+                                    [index[-1]] * len(self.sid_qh))
+        data['sid'] = [self.sid] * 3 + self.sid_qh
+        data['price'] = [prices[0], prices[1], np.nan] + \
+            prices_qh[0][:len(self.sid_qh)]
+        data['volume'][1] = 1e9
+        data['type'] = [DATASOURCE_TYPE.TRADE, DATASOURCE_TYPE.TRADE,
+                        DATASOURCE_TYPE.CASCADE_POSITION] + \
+            [DATASOURCE_TYPE.TRADE] * len(self.sid_qh)
+        data['product'] = [product] * 3 + products[:len(self.sid_qh)]
+        data['market'] = ['auction_signal', 'epex_auction', 'cascade'] + \
+            ['intraday'] * len(self.sid_qh)
 
         pnl = pd.DataFrame([0, (prices[2] - prices[1])],
                            index=index_pnl, columns=[self.ident])
 
-        return DataPanelSource(pan), pnl
+        return RecordArraySource(data), pnl
+
+
+def _to_datetime64(dts):
+    """
+    :return: naive UTC datetime64 values of a list of timestamps
+    """
+    return pd.DatetimeIndex(dts).tz_convert('UTC').tz_localize(None).values
@@ -0,0 +1,227 @@
+"""
+Synthetic EEX weekly futures data in realistic volume, e.g. for backtests
+of weekly strategies over many years.
+"""
+
+from datetime import timedelta
+
+from zipline.protocol import DATASOURCE_TYPE
+from scipy.signal import lfilter
+import numpy as np
+import pandas as pd
+
+from powerline.data.columnar_store import market_event_dtype
+from powerline.data.sources import RecordArraySource
+from powerline.exchanges.eex_exchange import EexExchange
+from powerline.exchanges.exchange import make_ident
+from powerline.utils import tradingcalendar_eex
+from powerline.utils.calendar_helpers import exchange_tz, local_times
+
+__author__ = "Warren"
+
+
+# the weekly futures of the first to fifth week of a month
+weekly_products = EexExchange.default_products
+
+
+class EexSimulator(object):
+    """
+    Simulates the weekly base futures of every delivery week from the week
+    of start to the week of end. A future is traded for trading_weeks weeks
+    before its delivery and emits
+
+     * a 'eex' TRADE event with the settlement price at every close of the
+       EEX calendar before the delivery and
+     * a CLOSE_POSITION event instead of the trade on the last of them.
+
+    The futures are named after the Monday of their week and the week of
+    the month, e.g. '2015-05-11_F1B2'. Their contract multiplier is the
+    number of hours of the week, 167 and 169 in the weeks of the daylight
+    saving time changes.
+
+    The delivery prices of the weeks follow an AR(1) process, the
+    settlement prices a random walk that ends at the delivery price. All
+    draws come from one seeded random state in week order, so the events do
+    not depend on chunk_weeks.
+
+    Example:
+
+        simulator = EexSimulator('2014-01-01', '2015-12-31', seed=1)
+        env.write_data(futures_data=simulator.asset_metadata())
+        algo.run(simulator.source())
+    """
+
+    def __init__(self, start, end, seed=None, chunk_weeks=13, first_sid=0,
+                 trading_weeks=5, base_price=35., weekly_volatility=3.,
+                 mean_reversion=0.9, daily_volatility=0.8,
+                 close_offset=timedelta(hours=18)):
+        """
+        :param start: first delivery week, the week of its Monday
+        :param end: last delivery week
+        :param seed: seed of the prices and volumes
+        :param chunk_weeks: number of delivery weeks generated at once
+        :param first_sid: sid of the future of the first week
+        :param trading_weeks: number of weeks a future is traded before its
+            delivery
+        :param base_price: mean of the delivery prices
+        :param weekly_volatility: standard deviation of the delivery prices
+        :param mean_reversion: AR(1) coefficient of the delivery prices
+        :param daily_volatility: standard deviation of the daily changes of
+            the settlement prices
+        :param close_offset: local time of the settlement
+        """
+        start = pd.Timestamp(start).date()
+        self.weeks = pd.date_range(start - timedelta(days=start.weekday()),
+                                   pd.Timestamp(end).date(), freq='W-MON')
+        self.seed = seed
+        self.chunk_weeks = chunk_weeks
+        self.first_sid = first_sid
+        self.trading_weeks = trading_weeks
+
+        self.base_price = base_price
+        self.weekly_volatility = weekly_volatility
+        self.mean_reversion = mean_reversion
+        self.daily_volatility = daily_volatility
+
+        self.expirations = local_times(self.weeks, timedelta(0), exchange_tz)
+        self.delivery_ends = local_times(self.weeks, timedelta(days=7),
+                                         exchange_tz)
+
+        closes = local_times(tradingcalendar_eex.trading_days, close_offset,
+                             exchange_tz)
+        self.closes = closes.tz_localize(None).values
+
+        # trading days of every week: closes[first:last]
+        expirations = self.expirations.tz_localize(None).values
+        self.max_days = 5 * trading_weeks
+        last = self.closes.searchsorted(expirations)
+        first = self.closes.searchsorted(
+            expirations - np.timedelta64(7 * trading_weeks, 'D'))
+        self.first = np.maximum(first, last - self.max_days)
+        self.last = last
+
+    @property
+    def start(self):
+        """
+        :return: time of the first event
+        """
+        return pd.Timestamp(self.closes[self.first[0]], tz='UTC')
+
+    @property
+    def end(self):
+        """
+        :return: time of the last event
+        """
+        return pd.Timestamp(self.closes[self.last[-1] - 1], tz='UTC')
+
+    def sid(self, day):
+        """
+        :param day: a day of the delivery week
+        :return: sid of the future of the week
+        """
+        day = pd.Timestamp(pd.Timestamp(day).date())
+        monday = day - timedelta(days=day.weekday())
+        return self.first_sid + self.weeks.get_loc(monday)
+
+    def product(self, monday):
+        """
+        :return: product of the week starting on monday
+        """
+        return weekly_products[(monday.day - 1) // 7]
+
+    def asset_metadata(self):
+        """
+        :return: dict of sid to the metadata of the futures of all weeks, as
+            taken by TradingEnvironment.write_data(futures_data=...)
+        """
+        hours = (self.delivery_ends.values - self.expirations.values) // \
+            np.timedelta64(1, 'h')
+        metadata = {}
+        for ix, monday in enumerate(self.weeks):
+            metadata[self.first_sid + ix] = {
+                'asset_type': 'future',
+                'symbol': make_ident(monday.date(), self.product(monday)),
+                'expiration_date': self.expirations[ix],
+                'end_date': self.delivery_ends[ix],
+                'contract_multiplier': int(hours[ix])}
+        return metadata
+
+    def source(self):
+        """
+        :return: RecordArraySource streaming all events chunk by chunk
+        """
+        return RecordArraySource(self.iter_chunks(), self.start, self.end)
+
+    def iter_chunks(self):
+        """
+        Generates the events of chunk_weeks delivery weeks at a time. The
+        events of a chunk that happen after the first event of the next one
+        are held back, so the chunks are in time order across boundaries.
+
+        :return: generator of structured arrays of market_event_dtype
+        """
+        random_state = np.random.RandomState(self.seed)
+        state = np.zeros(1)
+        held_back = np.zeros(0, dtype=market_event_dtype)
+
+        for first in range(0, len(self.weeks), self.chunk_weeks):
+            weeks = slice(first, min(first + self.chunk_weeks,
+                                     len(self.weeks)))
+            records, state = self._simulate(weeks, random_state, state)
+
+            # events at the same time are ordered by sid
+            chunk = np.concatenate([held_back, records])
+            chunk = chunk[np.lexsort((chunk['sid'], chunk['dt']))]
+
+            if weeks.stop < len(self.weeks):
+                cutoff = self.closes[self.first[weeks.stop]]
+                split = chunk['dt'].searchsorted(cutoff)
+                chunk, held_back = chunk[:split], chunk[split:]
+            if len(chunk):
+                yield chunk
+
+    def _simulate(self, weeks, random_state, state):
+        """
+        :param state: filter state of the delivery prices after the last
+            week simulated so far
+        :return: events of the delivery weeks, not sorted, and the filter
+            state after the last of them
+        """
+        n = weeks.stop - weeks.start
+
+        # draws in week order, see the class docstring
+        draws = random_state.standard_normal((n, 1 + 2 * self.max_days))
+        volumes = np.exp(0.5 * draws[:, 1 + self.max_days:])
+
+        levels, state = lfilter([self.weekly_volatility],
+                                [1, -self.mean_reversion], draws[:, 0],
+                                zi=state)
+        levels += self.base_price
+
+        # random walk backwards from the delivery price, the last column is
+        # the last trading day
+        steps = self.daily_volatility * draws[:, 1:1 + self.max_days]
+        walks = np.cumsum(steps[:, ::-1], axis=1)[:, ::-1] - steps
+        prices = levels[:, None] + walks
+
+        first = self.first[weeks]
+        counts = self.last[weeks] - first
+        week_ix = np.repeat(np.arange(n), counts)
+        offsets = np.arange(counts.sum()) - \
+            np.repeat(np.cumsum(counts) - counts, counts)
+        columns = self.max_days - counts[week_ix] + offsets
+
+        products = np.array([self.product(monday)
+                             for monday in self.weeks[weeks]])
+
+        records = np.zeros(len(week_ix), dtype=market_event_dtype)
+        records['dt'] = self.closes[first[week_ix] + offsets]
+        records['sid'] = self.first_sid + weeks.start + week_ix
+        records['price'] = prices[week_ix, columns]
+        records['volume'] = np.round(100 * volumes[week_ix, columns])
+        records['type'] = np.where(offsets == counts[week_ix] - 1,
+                                   DATASOURCE_TYPE.CLOSE_POSITION,
+                                   DATASOURCE_TYPE.TRADE)
+        records['product'] = products[week_ix]
+        records['market'] = 'eex'
+        return records, state
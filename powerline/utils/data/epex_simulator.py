@@ -0,0 +1,338 @@
+"""
+Synthetic EPEX market data in realistic volume, e.g. to load test the
+history container and the order paths.
+"""
+
+import json
+from datetime import timedelta
+
+from zipline.protocol import DATASOURCE_TYPE
+from scipy.signal import lfilter
+import numpy as np
+import pandas as pd
+
+from powerline.data.columnar_store import market_event_dtype
+from powerline.data.sources import RecordArraySource
+from powerline.exchanges.exchange import make_ident
+from powerline.utils.calendar_helpers import exchange_tz, local_times
+from powerline.utils.hour_quarter_hour_converter import day_hours, \
+    dst_hour, long_day_hourly_products, long_day_quarterly_products
+from powerline.utils.tradingcalendar_epex import get_auction_times
+
+__author__ = "Warren"
+
+
+# every delivery day has a block of sids for the products of a long day,
+# the hourly products first
+products_per_day = len(long_day_hourly_products) + \
+    len(long_day_quarterly_products)
+
+# events of the simulator, with the delivery day as local midnight in UTC,
+# under which the history container keeps their prices
+epex_event_dtype = np.dtype(market_event_dtype.descr + [('day', 'M8[ns]')])
+
+
+class EpexSimulator(object):
+    """
+    Simulates the EPEX day-ahead auction and the intraday market for every
+    delivery day between start and end. For a delivery day it emits
+
+     * an 'auction_signal' event before the auction on the day before,
+     * 'epex_auction' prices of all hourly products at the auction,
+     * 'cascade' events of all hourly products after the auction and
+     * 'intraday' prices of all quarter hour products shortly before their
+       delivery.
+
+    Every event has the delivery day it belongs to in its 'day' field, so
+    the events can be fed to an algorithm with an EpexHistoryContainer.
+
+    Days are taken from the Europe/Berlin calendar, so the short day in
+    March has 23 hours and 92 quarter hours, the long day in October 25
+    hours and 100 quarter hours with the products '02-03b' and '02Q1b' to
+    '02Q4b'.
+
+    Prices follow an AR(1) daily level with an intraday profile and noise.
+    All draws come from one seeded random state in day order, so the events
+    do not depend on chunk_days.
+
+    Example:
+
+        simulator = EpexSimulator('2014-01-01', '2015-12-31', seed=1)
+        env.write_data(futures_data=simulator.asset_metadata())
+        algo.run(simulator.source())
+    """
+
+    def __init__(self, start, end, seed=None, chunk_days=30, first_sid=0,
+                 base_price=40., daily_volatility=5., mean_reversion=0.8,
+                 hourly_volatility=3., intraday_volatility=2.,
+                 profile_amplitude=10., weekend_discount=8.,
+                 signal_lead=timedelta(minutes=30),
+                 cascade_delay=timedelta(minutes=30),
+                 intraday_lead=timedelta(minutes=30)):
+        """
+        :param start: first delivery day
+        :param end: last delivery day
+        :param seed: seed of the prices and volumes
+        :param chunk_days: number of delivery days generated at once
+        :param first_sid: sid of the first product of the first day
+        :param base_price: mean of the daily price level
+        :param daily_volatility: standard deviation of the daily level
+        :param mean_reversion: AR(1) coefficient of the daily level
+        :param hourly_volatility: noise of the hourly auction prices
+        :param intraday_volatility: noise of the quarter hour prices around
+            their hour
+        :param profile_amplitude: amplitude of the price profile over the
+            day, peaking at noon
+        :param weekend_discount: price discount on Saturdays and Sundays
+        :param signal_lead: time of the auction signal before the auction
+        :param cascade_delay: time of the cascade after the auction
+        :param intraday_lead: time of the intraday price before delivery
+        """
+        self.days = pd.date_range(pd.Timestamp(start).date(),
+                                  pd.Timestamp(end).date(), freq='D')
+        self.seed = seed
+        self.chunk_days = chunk_days
+        self.first_sid = first_sid
+
+        self.base_price = base_price
+        self.daily_volatility = daily_volatility
+        self.mean_reversion = mean_reversion
+        self.hourly_volatility = hourly_volatility
+        self.intraday_volatility = intraday_volatility
+        self.profile_amplitude = profile_amplitude
+        self.weekend_discount = weekend_discount
+
+        self.signal_lead = signal_lead
+        self.cascade_delay = cascade_delay
+        self.intraday_lead = intraday_lead
+
+        self.hours = day_hours(self.days, exchange_tz)
+        self.day_starts = local_times(self.days, timedelta(0), exchange_tz)
+        self.auction_times = get_auction_times(self.days - timedelta(days=1))
+
+    @property
+    def start(self):
+        """
+        :return: time of the first event
+        """
+        return pd.Timestamp(self._signal_times(slice(0, 1))[0], tz='UTC')
+
+    @property
+    def end(self):
+        """
+        :return: time of the last event
+        """
+        last = len(self.days) - 1
+        starts = self._delivery_starts(slice(last, last + 1))[0]
+        return pd.Timestamp(starts[-1], tz='UTC') - self.intraday_lead
+
+    def sid(self, day, product):
+        """
+        :param day: delivery day
+        :param product: name of an hourly or quarter hour product
+        :return: sid of product on day
+        """
+        ix = self.days.get_loc(pd.Timestamp(pd.Timestamp(day).date()))
+        try:
+            slot = long_day_hourly_products.index(product)
+        except ValueError:
+            slot = len(long_day_hourly_products) + \
+                long_day_quarterly_products.index(product)
+        return self.first_sid + ix * products_per_day + slot
+
+    def asset_metadata(self):
+        """
+        :return: dict of sid to the metadata of the products of all days,
+            as taken by TradingEnvironment.write_data(futures_data=...)
+        """
+        metadata = {}
+        hourly = len(long_day_hourly_products)
+        for ix, day in enumerate(self.days):
+            days = slice(ix, ix + 1)
+            exists = self._exists(days)[0]
+            starts = pd.DatetimeIndex(self._delivery_starts(days)[0])
+            starts = starts.tz_localize('UTC')
+            date = day.date()
+
+            for slot in np.flatnonzero(exists):
+                if slot < hourly:
+                    product = long_day_hourly_products[slot]
+                    length = timedelta(hours=1)
+                    children = [make_ident(date, qh) for qh in
+                                long_day_quarterly_products[4 * slot:
+                                                            4 * slot + 4]]
+                    extra = {'contract_multiplier': 1,
+                             'children': json.dumps(children)}
+                else:
+                    product = long_day_quarterly_products[slot - hourly]
+                    length = timedelta(minutes=15)
+                    extra = {'contract_multiplier': 0.25}
+
+                metadata[self.first_sid + ix * products_per_day + slot] = \
+                    dict(extra, asset_type='future',
+                         symbol=make_ident(date, product),
+                         expiration_date=starts[slot],
+                         end_date=starts[slot] + length)
+        return metadata
+
+    def source(self):
+        """
+        :return: RecordArraySource streaming all events chunk by chunk
+        """
+        return RecordArraySource(self.iter_chunks(), self.start, self.end)
+
+    def iter_chunks(self):
+        """
+        Generates the events of chunk_days delivery days at a time. The
+        events of a chunk that happen after the first event of the next one
+        are held back, so the chunks are in time order across boundaries.
+
+        :return: generator of structured arrays of epex_event_dtype
+        """
+        random_state = np.random.RandomState(self.seed)
+        state = np.zeros(1)
+        held_back = np.zeros(0, dtype=epex_event_dtype)
+
+        for first in range(0, len(self.days), self.chunk_days):
+            days = slice(first, min(first + self.chunk_days, len(self.days)))
+            records, state = self._simulate(days, random_state, state)
+
+            # events at the same time are ordered by sid
+            chunk = np.concatenate([held_back, records])
+            chunk = chunk[np.lexsort((chunk['sid'], chunk['dt']))]
+
+            if days.stop < len(self.days):
+                cutoff = self._signal_times(
+                    slice(days.stop, days.stop + 1))[0]
+                split = chunk['dt'].searchsorted(cutoff)
+                chunk, held_back = chunk[:split], chunk[split:]
+            if len(chunk):
+                yield chunk
+
+    def _exists(self, days):
+        """
+        :return: (days x products_per_day) mask of the products that exist
+        """
+        hours = self.hours[days]
+        exists = np.ones((len(hours), products_per_day), dtype=bool)
+        hourly = len(long_day_hourly_products)
+
+        for slot, rows in [(dst_hour, hours == 23), (dst_hour + 1,
+                                                     hours != 25)]:
+            exists[rows, slot] = False
+            exists[rows, hourly + 4 * slot:hourly + 4 * slot + 4] = False
+        return exists
+
+    def _delivery_starts(self, days):
+        """
+        :return: (days x products_per_day) array of the UTC delivery starts,
+            NaT for products that do not exist
+        """
+        exists = self._exists(days)
+        hourly = len(long_day_hourly_products)
+
+        # elapsed hours since local midnight, counting only existing hours
+        elapsed = np.cumsum(exists[:, :hourly], axis=1) - 1
+        minutes = np.hstack([elapsed * 60,
+                             elapsed.repeat(4, axis=1) * 60 +
+                             np.tile([0, 15, 30, 45], hourly)])
+
+        starts = self.day_starts[days].values.astype('M8[ns]')
+        starts = starts[:, None] + minutes.astype('m8[m]')
+        starts[~exists] = np.datetime64('NaT')
+        return starts
+
+    def _signal_times(self, days):
+        times = self.auction_times[days] - self.signal_lead
+        return times.tz_localize(None).values
+
+    def _simulate(self, days, random_state, state):
+        """
+        :param state: filter state of the daily level after the last day
+            simulated so far
+        :return: events of the delivery days, not sorted, and the filter
+            state after the last of them
+        """
+        n = days.stop - days.start
+        hourly = len(long_day_hourly_products)
+        exists = self._exists(days)
+
+        # draws in day order, see the class docstring
+        draws = random_state.standard_normal((n, 1 + 2 * products_per_day))
+        volumes = np.exp(0.5 * draws[:, 1 + products_per_day:])
+
+        # AR(1) daily level around base_price
+        levels, state = lfilter([self.daily_volatility],
+                                [1, -self.mean_reversion], draws[:, 0],
+                                zi=state)
+
+        clock_hours = np.array([0, 1, 2, 2] + list(range(3, 24)))
+        profile = self.profile_amplitude * np.sin(
+            2 * np.pi * (clock_hours - 6) / 24.)
+        weekend = self.days[days].dayofweek.values >= 5
+        daily = self.base_price + levels - self.weekend_discount * weekend
+
+        noise = draws[:, 1:1 + products_per_day]
+        hourly_prices = daily[:, None] + profile[None, :] + \
+            self.hourly_volatility * noise[:, :hourly]
+        qh_prices = hourly_prices.repeat(4, axis=1) + \
+            self.intraday_volatility * noise[:, hourly:]
+        prices = np.hstack([hourly_prices, qh_prices])
+
+        sids = self.first_sid + \
+            (np.arange(days.start, days.stop) * products_per_day)[:, None] + \
+            np.arange(products_per_day)[None, :]
+        starts = self._delivery_starts(days)
+        auctions = self.auction_times[days].tz_localize(None).values
+        delivery_days = self.day_starts[days].tz_localize(None).values
+
+        product_names = np.array(long_day_hourly_products +
+                                 long_day_quarterly_products)
+        hours_exist = exists[:, :hourly]
+        day_ix, slots = np.nonzero(hours_exist)
+
+        parts = []
+
+        signal = np.zeros(n, dtype=epex_event_dtype)
+        signal['dt'] = self._signal_times(days)
+        signal['day'] = delivery_days
+        signal['sid'] = sids[:, 0]
+        signal['type'] = DATASOURCE_TYPE.TRADE
+        signal['product'] = product_names[0]
+        signal['market'] = 'auction_signal'
+        parts.append(signal)
+
+        auction = np.zeros(len(day_ix), dtype=epex_event_dtype)
+        auction['dt'] = auctions[day_ix]
+        auction['day'] = delivery_days[day_ix]
+        auction['sid'] = sids[day_ix, slots]
+        auction['price'] = prices[day_ix, slots]
+        auction['volume'] = np.round(1000 * volumes[day_ix, slots])
+        auction['type'] = DATASOURCE_TYPE.TRADE
+        auction['product'] = product_names[slots]
+        auction['market'] = 'epex_auction'
+        parts.append(auction)
+
+        cascade = auction.copy()
+        cascade['dt'] = auction['dt'] + np.timedelta64(self.cascade_delay)
+        cascade['price'] = np.nan
+        cascade['volume'] = 0
+        cascade['type'] = DATASOURCE_TYPE.CASCADE_POSITION
+        cascade['market'] = 'cascade'
+        parts.append(cascade)
+
+        day_ix, slots = np.nonzero(exists[:, hourly:])
+        slots += hourly
+        intraday = np.zeros(len(day_ix), dtype=epex_event_dtype)
+        intraday['dt'] = starts[day_ix, slots] - \
+            np.timedelta64(self.intraday_lead)
+        intraday['day'] = delivery_days[day_ix]
+        intraday['sid'] = sids[day_ix, slots]
+        intraday['price'] = prices[day_ix, slots]
+        intraday['volume'] = np.round(50 * volumes[day_ix, slots])
+        intraday['type'] = DATASOURCE_TYPE.TRADE
+        intraday['product'] = product_names[slots]
+        intraday['market'] = 'intraday'
+        parts.append(intraday)
+
+        return np.concatenate(parts), state
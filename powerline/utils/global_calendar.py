@@ -1,8 +1,18 @@
+"""
+Holiday rules shared by the power market calendars. The rules are only built
+on first access of one of them, see LazyModule.
+"""
+
+from functools import partial
+import sys
+
 import pandas as pd
 from dateutil import rrule
 
 from zipline.utils.tradingcalendar import end, canonicalize_datetime
 
+from powerline.utils.lazy_module import LazyModule, once
+
 __author__ = 'Warren'
 
 
@@ -13,113 +23,141 @@ start = canonicalize_datetime(start)
 end = canonicalize_datetime(end)
 
 
-weekends = rrule.rrule(
-    rrule.YEARLY,
-    byweekday=(rrule.SA, rrule.SU),
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# New Year's Day
-new_year = rrule.rrule(
-    rrule.MONTHLY,
-    byyearday=1,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# Easter Monday
-easter_monday = rrule.rrule(
-    rrule.DAILY,
-    byeaster=1,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# Christi Himmelfahrt
-ch_himm = rrule.rrule(
-    rrule.DAILY,
-    byeaster=39,
-    cache=True,
-    dtstart=pd.Timestamp('2013-01-01', tz='UTC'),
-    until=pd.Timestamp('2013-12-31', tz='UTC')
-)
-
-# Pfingstmontag
-pfinst_mon_13 = rrule.rrule(
-    rrule.DAILY,
-    byeaster=50,
-    cache=True,
-    dtstart=pd.Timestamp('2013-01-01', tz='UTC'),
-    until=pd.Timestamp('2013-12-31', tz='UTC')
-)
-
-pfinst_mon_15 = rrule.rrule(
-    rrule.DAILY,
-    byeaster=50,
-    cache=True,
-    dtstart=pd.Timestamp('2015-01-01', tz='UTC'),
-)
-
-# Labour Day (1st of May)
-may_bank = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=5,
-    bymonthday=1,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# Tag der Deutschen Einheit
-tde = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=10,
-    bymonthday=3,
-    cache=True,
-    dtstart=pd.Timestamp('2011-01-01', tz='UTC'),
-    until=pd.Timestamp('2013-12-31', tz='UTC')
-)
-
-# Christmas Eve
-christmas_eve = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=12,
-    bymonthday=24,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# Christmas Day
-christmas = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=12,
-    bymonthday=25,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# Boxing Day
-boxing_day = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=12,
-    bymonthday=26,
-    cache=True,
-    dtstart=start,
-    until=end
-)
-
-# New Year's Eve
-newyears_eve = rrule.rrule(
-    rrule.MONTHLY,
-    bymonth=12,
-    bymonthday=31,
-    cache=True,
-    dtstart=start,
-    until=end
-)
+@once
+def get_rules():
+    weekends = rrule.rrule(
+        rrule.YEARLY,
+        byweekday=(rrule.SA, rrule.SU),
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # New Year's Day
+    new_year = rrule.rrule(
+        rrule.MONTHLY,
+        byyearday=1,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # Easter Monday
+    easter_monday = rrule.rrule(
+        rrule.DAILY,
+        byeaster=1,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # Christi Himmelfahrt
+    ch_himm = rrule.rrule(
+        rrule.DAILY,
+        byeaster=39,
+        cache=True,
+        dtstart=pd.Timestamp('2013-01-01', tz='UTC'),
+        until=pd.Timestamp('2013-12-31', tz='UTC')
+    )
+
+    # Pfingstmontag
+    pfinst_mon_13 = rrule.rrule(
+        rrule.DAILY,
+        byeaster=50,
+        cache=True,
+        dtstart=pd.Timestamp('2013-01-01', tz='UTC'),
+        until=pd.Timestamp('2013-12-31', tz='UTC')
+    )
+
+    pfinst_mon_15 = rrule.rrule(
+        rrule.DAILY,
+        byeaster=50,
+        cache=True,
+        dtstart=pd.Timestamp('2015-01-01', tz='UTC'),
+    )
+
+    # Labour Day (1st of May)
+    may_bank = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=5,
+        bymonthday=1,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # Tag der Deutschen Einheit
+    tde = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=10,
+        bymonthday=3,
+        cache=True,
+        dtstart=pd.Timestamp('2011-01-01', tz='UTC'),
+        until=pd.Timestamp('2013-12-31', tz='UTC')
+    )
+
+    # Christmas Eve
+    christmas_eve = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=12,
+        bymonthday=24,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # Christmas Day
+    christmas = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=12,
+        bymonthday=25,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # Boxing Day
+    boxing_day = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=12,
+        bymonthday=26,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    # New Year's Eve
+    newyears_eve = rrule.rrule(
+        rrule.MONTHLY,
+        bymonth=12,
+        bymonthday=31,
+        cache=True,
+        dtstart=start,
+        until=end
+    )
+
+    return {
+        'weekends': weekends,
+        'new_year': new_year,
+        'easter_monday': easter_monday,
+        'ch_himm': ch_himm,
+        'pfinst_mon_13': pfinst_mon_13,
+        'pfinst_mon_15': pfinst_mon_15,
+        'may_bank': may_bank,
+        'tde': tde,
+        'christmas_eve': christmas_eve,
+        'christmas': christmas,
+        'boxing_day': boxing_day,
+        'newyears_eve': newyears_eve,
+    }
+
+
+def _get_rule(name):
+    return get_rules()[name]
+
+
+sys.modules[__name__] = LazyModule(sys.modules[__name__], dict(
+    (name, partial(_get_rule, name)) for name in [
+        'weekends', 'new_year', 'easter_monday', 'ch_himm', 'pfinst_mon_13',
+        'pfinst_mon_15', 'may_bank', 'tde', 'christmas_eve', 'christmas',
+        'boxing_day', 'newyears_eve']))
@@ -1,7 +1,11 @@
+from datetime import timedelta
+
 import pandas as pd
 import numpy as np
 from itertools import product
 
+from powerline.utils.calendar_helpers import exchange_tz, local_times
+
 __author__ = 'max'
 
 hourly_products = ['%02d-%02d' % (i, i + 1) for i in range(24)]
@@ -9,25 +13,221 @@ quarter_tags = ['Q%d' % i for i in range(1, 5)]
 quarterly_products = ['%02d%s' % (i, tag)
                       for (i, tag) in product(range(24), quarter_tags)]
 
+# the hour from 2 to 3 takes place twice on the day daylight saving time
+# ends, the products of its second occurrence are marked with a 'b'
+dst_hour = 2
+long_day_hourly_products = hourly_products[:dst_hour + 1] + \
+    ['%sb' % hourly_products[dst_hour]] + hourly_products[dst_hour + 1:]
+long_day_quarterly_products = quarterly_products[:4 * (dst_hour + 1)] + \
+    ['%02d%sb' % (dst_hour, tag) for tag in quarter_tags] + \
+    quarterly_products[4 * (dst_hour + 1):]
+
+short_day_hourly_products = hourly_products[:dst_hour] + \
+    hourly_products[dst_hour + 1:]
+short_day_quarterly_products = quarterly_products[:4 * dst_hour] + \
+    quarterly_products[4 * (dst_hour + 1):]
+
+_day_products = {
+    ('hour', 23): short_day_hourly_products,
+    ('hour', 24): hourly_products,
+    ('hour', 25): long_day_hourly_products,
+    ('qh', 23): short_day_quarterly_products,
+    ('qh', 24): quarterly_products,
+    ('qh', 25): long_day_quarterly_products}
+
+_layouts = {24: ('hour', 24), 25: ('hour', 25), 96: ('qh', 24),
+            100: ('qh', 25)}
+
+# (grid, number of values, hours of the day) -> positions, see day_positions
+_day_positions = {}
+
 
-def convert_between_h_and_qh(source_frame):
+def convert_between_h_and_qh(source_frame, volume=None, tz=exchange_tz,
+                             mask_missing=False):
     """
     Convert a DataFrame with hourly or quarter hour price data to the other
-    format
-    :param source_frame: DataFrame with hourly or quarter hour prices
-    :return: DataFrame with quarter hour or hourly prices
-    """
-    if source_frame.columns.shape[0] == 24:
-        result_frame = pd.DataFrame(np.array(source_frame).repeat(4, axis=1),
-                                    index=source_frame.index,
-                                    columns=quarterly_products)
-    elif source_frame.columns.shape[0] == 96:
-        data = np.array(source_frame)
-        mean_data = np.mean(np.array([data[:, ::4], data[:, 1::4],
-                                      data[:, 2::4], data[:, 3::4]]), axis=0)
-        result_frame = pd.DataFrame(mean_data, index=source_frame.index,
-                                    columns=hourly_products)
-    else:
+    format. The data is converted through views of the frame's values, so
+    the result is the only copy made.
+
+    Besides the usual 24 hours and 96 quarter hours, frames with the 25
+    hours or 100 quarter hours of the long days at the end of daylight
+    saving time are accepted, with the second occurrence of 2 to 3 o'clock
+    in the '02-03b' and '02Q1b' to '02Q4b' columns. With mask_missing and a
+    frame indexed by delivery days, the products that do not exist on a day
+    are set to NaN: the hour from 2 to 3 o'clock on the short days and the
+    'b' products on all but the long days.
+
+    Frames that do not fit in memory can be passed in chunks, e.g. from
+    pd.read_csv(..., chunksize=...); the converted chunks are then yielded
+    one by one.
+
+    :param source_frame: DataFrame with hourly or quarter hour prices, or an
+        iterable of such DataFrames
+    :param volume: optional DataFrame of the traded volumes of quarter hour
+        prices, or an iterable of them for chunked input. Hourly prices are
+        then the volume-weighted means of their quarters.
+    :param tz: timezone of the delivery days. Naive days are taken as they
+        are, tz-aware ones are converted to tz, e.g. local midnights stored
+        in UTC.
+    :param mask_missing: whether to set the products that do not exist on
+        a delivery day to NaN
+    :return: DataFrame with quarter hour or hourly prices, or a generator of
+        them for iterable input
+    """
+    if not isinstance(source_frame, pd.DataFrame):
+        if volume is None:
+            return (convert_between_h_and_qh(chunk, tz=tz,
+                                             mask_missing=mask_missing)
+                    for chunk in source_frame)
+        return (convert_between_h_and_qh(chunk, volume_chunk, tz,
+                                         mask_missing)
+                for chunk, volume_chunk in zip(source_frame, volume))
+
+    try:
+        grid, hours = _layouts[source_frame.columns.shape[0]]
+    except KeyError:
         raise ValueError('Argument source_frame should be a Dataframe with ' +
-                         'either 24 or 96 columns')
-    return result_frame
+                         'either 24 or 96 columns, or 25 or 100 columns ' +
+                         'for long days')
+
+    values = source_frame.values
+    if grid == 'hour':
+        if volume is not None:
+            raise ValueError('Volumes can only weight quarter hour prices')
+        quarters = np.broadcast_to(values[:, :, np.newaxis],
+                                   values.shape + (4,))
+        result = quarters.reshape(len(values), 4 * hours)
+        columns = long_day_quarterly_products if hours == 25 else \
+            quarterly_products
+    else:
+        if volume is None:
+            result = _quarters(values, hours).sum(axis=2, dtype=float)
+            result /= 4
+        else:
+            volume = volume.reindex_like(source_frame).values
+            result = _weighted_mean(_quarters(values, hours),
+                                    _quarters(volume, hours))
+        columns = long_day_hourly_products if hours == 25 else \
+            hourly_products
+
+    if mask_missing and isinstance(source_frame.index, pd.DatetimeIndex):
+        result = _mask_missing_hours(result, source_frame.index, hours,
+                                     4 if grid == 'hour' else 1, tz)
+
+    return pd.DataFrame(result, index=source_frame.index, columns=columns)
+
+
+def _quarters(values, hours=24):
+    """
+    :param values: (rows x 4 * hours) array of quarter hour values
+    :param hours: number of hours of the layout, 24 or 25
+    :return: (rows x hours x 4) view of values. Frames usually store their
+        values column-major, which is reshaped through the transpose to
+        avoid a copy.
+    """
+    rows = len(values)
+    if values.flags.f_contiguous and not values.flags.c_contiguous:
+        return values.T.reshape(hours, 4, rows).transpose(2, 0, 1)
+    return values.reshape(rows, hours, 4)
+
+
+def _weighted_mean(prices, volume):
+    """
+    :return: volume-weighted mean along the last axis. Quarters without a
+        price or volume are left out, hours without any volume are NaN.
+    """
+    volume = np.where(np.isnan(prices), 0, volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(prices * volume, axis=2) / np.nansum(volume, axis=2)
+
+
+def day_hours(days, tz=exchange_tz):
+    """
+    :param days: DatetimeIndex of delivery days
+    :param tz: timezone of the delivery days
+    :return: array of the number of hours of each day, 23, 24 or 25
+    """
+    length = local_times(days, timedelta(days=1), tz) - \
+        local_times(days, timedelta(0), tz)
+    return (length.values // np.timedelta64(1, 'h')).astype(int)
+
+
+def day_products(day, grid='hour', tz=exchange_tz):
+    """
+    :param day: delivery day
+    :param grid: 'hour' or 'qh'
+    :param tz: timezone of the delivery day
+    :return: list of the products delivered on day, in delivery order. The
+        short day has no products from 2 to 3 o'clock, the long day has the
+        'b' products of their second occurrence.
+    """
+    return _day_products[(grid, _hours(day, tz))]
+
+
+def day_positions(day, size, grid='hour', tz=exchange_tz):
+    """
+    Matches a vector of values of the regular or the long day products to
+    the products delivered on day by name.
+
+    :param day: delivery day
+    :param size: length of the vector, 24 or 25 for 'hour' and 96 or 100
+        for 'qh'
+    :param grid: 'hour' or 'qh'
+    :param tz: timezone of the delivery day
+    :return: array of the positions in the vector of the products of
+        day_products(day, grid). The short day skips the hour from 2 to 3
+        o'clock. The 'b' products of the long day are at the position of
+        the hour they repeat if the vector has no 'b' products.
+    """
+    key = (grid, size, _hours(day, tz))
+    try:
+        return _day_positions[key]
+    except KeyError:
+        pass
+
+    try:
+        vector_grid, vector_hours = _layouts[size]
+    except KeyError:
+        vector_grid = None
+    if vector_grid != grid:
+        raise ValueError('%d values do not fit the %s products' % (size,
+                                                                   grid))
+
+    vector = _day_products[(grid, vector_hours)]
+    positions = np.array([vector.index(product) if product in vector else
+                          vector.index(product[:-1])
+                          for product in _day_products[(grid, key[2])]])
+    _day_positions[key] = positions
+    return positions
+
+
+def _hours(day, tz):
+    """
+    :return: number of hours of the delivery day
+    """
+    return day_hours(pd.DatetimeIndex([pd.Timestamp(day)]), tz)[0]
+
+
+def _mask_missing_hours(result, days, hours, width, tz):
+    """
+    Sets the products that do not exist on a day to NaN.
+
+    :param result: (days x hours * width) array of converted values
+    :param width: number of columns per hour, 4 for quarter hours
+    """
+    lengths = day_hours(days, tz)
+    short_days = lengths == 23
+    if hours == 25:
+        missing = {dst_hour: short_days, dst_hour + 1: lengths != 25}
+    else:
+        missing = {dst_hour: short_days}
+
+    if not any(rows.any() for rows in missing.values()):
+        return result
+
+    if not np.issubdtype(result.dtype, np.floating) or \
+            not result.flags.writeable:
+        result = result.astype(float)
+    for hour, rows in missing.items():
+        result[rows, hour * width:(hour + 1) * width] = np.nan
+    return result
@@ -0,0 +1,199 @@
+"""
+Opt-in instrumentation of the backtest hot paths.
+
+A Recorder wraps the hooked methods only while it is enabled and restores
+the original methods afterwards, so a disabled recorder costs nothing:
+
+    with Recorder() as recorder:
+        algo.run(data)
+    print(recorder.summary())
+    recorder.write_chrome_trace('run.json')
+
+The trace can be opened in chrome://tracing or https://www.speedscope.app.
+"""
+
+from collections import defaultdict
+from functools import wraps
+from importlib import import_module
+import json
+import time
+
+import pandas as pd
+from six import iteritems, itervalues
+
+__author__ = "Warren"
+
+
+# (module, class, method) of the timed methods
+default_hooks = [
+    ('powerline.history.history_container', 'EpexHistoryContainer',
+     'batch_from_bardata'),
+    ('powerline.history.history_container', 'EpexHistoryContainer',
+     'frame_from_bardata'),
+    ('powerline.history.history_container', 'EpexHistoryContainer',
+     'add_batch'),
+    ('powerline.history.history_container', 'EpexHistoryContainer',
+     'add_frame'),
+    ('powerline.finance.auction', 'BeforeEpexAuction', 'should_trigger'),
+    ('powerline.finance.auction', 'TradingAlgorithmAuction',
+     'order_auction'),
+    ('powerline.finance.auction', 'TradingAlgorithmAuction',
+     'batch_order_target'),
+    ('powerline.finance.risk', 'RiskReport', 'calculate_metrics'),
+]
+
+# methods taking (data, algo_dt) whose bars are counted by market
+bar_hooks = set(['batch_from_bardata'])
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class Recorder(object):
+    """
+    Records calls, timings and per-bar event counts of the hooked methods.
+    """
+
+    def __init__(self, hooks=None, trace=True):
+        """
+        :param hooks: list of (module, class, method) to time, defaults to
+            default_hooks
+        :param trace: whether to keep every call for write_chrome_trace.
+            Without it only the totals are kept.
+        """
+        self.hooks = default_hooks if hooks is None else hooks
+        self.trace = trace
+
+        self.calls = defaultdict(int)
+        self.total = defaultdict(float)
+        self.max = defaultdict(float)
+        self.spans = []
+        self.bars = []
+        self.counters = defaultdict(int)
+
+        self._originals = []
+        self._origin = timer()
+
+    @property
+    def enabled(self):
+        return bool(self._originals)
+
+    def enable(self):
+        if self.enabled:
+            return
+        for module_name, class_name, method in self.hooks:
+            cls = getattr(import_module(module_name), class_name)
+            original = cls.__dict__[method]
+            self._originals.append((cls, method, original))
+            setattr(cls, method, self._wrap(class_name + '.' + method,
+                                            original, method in bar_hooks))
+
+    def disable(self):
+        while self._originals:
+            cls, method, original = self._originals.pop()
+            setattr(cls, method, original)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _wrap(self, name, func, count_bar):
+        recorder = self
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if count_bar:
+                recorder.count_bar(*args[1:3])
+
+            start = timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(name, start, timer())
+
+        return wrapper
+
+    def record(self, name, start, end):
+        """
+        Adds a call of name from start to end, as given by timer.
+        """
+        duration = end - start
+        self.calls[name] += 1
+        self.total[name] += duration
+        if duration > self.max[name]:
+            self.max[name] = duration
+        if self.trace:
+            self.spans.append((name, start, duration))
+
+    def count(self, name, n=1):
+        """
+        Increases the counter name by n.
+        """
+        self.counters[name] += n
+
+    def count_bar(self, data, algo_dt):
+        """
+        Counts the events of the bar at algo_dt by market.
+        """
+        counts = defaultdict(int)
+        for event in itervalues(data._data):
+            if event['dt'] != algo_dt:
+                continue
+            try:
+                counts[event['market']] += 1
+            except KeyError:
+                counts[None] += 1
+        self.bars.append((algo_dt, timer(), dict(counts)))
+        for market, n in iteritems(counts):
+            self.count('events.%s' % market, n)
+
+    def summary(self):
+        """
+        :return: DataFrame of calls, total, mean and max seconds per hooked
+            method, slowest first
+        """
+        rows = [(name, calls, self.total[name],
+                 1e6 * self.total[name] / calls, 1e6 * self.max[name])
+                for name, calls in iteritems(self.calls)]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        summary = pd.DataFrame(rows, columns=['name', 'calls', 'total_s',
+                                              'mean_us', 'max_us'])
+        return summary.set_index('name')
+
+    def event_counts(self):
+        """
+        :return: DataFrame of the number of events per bar (rows) and market
+            (columns)
+        """
+        if not self.bars:
+            return pd.DataFrame()
+        dts, _, counts = zip(*self.bars)
+        counts = pd.DataFrame(list(counts), index=list(dts))
+        return counts.fillna(0).astype(int)
+
+    def chrome_trace(self):
+        """
+        :return: dict in the Chrome trace event format, with a complete
+            event per call and a counter event of the market events per bar
+        """
+        events = []
+        for name, start, duration in self.spans:
+            events.append({'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+                           'ts': 1e6 * (start - self._origin),
+                           'dur': 1e6 * duration})
+
+        for dt, start, counts in self.bars:
+            events.append({'name': 'events', 'ph': 'C', 'pid': 0,
+                           'ts': 1e6 * (start - self._origin),
+                           'args': dict((str(market), n)
+                                        for market, n in iteritems(counts))})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': dict((name, n) for name, n in
+                                  iteritems(self.counters))}
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,53 @@
+"""
+Support for modules whose expensive globals are computed on first access.
+"""
+
+from functools import wraps
+from types import ModuleType
+
+__author__ = "Warren"
+
+
+def once(func):
+    """
+    Memoizes a function without arguments.
+    """
+    @wraps(func)
+    def wrapper():
+        try:
+            return wrapper.value
+        except AttributeError:
+            wrapper.value = func()
+            return wrapper.value
+    return wrapper
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module which computes some of its attributes on first
+    access. It is installed at the end of the module it replaces:
+
+        sys.modules[__name__] = LazyModule(sys.modules[__name__], {
+            'trading_days': _load_trading_days})
+
+    Afterwards `module.trading_days` and `from module import trading_days`
+    call the loader once and keep the result as a regular attribute.
+    """
+
+    def __init__(self, module, loaders):
+        super(LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # Keep the original module alive, its functions refer to its globals
+        self.__dict__['_module'] = module
+        self.__dict__['_loaders'] = loaders
+
+    def __getattr__(self, name):
+        try:
+            loader = self.__dict__['_loaders'][name]
+        except KeyError:
+            raise AttributeError("module '%s' has no attribute '%s'" %
+                                 (self.__name__, name))
+
+        value = loader()
+        setattr(self, name, value)
+        return value
@@ -1,17 +1,22 @@
 """
 Defines trading days and trading times for the EEX weekly futures market.
+
+The heavy globals non_trading_days, trading_day, trading_days and
+open_and_closes are only computed on first access, see LazyModule.
 """
 
-from datetime import datetime
+from datetime import timedelta
+import sys
 
 import pandas as pd
 from dateutil import rrule
 from zipline.utils.tradingcalendar import end, canonicalize_datetime
 
-from powerline.utils.global_calendar import (
-    boxing_day, ch_himm, christmas, christmas_eve, easter_monday, may_bank,
-    new_year, newyears_eve, pfinst_mon_13, pfinst_mon_15, tde, weekends
-)
+from powerline.utils import global_calendar
+from powerline.utils.calendar_cache import cache_horizon, load_days, \
+    with_freq
+from powerline.utils.calendar_helpers import get_local_open_and_closes
+from powerline.utils.lazy_module import LazyModule, once
 
 __author__ = "Warren"
 
@@ -19,6 +24,9 @@ __author__ = "Warren"
 start = pd.Timestamp('2010-12-01', tz='UTC')
 end_base = pd.Timestamp('today', tz='UTC')
 
+# increase whenever the rules below change, invalidates the disk cache
+calendar_version = 1
+
 
 def get_non_trading_days(start, end):
     non_trading_rules = []
@@ -26,9 +34,9 @@ def get_non_trading_days(start, end):
     start = canonicalize_datetime(start)
     end = canonicalize_datetime(end)
 
-    non_trading_rules.append(weekends)
+    non_trading_rules.append(global_calendar.weekends)
 
-    non_trading_rules.append(new_year)
+    non_trading_rules.append(global_calendar.new_year)
     # Good Friday
     good_friday = rrule.rrule(
         rrule.DAILY,
@@ -39,25 +47,25 @@ def get_non_trading_days(start, end):
     )
     non_trading_rules.append(good_friday)
 
-    non_trading_rules.append(easter_monday)
+    non_trading_rules.append(global_calendar.easter_monday)
 
-    non_trading_rules.append(ch_himm)
+    non_trading_rules.append(global_calendar.ch_himm)
 
-    non_trading_rules.append(pfinst_mon_13)
+    non_trading_rules.append(global_calendar.pfinst_mon_13)
 
-    non_trading_rules.append(pfinst_mon_15)
+    non_trading_rules.append(global_calendar.pfinst_mon_15)
 
-    non_trading_rules.append(may_bank)
+    non_trading_rules.append(global_calendar.may_bank)
 
-    non_trading_rules.append(tde)
+    non_trading_rules.append(global_calendar.tde)
 
-    non_trading_rules.append(christmas_eve)
+    non_trading_rules.append(global_calendar.christmas_eve)
 
-    non_trading_rules.append(christmas)
+    non_trading_rules.append(global_calendar.christmas)
 
-    non_trading_rules.append(boxing_day)
+    non_trading_rules.append(global_calendar.boxing_day)
 
-    non_trading_rules.append(newyears_eve)
+    non_trading_rules.append(global_calendar.newyears_eve)
 
     non_trading_ruleset = rrule.rruleset()
     for rule in non_trading_rules:
@@ -68,17 +76,14 @@ def get_non_trading_days(start, end):
 
     return pd.DatetimeIndex(non_trading_days)
 
-non_trading_days = get_non_trading_days(start, end)
-trading_day = pd.tseries.offsets.CDay(holidays=non_trading_days)
 
-
-def get_trading_days(start, end, trading_day=trading_day):
+def get_trading_days(start, end, trading_day=None):
+    if trading_day is None:
+        trading_day = _load_trading_day()
     return pd.date_range(start=start.date(),
                          end=end.date(),
                          freq=trading_day).tz_localize('UTC')
 
-trading_days = get_trading_days(start, end)
-
 
 def get_early_closes(start, end):
     '''
@@ -90,29 +95,46 @@ early_closes = get_early_closes(start, end)
 
 
 def get_open_and_closes(trading_days, early_closes):
-    open_and_closes = pd.DataFrame(index=trading_days,
-                                   columns=('market_open', 'market_close'))
-    for day in trading_days:
-        market_open = pd.Timestamp(
-            datetime(
-                year=day.year,
-                month=day.month,
-                day=day.day,
-                hour=8,
-                minute=00),
-            tz='Europe/Berlin').tz_convert('UTC')
-        close_hour = 18
-        market_close = pd.Timestamp(
-            datetime(
-                year=day.year,
-                month=day.month,
-                day=day.day,
-                hour=close_hour),
-            tz='Europe/Berlin').tz_convert('UTC')
-
-        open_and_closes.loc[day, 'market_open'] = market_open
-        open_and_closes.loc[day, 'market_close'] = market_close
-
-    return open_and_closes
-
-open_and_closes = get_open_and_closes(trading_days, early_closes)
+    return get_local_open_and_closes(trading_days,
+                                     open_offset=timedelta(hours=8),
+                                     close_offset=timedelta(hours=18))
+
+
+@once
+def _load_days():
+    horizon = cache_horizon(end)
+
+    def build():
+        non_trading_days = get_non_trading_days(start, horizon)
+        trading_day = pd.tseries.offsets.CDay(holidays=non_trading_days)
+        return {'non_trading_days': non_trading_days,
+                'trading_days': get_trading_days(start, horizon,
+                                                 trading_day)}
+
+    days = load_days('eex', calendar_version, start, horizon, build)
+
+    # the cached days run to the horizon, the calendar to end
+    non_trading_days = days['non_trading_days']
+    non_trading_days = non_trading_days[
+        :non_trading_days.searchsorted(end, 'right')]
+    trading_days = days['trading_days']
+    trading_days = trading_days[:trading_days.searchsorted(end, 'right')]
+
+    trading_day = pd.tseries.offsets.CDay(holidays=non_trading_days)
+    return {'non_trading_days': non_trading_days,
+            'trading_day': trading_day,
+            'trading_days': with_freq(trading_days, trading_day)}
+
+
+@once
+def _load_trading_day():
+    return _load_days()['trading_day']
+
+
+sys.modules[__name__] = LazyModule(sys.modules[__name__], {
+    'non_trading_days': lambda: _load_days()['non_trading_days'],
+    'trading_day': _load_trading_day,
+    'trading_days': lambda: _load_days()['trading_days'],
+    'open_and_closes': lambda: get_open_and_closes(
+        _load_days()['trading_days'], early_closes),
+})
@@ -1,13 +1,22 @@
 """
 Defines trading days and trading times for the EPEX market.
+
+trading_days, open_and_closes and auction_times are only computed on first
+access, see LazyModule.
 """
 
 
 import pandas as pd
 from datetime import datetime, timedelta
+import sys
 
 from zipline.utils.tradingcalendar import end, canonicalize_datetime
 
+from powerline.utils.calendar_helpers import (
+    get_local_open_and_closes, local_times
+)
+from powerline.utils.lazy_module import LazyModule, once
+
 __author__ = "Warren"
 
 canonicalize_datetime = canonicalize_datetime
@@ -24,8 +33,6 @@ def get_trading_days(start, end, trading_day=trading_day):
                          end=end.date(),
                          freq='D').tz_localize('UTC')
 
-trading_days = get_trading_days(start, end)
-
 
 def get_early_closes(start, end):
     return []
@@ -34,45 +41,65 @@ early_closes = get_early_closes(start, end)
 
 
 def get_open_and_closes(trading_days, early_closes):
-    open_and_closes = pd.DataFrame(index=trading_days,
-                                   columns=('market_open', 'market_close'))
-    for day in trading_days:
-        market_open = pd.Timestamp(
-            datetime(
-                year=day.year,
-                month=day.month,
-                day=day.day,
-                hour=0,
-                minute=0),
-            tz='Europe/Berlin').tz_convert('UTC')
-        market_close = pd.Timestamp(
-            datetime(
-                year=day.year,
-                month=day.month,
-                day=day.day,
-                hour=0,
-                minute=0) + timedelta(days=1),
-            tz='Europe/Berlin').tz_convert('UTC')
-
-        open_and_closes.loc[day, 'market_open'] = market_open
-        open_and_closes.loc[day, 'market_close'] = market_close
-
-    return open_and_closes
-
-open_and_closes = get_open_and_closes(trading_days, early_closes)
+    return get_local_open_and_closes(trading_days,
+                                     open_offset=timedelta(0),
+                                     close_offset=timedelta(days=1))
+
+
+auction_offset = timedelta(hours=12)
+
+
+def get_auction_times(trading_days):
+    """
+    :param trading_days: DatetimeIndex of days
+    :return: DatetimeIndex of the auction times on these days in UTC
+    """
+    return local_times(trading_days, auction_offset)
 
 
 def get_auctions(dt):
     """
+    Auction times of calendar days are read from a precomputed table.
+
     :param dt:
     :return: auction time on day=dt
     """
+    try:
+        return _load_auction_table()[dt.toordinal()]
+    except KeyError:
+        pass
+
     auction = pd.Timestamp(datetime(
         year=dt.year,
         month=dt.month,
-        day=dt.day,
-        hour=12,
-        minute=0),
+        day=dt.day) + auction_offset,
         tz='Europe/Berlin').tz_convert('UTC')
 
     return auction
+
+
+@once
+def _load_trading_days():
+    return get_trading_days(start, end)
+
+
+@once
+def _load_auction_times():
+    return get_auction_times(_load_trading_days())
+
+
+@once
+def _load_auction_table():
+    """
+    :return: dict of date ordinal to auction time
+    """
+    return dict(zip([day.toordinal() for day in _load_trading_days()],
+                    _load_auction_times()))
+
+
+sys.modules[__name__] = LazyModule(sys.modules[__name__], {
+    'trading_days': _load_trading_days,
+    'auction_times': _load_auction_times,
+    'open_and_closes': lambda: get_open_and_closes(_load_trading_days(),
+                                                   early_closes),
+})
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from powerline.finance.auction import AssetIndex
+
+__author__ = 'Warren'
+
+
+class SymbolFinder(object):
+    """
+    Asset finder returning (version, symbol) for every symbol.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.lookups = 0
+
+    def lookup_future_symbol(self, symbol):
+        self.lookups += 1
+        return self.version, symbol
+
+
+def symbols(day):
+    return [day + '_00-01', day + '_01-02']
+
+
+class TestAssetIndex(TestCase):
+
+    def setUp(self):
+        self.index = AssetIndex(size=2)
+
+    def test_index(self):
+        finder = SymbolFinder(1)
+        assets = self.index.get(finder, '2015-06-01', symbols)
+        self.assertEqual(assets, [(1, '2015-06-01_00-01'),
+                                  (1, '2015-06-01_01-02')])
+        self.assertIs(self.index.get(finder, '2015-06-01', symbols), assets)
+        self.assertEqual(finder.lookups, 2)
+
+    def test_least_recently_used(self):
+        finder = SymbolFinder(1)
+        self.index.get(finder, '2015-06-01', symbols)
+        self.index.get(finder, '2015-06-02', symbols)
+
+        # the first day is used again, so the second one is dropped
+        self.index.get(finder, '2015-06-01', symbols)
+        self.index.get(finder, '2015-06-03', symbols)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(finder.lookups, 6)
+
+        self.index.get(finder, '2015-06-01', symbols)
+        self.assertEqual(finder.lookups, 6)
+        self.index.get(finder, '2015-06-02', symbols)
+        self.assertEqual(finder.lookups, 8)
+
+    def test_new_asset_finder(self):
+        first = SymbolFinder(1)
+        self.index.get(first, '2015-06-01', symbols)
+
+        second = SymbolFinder(2)
+        assets = self.index.get(second, '2015-06-01', symbols)
+        self.assertEqual(assets[0], (2, '2015-06-01_00-01'))
+        self.assertEqual(len(self.index), 1)
+
+        second.version = 3
+        self.index.clear()
+        assets = self.index.get(second, '2015-06-01', symbols)
+        self.assertEqual(assets[0], (3, '2015-06-01_00-01'))
@@ -0,0 +1,42 @@
+from unittest import TestCase
+from datetime import datetime
+
+import pandas as pd
+
+from powerline.finance.auction import BeforeEpexAuction
+from powerline.utils.tradingcalendar_epex import get_auctions
+
+__author__ = "Warren"
+
+
+class TestBeforeEpexAuction(TestCase):
+    """
+    Tests the precomputed trigger times against the auction times, including
+    the days of the DST transitions.
+    """
+    def setUp(self):
+        self.rule = BeforeEpexAuction(minutes=30)
+        self.minutes = pd.date_range('2015-03-28', '2015-03-30 23:59',
+                                     freq='min', tz='UTC')
+
+    def test_should_trigger(self):
+        observed = [dt for dt in self.minutes
+                    if self.rule.should_trigger(dt, None)]
+        expected = [pd.Timestamp('2015-03-28 10:30', tz='UTC'),
+                    pd.Timestamp('2015-03-29 09:30', tz='UTC'),
+                    pd.Timestamp('2015-03-30 09:30', tz='UTC')]
+        self.assertEqual(observed, expected)
+
+    def test_next_trigger(self):
+        dt = pd.Timestamp('2015-03-29 09:30', tz='UTC')
+        self.assertEqual(self.rule.next_trigger(dt), dt)
+        self.assertEqual(self.rule.next_trigger(dt + pd.Timedelta(minutes=1)),
+                         pd.Timestamp('2015-03-30 09:30', tz='UTC'))
+
+    def test_get_auctions(self):
+        for dt in [datetime(2015, 3, 29), datetime(2015, 10, 25),
+                   datetime(2040, 1, 1)]:
+            expected = pd.Timestamp(dt.replace(hour=12),
+                                    tz='Europe/Berlin').tz_convert('UTC')
+            self.assertEqual(get_auctions(dt), expected)
+            self.assertEqual(get_auctions(dt.date()), expected)
@@ -0,0 +1,86 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from powerline.utils.calendar_cache import CACHE_ENV, cache_horizon, \
+    load_days, with_freq
+from powerline.utils.lazy_module import LazyModule
+from powerline.utils import tradingcalendar_eex
+
+__author__ = "Warren"
+
+
+class TestCalendarCache(TestCase):
+    """
+    Tests that calendar days survive a round trip through the disk cache.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.previous = os.environ.get(CACHE_ENV)
+        os.environ[CACHE_ENV] = self.directory
+        self.start = pd.Timestamp('2015-01-01', tz='UTC')
+        self.end = pd.Timestamp('2015-12-31', tz='UTC')
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {'aware': pd.date_range(self.start, self.end, freq='B'),
+                'naive': pd.date_range('2015-01-01', '2015-01-10')}
+
+    def test_round_trip(self):
+        expected = load_days('test', 1, self.start, self.end, self.build)
+        observed = load_days('test', 1, self.start, self.end, self.build)
+
+        self.assertEqual(self.builds, 1)
+        for key in expected:
+            self.assertTrue(observed[key].equals(expected[key]))
+            self.assertEqual(observed[key].tz, expected[key].tz)
+
+    def test_version_invalidates(self):
+        load_days('test', 1, self.start, self.end, self.build)
+        load_days('test', 2, self.start, self.end, self.build)
+        self.assertEqual(self.builds, 2)
+
+    def test_freq(self):
+        trading_day = pd.tseries.offsets.CDay(holidays=['2015-01-06'])
+
+        def build():
+            return {'days': pd.date_range(self.start, self.end,
+                                          freq=trading_day)}
+
+        expected = load_days('test', 1, self.start, self.end, build)['days']
+        observed = load_days('test', 1, self.start, self.end, build)['days']
+        observed = with_freq(observed, trading_day)
+        self.assertTrue(observed.equals(expected))
+        self.assertEqual(observed.freq, trading_day)
+
+    def test_horizon(self):
+        horizon = pd.Timestamp('2016-12-31', tz='UTC')
+        self.assertEqual(cache_horizon(pd.Timestamp('2016-03-05 13:00',
+                                                    tz='UTC')), horizon)
+        self.assertEqual(cache_horizon(pd.Timestamp('2016-12-31',
+                                                    tz='UTC')), horizon)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        if self.previous is None:
+            del os.environ[CACHE_ENV]
+        else:
+            os.environ[CACHE_ENV] = self.previous
+
+
+class TestLazyCalendar(TestCase):
+
+    def test_lazy_attributes(self):
+        self.assertIsInstance(tradingcalendar_eex, LazyModule)
+        self.assertIsInstance(tradingcalendar_eex.trading_days,
+                              pd.DatetimeIndex)
+        self.assertEqual(tradingcalendar_eex.trading_days.freq,
+                         tradingcalendar_eex.trading_day)
+        self.assertTrue(tradingcalendar_eex.open_and_closes.index.equals(
+            tradingcalendar_eex.trading_days))
+        self.assertRaises(AttributeError, getattr, tradingcalendar_eex,
+                          'no_such_attribute')
@@ -0,0 +1,126 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from powerline.data import columnar_store
+from powerline.data.columnar_store import ColumnarStore
+from powerline.data.sources import ColumnarSource
+
+__author__ = "Warren"
+
+
+class TestColumnarStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ColumnarStore(self.directory)
+
+        index = pd.date_range('2015-01-30 11:00', '2015-02-02 11:00',
+                              tz='UTC')
+        self.auction = pd.DataFrame({'sid': 1, 'price': [1., 2., 3., 4.],
+                                     'volume': [1e9, 0, 0, np.nan],
+                                     'type': 4, 'product': '01-02'},
+                                    index=index)
+        self.intraday = pd.DataFrame({'dt': index + pd.Timedelta(hours=1),
+                                      'sid': 2, 'price': [5., 6., 7., 8.],
+                                      'type': 4, 'product': '01Q1'})
+        self.store.write('epex_auction', self.auction)
+        self.store.write('intraday', self.intraday)
+
+    def test_partitions(self):
+        self.assertEqual(self.store.markets(), ['epex_auction', 'intraday'])
+        self.assertEqual(self.store.months('intraday'),
+                         ['2015-01', '2015-02'])
+        self.assertIsNone(self.store.read_month('intraday', '2015-03'))
+
+        stored = self.store.read_month('epex_auction', '2015-01')
+        self.assertIsInstance(stored['price'], np.memmap)
+        np.testing.assert_array_equal(stored['volume'], [1e9, 0])
+
+    def test_time_order(self):
+        chunks = list(self.store.iter_chunks())
+        self.assertEqual(len(chunks), 2)
+
+        events = np.concatenate(chunks)
+        np.testing.assert_array_equal(events['price'],
+                                      [1, 5, 2, 6, 3, 7, 4, 8])
+        self.assertEqual(events['market'][:2].tolist(),
+                         ['epex_auction', 'intraday'])
+        self.assertTrue((np.diff(events['dt'].astype('i8')) > 0).all())
+
+    def test_date_range(self):
+        events = np.concatenate(list(self.store.iter_chunks(
+            markets=['intraday'], start='2015-01-31',
+            end=pd.Timestamp('2015-02-01 12:00', tz='UTC'))))
+        np.testing.assert_array_equal(events['price'], [6, 7])
+
+    def test_merge_month(self):
+        update = self.auction.iloc[:1].copy()
+        update['price'] = 9.
+        self.store.write('epex_auction', update)
+
+        stored = self.store.read_month('epex_auction', '2015-01')
+        np.testing.assert_array_equal(stored['price'], [9, 2])
+
+    def test_rewrite_month(self):
+        self.store.write('intraday', self.intraday)
+        stored = self.store.read_month('intraday', '2015-01')
+        np.testing.assert_array_equal(stored['price'], [5, 6])
+
+        directory = os.path.join(self.directory, 'intraday')
+        self.assertTrue(os.path.islink(os.path.join(directory, '2015-01')))
+        # the old directories are kept until the cleanup
+        self.assertEqual(len(os.listdir(directory)), 6)
+
+        self.assertEqual(self.store.cleanup(), 2)
+        self.assertEqual(len(os.listdir(directory)), 4)
+        np.testing.assert_array_equal(
+            self.store.read_month('intraday', '2015-02')['price'], [7, 8])
+
+    def test_read_during_rewrite(self):
+        rewrite = self.intraday.copy()
+        rewrite['dt'] += pd.Timedelta(minutes=15)
+        rewrite['price'] += 10
+
+        # the month is rewritten after the read loaded its first field
+        load = np.load
+        loaded = []
+
+        def load_and_rewrite(*args, **kwargs):
+            if not loaded:
+                loaded.append(args[0])
+                self.store.write('intraday', rewrite)
+            return load(*args, **kwargs)
+
+        columnar_store.np.load = load_and_rewrite
+        try:
+            stored = self.store.read_month('intraday', '2015-01')
+        finally:
+            columnar_store.np.load = load
+
+        np.testing.assert_array_equal(stored['price'], [5, 6])
+        np.testing.assert_array_equal(
+            stored['dt'], self.intraday['dt'][:2].dt.tz_localize(None))
+
+        stored = self.store.read_month('intraday', '2015-01')
+        np.testing.assert_array_equal(stored['price'], [5, 15, 6, 16])
+
+    def test_product_length(self):
+        self.intraday['product'] = '2015-01-30_01Q1'
+        self.assertRaises(ValueError, self.store.write, 'intraday',
+                          self.intraday)
+
+    def test_source(self):
+        events = list(ColumnarSource(self.store, markets=['intraday']))
+        self.assertEqual([event.price for event in events], [5, 6, 7, 8])
+        self.assertEqual(events[0].dt,
+                         pd.Timestamp('2015-01-30 12:00', tz='UTC'))
+        self.assertEqual(events[0].market, 'intraday')
+        self.assertEqual(events[0].product, '01Q1')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from zipline.protocol import DATASOURCE_TYPE
+
+from powerline.utils.data.eex_simulator import EexSimulator
+
+__author__ = "Warren"
+
+
+class TestEexSimulator(TestCase):
+
+    def setUp(self):
+        self.simulator = EexSimulator('2015-03-18', '2015-04-15', seed=1,
+                                      chunk_weeks=1)
+        self.events = np.concatenate(list(self.simulator.iter_chunks()))
+
+    def test_time_order(self):
+        dts = self.events['dt'].astype('i8')
+        self.assertTrue((np.diff(dts) >= 0).all())
+        self.assertEqual(pd.Timestamp(self.events['dt'][0], tz='UTC'),
+                         self.simulator.start)
+        self.assertEqual(pd.Timestamp(self.events['dt'][-1], tz='UTC'),
+                         self.simulator.end)
+
+    def test_weeks(self):
+        sid = self.simulator.sid('2015-04-08')
+        week = self.events[self.events['sid'] == sid]
+
+        # five weeks of trading days without Good Friday
+        self.assertEqual(len(week), 24)
+        self.assertEqual((week['type'] == DATASOURCE_TYPE.TRADE).sum(), 23)
+        self.assertEqual(week['type'][-1], DATASOURCE_TYPE.CLOSE_POSITION)
+        self.assertEqual(pd.Timestamp(week['dt'][-1]),
+                         pd.Timestamp('2015-04-02 16:00'))
+        self.assertEqual(week['product'][0], 'F1B1')
+
+        closes = pd.DatetimeIndex(self.events['dt'])
+        self.assertNotIn(pd.Timestamp('2015-04-03 16:00'), closes)
+        self.assertNotIn(pd.Timestamp('2015-04-04 17:00'), closes)
+
+    def test_seeded_chunks(self):
+        events = np.concatenate(list(EexSimulator(
+            '2015-03-18', '2015-04-15', seed=1).iter_chunks()))
+        for field in events.dtype.names:
+            self.assertTrue((events[field] == self.events[field]).all())
+
+    def test_asset_metadata(self):
+        metadata = self.simulator.asset_metadata()
+        self.assertEqual(len(metadata), 5)
+        self.assertTrue(set(self.events['sid'].tolist()) <= set(metadata))
+
+        dst_week = metadata[self.simulator.sid('2015-03-29')]
+        self.assertEqual(dst_week['symbol'], '2015-03-23_F1B4')
+        self.assertEqual(dst_week['contract_multiplier'], 167)
+        self.assertEqual(dst_week['expiration_date'],
+                         pd.Timestamp('2015-03-22 23:00', tz='UTC'))
@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from powerline.utils.data.epex_simulator import EpexSimulator
+
+__author__ = "Warren"
+
+
+class TestEpexSimulator(TestCase):
+
+    def setUp(self):
+        self.simulator = EpexSimulator('2015-03-28', '2015-03-30', seed=1,
+                                       chunk_days=1)
+        self.events = np.concatenate(list(self.simulator.iter_chunks()))
+
+    def count(self, market, events=None):
+        events = self.events if events is None else events
+        return (events['market'] == market).sum()
+
+    def test_markets(self):
+        # one day of 23 hours
+        self.assertEqual(self.count('auction_signal'), 3)
+        self.assertEqual(self.count('epex_auction'), 24 + 23 + 24)
+        self.assertEqual(self.count('cascade'), 24 + 23 + 24)
+        self.assertEqual(self.count('intraday'), 96 + 92 + 96)
+
+        cascade = self.events[self.events['market'] == 'cascade']
+        self.assertTrue(np.isnan(cascade['price']).all())
+
+    def test_time_order(self):
+        dts = self.events['dt'].astype('i8')
+        self.assertTrue((np.diff(dts) >= 0).all())
+        self.assertEqual(pd.Timestamp(self.events['dt'][0], tz='UTC'),
+                         self.simulator.start)
+        self.assertEqual(pd.Timestamp(self.events['dt'][-1], tz='UTC'),
+                         self.simulator.end)
+
+    def test_dst_days(self):
+        intraday = self.events[self.events['market'] == 'intraday']
+        short_day = intraday[intraday['product'] == '03Q1']['dt'][1]
+        # 3 o'clock summer time on 2015-03-29, 30 minutes before delivery
+        self.assertEqual(pd.Timestamp(short_day),
+                         pd.Timestamp('2015-03-29 00:30'))
+
+        long_day = np.concatenate(list(
+            EpexSimulator('2015-10-25', '2015-10-25').iter_chunks()))
+        self.assertEqual(self.count('epex_auction', long_day), 25)
+        self.assertEqual(self.count('intraday', long_day), 100)
+        products = long_day['product'].tolist()
+        self.assertEqual(products.count('02-03b'), 2)
+        self.assertEqual(products.count('02Q4b'), 1)
+
+    def test_delivery_days(self):
+        for product in ['00-01', '03Q1']:
+            sid = self.simulator.sid('2015-03-29', product)
+            days = self.events['day'][self.events['sid'] == sid]
+            self.assertTrue(len(days))
+            self.assertTrue((days == np.datetime64('2015-03-28T23:00',
+                                                   'ns')).all())
+
+        event = next(iter(self.simulator.source().raw_data_gen()))
+        self.assertEqual(event['day'],
+                         pd.Timestamp('2015-03-28', tz='Europe/Berlin'))
+        self.assertEqual(event['market'], 'auction_signal')
+
+    def test_seeded_chunks(self):
+        simulator = EpexSimulator('2015-03-28', '2015-03-30', seed=1,
+                                  chunk_days=30)
+        events = np.concatenate(list(simulator.iter_chunks()))
+
+        for field in events.dtype.names:
+            if field == 'price':
+                np.testing.assert_array_equal(events[field],
+                                              self.events[field])
+            else:
+                self.assertTrue((events[field] ==
+                                 self.events[field]).all())
+
+    def test_asset_metadata(self):
+        metadata = self.simulator.asset_metadata()
+        self.assertEqual(len(metadata), 3 * (24 + 96) - 5)
+
+        sid = self.simulator.sid('2015-03-29', '01-02')
+        self.assertEqual(metadata[sid]['symbol'], '2015-03-29_01-02')
+        self.assertEqual(metadata[sid]['expiration_date'],
+                         pd.Timestamp('2015-03-29 00:00', tz='UTC'))
+        self.assertIn('2015-03-29_01Q4', metadata[sid]['children'])
+
+        intraday = self.events[self.events['market'] == 'intraday']
+        self.assertTrue(set(intraday['sid'].tolist()) <= set(metadata))
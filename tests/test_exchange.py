@@ -4,8 +4,12 @@ from zipline.finance.commission import PerShare
 from zipline.finance.trading import TradingEnvironment
 import pandas as pd
 
+from powerline.exchanges import exchange as exchange_module
 from powerline.exchanges.eex_exchange import EexExchange
 from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.data.treasury_store import TreasuryCurveStore
+from powerline.exchanges.exchange import clear_env_cache, \
+    clear_market_data_cache, make_ident
 
 __author__ = 'Warren'
 
@@ -75,3 +79,94 @@ class TestEpexExchange(TestCase):
 
     def tearDown(self):
         self.exchange = []
+
+
+class TestProductsAndIdents(TestCase):
+
+    def test_products(self):
+        products = EpexExchange().products
+        self.assertEqual(len(products['hour']), 24)
+        self.assertEqual(len(products['qh']), 96)
+        self.assertEqual(products['hour'][1], '01-02')
+        self.assertEqual(products['qh'][5], '01Q2')
+        self.assertIs(products['qh'], EpexExchange().products['qh'])
+
+    def test_products_per_instance(self):
+        exchange = EpexExchange()
+        exchange.products['hour'] = ('00-01',)
+        self.assertEqual(len(EpexExchange().products['hour']), 24)
+
+    def test_insert_ident(self):
+        exchange = EpexExchange()
+        ident = exchange.insert_ident('2015-06-01', '01-02')
+        self.assertEqual(ident, '2015-06-01_01-02')
+        self.assertIs(exchange.insert_ident('2015-06-01', '01-02'), ident)
+        self.assertEqual(EexExchange().insert_ident('2015-05-20', 'F1B1'),
+                         '2015-05-20_F1B1')
+        self.assertEqual(make_ident('2015-06-01', u'02-03b'),
+                         u'2015-06-01_02-03b')
+
+    def test_ident_cache(self):
+        size = exchange_module.ident_cache_size
+        exchange_module.ident_cache_size = 2
+        exchange_module._ident_cache.clear()
+        try:
+            make_ident('2015-06-01', '00-01')
+            make_ident('2015-06-01', '01-02')
+            make_ident('2015-06-01', '00-01')
+            make_ident('2015-06-01', '02-03')
+            self.assertEqual(list(exchange_module._ident_cache),
+                             [('2015-06-01', '00-01'),
+                              ('2015-06-01', '02-03')])
+        finally:
+            exchange_module.ident_cache_size = size
+
+
+class TestSharedMarketData(TestCase):
+
+    def test_shared_market_data(self):
+        first = EpexExchange()
+        second = EpexExchange()
+
+        self.assertIsNot(first.env, second.env)
+        self.assertIsNot(first.env.asset_finder, second.env.asset_finder)
+        self.assertTrue(first.env.benchmark_returns.equals(
+            second.env.benchmark_returns))
+
+    def test_shared_env(self):
+        expiration_date = pd.Timestamp('2015-06-01 00:30', tz='UTC')
+        metadata = {0: {'asset_type': 'future', 'symbol': '2015-06-01_00-01',
+                        'expiration_date': expiration_date,
+                        'end_date': expiration_date,
+                        'contract_multiplier': 1}}
+
+        env = EpexExchange().shared_env(futures_data=metadata)
+        self.assertIs(EpexExchange().shared_env(futures_data=dict(metadata)),
+                      env)
+        self.assertEqual(env.asset_finder.lookup_future_symbol(
+            '2015-06-01_00-01').sid, 0)
+
+        self.assertIsNot(EpexExchange(seed=1).shared_env(
+            futures_data=metadata), env)
+        self.assertIsNot(EpexExchange().shared_env(), env)
+        self.assertIsNot(EexExchange().shared_env(futures_data=metadata),
+                         env)
+
+    def test_market_data_per_treasury_store(self):
+        days = pd.date_range('2015-01-01', periods=3, tz='UTC')
+        loaded = []
+
+        def load(trading_day, trading_days, bm_symbol):
+            loaded.append(bm_symbol)
+            return pd.Series(0., index=days), pd.DataFrame(index=days)
+
+        for directory in ['first', 'second', 'first']:
+            exchange = EpexExchange(
+                treasury_store=TreasuryCurveStore(directory))
+            exchange.load = load
+            exchange.load_shared(None, days, '^EPEX')
+        self.assertEqual(len(loaded), 2)
+
+    def tearDown(self):
+        clear_env_cache()
+        clear_market_data_cache()
@@ -7,6 +7,7 @@ from zipline.protocol import BarData
 from zipline.finance.trading import TradingEnvironment
 
 from powerline.history.history_container import EpexHistoryContainer
+from powerline.utils.data.epex_simulator import EpexSimulator
 
 __author__ = 'Max'
 
@@ -287,6 +288,53 @@ class TestHistory(TestCase):
         for market in history.keys():
             self.assertTrue(history[market].equals(empty_history_copy[market]))
 
+    def test_changed_since(self):
+        """
+        Test that versions only move when the history actually changes.
+        """
+        data = self.create_sparse_data()
+        versions = self.container.versions
+
+        bar = BarData(data)
+        self.container.update(bar, self.days[-1])
+        history = self.container.get_history()
+        changes = self.container.changed_since(versions)
+
+        self.assertEqual(list(changes.keys()), ['epex_auction'])
+        self.assertEqual([day.date() for day in changes['epex_auction']],
+                         [day.date() for day in self.days[-3:]])
+
+        versions = self.container.versions
+        self.container.update(bar, self.days[-1])
+
+        self.assertEqual(self.container.changed_since(versions), {})
+        self.assertIs(self.container.get_history()['epex_auction'],
+                      history['epex_auction'])
+
+    def test_simulated_data(self):
+        """
+        Feeding the events of the EPEX simulator bar by bar, every auction
+        and intraday price ends up at its delivery day and product.
+        """
+        simulator = EpexSimulator('2015-07-06', '2015-07-08', seed=1)
+        bars = {}
+        for event in simulator.source().raw_data_gen():
+            bars.setdefault(event['dt'], {})[event['sid']] = event
+
+        for dt in sorted(bars):
+            self.container.update(BarData(bars[dt]), dt)
+        history = self.container.get_history()
+
+        prices = 0
+        for bar in bars.values():
+            for event in bar.values():
+                if event['market'] not in self.market_forms:
+                    continue
+                self.assertEqual(history[event['market']].loc[
+                    event['day'], event['product']], event['price'])
+                prices += 1
+        self.assertEqual(prices, 3 * (24 + 96))
+
     def create_full_data(self):
         """
         Create a set of complete data for three days. With all price types and
@@ -0,0 +1,169 @@
+from unittest import TestCase
+from importlib import import_module
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+from zipline.finance.trading import TradingEnvironment
+from zipline.history.history import HistorySpec
+from zipline.protocol import BarData
+
+from powerline.finance.auction import BeforeEpexAuction
+from powerline.history.history_container import EpexHistoryContainer
+from powerline.utils.instrumentation import Recorder, default_hooks
+
+__author__ = "Warren"
+
+
+class Bars(object):
+
+    def __init__(self, data):
+        self._data = data
+
+
+class Container(object):
+
+    def batch_from_bardata(self, data, algo_dt):
+        return len(data._data)
+
+    def work(self, n):
+        return sum(range(n))
+
+
+hooks = [(__name__, 'Container', 'batch_from_bardata'),
+         (__name__, 'Container', 'work')]
+
+
+class TestRecorder(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.dt = pd.Timestamp('2015-07-01 10:00', tz='UTC')
+        self.bars = Bars({
+            1: {'dt': self.dt, 'market': 'epex_auction'},
+            2: {'dt': self.dt, 'market': 'epex_auction'},
+            3: {'dt': self.dt, 'market': 'intraday'},
+            4: {'dt': self.dt - pd.Timedelta(minutes=1),
+                'market': 'intraday'}})
+
+    def test_disabled_recorder_leaves_methods(self):
+        original = Container.__dict__['work']
+        recorder = Recorder(hooks)
+        self.assertIs(Container.__dict__['work'], original)
+
+        with recorder:
+            self.assertIsNot(Container.__dict__['work'], original)
+            self.assertTrue(recorder.enabled)
+        self.assertIs(Container.__dict__['work'], original)
+        self.assertFalse(recorder.enabled)
+
+        Container().work(10)
+        self.assertEqual(len(recorder.calls), 0)
+
+    def test_summary(self):
+        container = Container()
+        with Recorder(hooks) as recorder:
+            self.assertEqual(container.work(10), 45)
+            container.work(10)
+            container.batch_from_bardata(self.bars, self.dt)
+
+        summary = recorder.summary()
+        self.assertEqual(summary.loc['Container.work', 'calls'], 2)
+        self.assertEqual(summary.loc['Container.batch_from_bardata',
+                                     'calls'], 1)
+        self.assertTrue((summary['total_s'] >= 0).all())
+
+    def test_event_counts(self):
+        with Recorder(hooks) as recorder:
+            Container().batch_from_bardata(self.bars, self.dt)
+
+        counts = recorder.event_counts()
+        self.assertEqual(counts.loc[self.dt, 'epex_auction'], 2)
+        self.assertEqual(counts.loc[self.dt, 'intraday'], 1)
+        self.assertEqual(recorder.counters['events.epex_auction'], 2)
+
+    def test_chrome_trace(self):
+        with Recorder(hooks) as recorder:
+            Container().work(10)
+            Container().batch_from_bardata(self.bars, self.dt)
+
+        path = os.path.join(self.directory, 'trace.json')
+        recorder.write_chrome_trace(path)
+        with open(path) as f:
+            trace = json.load(f)
+
+        phases = [event['ph'] for event in trace['traceEvents']]
+        self.assertEqual(phases.count('X'), 2)
+        self.assertEqual(phases.count('C'), 1)
+
+    def test_without_trace(self):
+        with Recorder(hooks, trace=False) as recorder:
+            Container().work(10)
+        self.assertEqual(recorder.calls['Container.work'], 1)
+        self.assertEqual(recorder.spans, [])
+
+    def test_default_hooks(self):
+        with Recorder() as recorder:
+            self.assertEqual(len(recorder._originals), len(default_hooks))
+        self.assertFalse(recorder.enabled)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class TestDefaultHooks(TestCase):
+    """
+    Runs the real history container and auction rule under a recorder with
+    the default hooks.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.env = TradingEnvironment()
+        history_spec = HistorySpec(bar_count=3, frequency='1m',
+                                   field='price', ffill=False,
+                                   data_frequency='minute', env=cls.env)
+        cls.history_specs = {history_spec.key_str: history_spec}
+
+    def setUp(self):
+        self.dt = pd.Timestamp('2015-07-06 09:30', tz='UTC')
+        self.container = EpexHistoryContainer(self.history_specs, None,
+                                              self.dt, 'minute',
+                                              env=self.env)
+        self.bars = BarData({
+            1: {'dt': self.dt, 'price': 30., 'market': 'epex_auction',
+                'product': '00-01', 'day': pd.Timestamp('2015-07-07'),
+                'sid': 1},
+            2: {'dt': self.dt, 'price': 31., 'market': 'intraday',
+                'product': '00Q1', 'day': pd.Timestamp('2015-07-06'),
+                'sid': 2}})
+
+    def originals(self):
+        return [getattr(import_module(module), cls).__dict__[method]
+                for module, cls, method in default_hooks]
+
+    def test_methods_restored(self):
+        originals = self.originals()
+        with Recorder():
+            for hooked, original in zip(self.originals(), originals):
+                self.assertIsNot(hooked, original)
+        for restored, original in zip(self.originals(), originals):
+            self.assertIs(restored, original)
+
+    def test_timings(self):
+        rule = BeforeEpexAuction(minutes=30)
+        with Recorder() as recorder:
+            self.container.update(self.bars, self.dt)
+            self.assertTrue(rule.should_trigger(self.dt, None))
+
+        self.assertEqual(
+            recorder.calls['EpexHistoryContainer.batch_from_bardata'], 1)
+        self.assertEqual(recorder.calls['EpexHistoryContainer.add_batch'], 1)
+        self.assertEqual(recorder.calls['BeforeEpexAuction.should_trigger'],
+                         1)
+        self.assertEqual(recorder.counters['events.intraday'], 1)
+
+        self.container.update(self.bars, self.dt)
+        self.assertEqual(
+            recorder.calls['EpexHistoryContainer.batch_from_bardata'], 1)
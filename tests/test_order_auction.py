@@ -0,0 +1,137 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from zipline.utils.factory import create_simulation_parameters
+
+from powerline.data.sources import RecordArraySource, clock_sid
+from powerline.exchanges.epex_exchange import EpexExchange
+from powerline.test_algorithms import OrderRecordingAlgorithm, order_grid
+from powerline.utils.data.epex_simulator import EpexSimulator
+from powerline.utils.hour_quarter_hour_converter import day_products, \
+    hourly_products
+
+__author__ = "Warren"
+
+
+class TestOrderAuction(TestCase):
+    """
+    Orders the hourly and quarter hour grids across the short day at the
+    start of daylight saving time on simulated EPEX data.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.simulator = EpexSimulator('2015-03-28', '2015-03-30', seed=1)
+        cls.exchange = EpexExchange(seed=1)
+        cls.exchange.env.write_data(
+            futures_data=cls.simulator.asset_metadata())
+        cls.sim_params = create_simulation_parameters(
+            start=cls.simulator.start, end=cls.simulator.end)
+
+    def run_algo(self, grid, amounts):
+        algo = OrderRecordingAlgorithm(
+            amounts=amounts, grid=grid, auction=order_grid,
+            env=self.exchange.env, sim_params=self.sim_params,
+            data_frequency='minute')
+        algo.run(self.simulator.source())
+        return pd.DataFrame(algo.placed, columns=['dt', 'sid', 'amount'])
+
+    def expected_sids(self, day, grid):
+        return [self.simulator.sid(day, product)
+                for product in day_products(day, grid)]
+
+    def test_hourly_grid(self):
+        placed = self.run_algo('hour', np.arange(1, 25))
+        by_day = placed.groupby(placed.dt.dt.date)
+        self.assertEqual(len(by_day), 3)
+
+        for day in self.simulator.days:
+            orders = by_day.get_group((day - pd.Timedelta(days=1)).date())
+            self.assertEqual(list(orders.sid), self.expected_sids(day, 'hour'))
+
+            # the amount of every product is taken by its name, the short
+            # day skips the amount of the hour from 2 to 3 o'clock
+            amounts = dict(zip(orders.sid, orders.amount))
+            for product in day_products(day):
+                self.assertEqual(amounts[self.simulator.sid(day, product)],
+                                 hourly_products.index(product) + 1)
+
+        short_day = by_day.get_group(pd.Timestamp('2015-03-28').date())
+        self.assertNotIn(3, list(short_day.amount))
+
+    def test_amounts_of_the_day(self):
+        placed = self.run_algo('hour', np.arange(1, 24))
+        short_day = placed[placed.dt.dt.date ==
+                           pd.Timestamp('2015-03-28').date()]
+        self.assertEqual(list(short_day.amount), list(range(1, 24)))
+
+        self.assertRaises(ValueError, self.run_algo, 'hour', np.ones(22))
+
+    def test_quarter_hour_grid(self):
+        placed = self.run_algo('qh', np.ones(96))
+        by_day = placed.groupby(placed.dt.dt.date)
+
+        for day in self.simulator.days:
+            orders = by_day.get_group((day - pd.Timedelta(days=1)).date())
+            self.assertEqual(list(orders.sid), self.expected_sids(day, 'qh'))
+            self.assertTrue((orders.amount == 1).all())
+
+        short_day = by_day.get_group(pd.Timestamp('2015-03-28').date())
+        self.assertEqual(len(short_day), 92)
+
+    def test_no_orders_at_target(self):
+        placed = self.run_algo('hour', np.zeros(24))
+        self.assertEqual(len(placed), 0)
+
+
+class TestAuctionClock(TestCase):
+    """
+    Runs on the auction and cascade events only, without the auction
+    signals, so the auction rule only fires through the auction clock.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.simulator = EpexSimulator('2015-03-28', '2015-03-30', seed=1)
+        cls.exchange = EpexExchange(seed=1)
+
+        # the clock also triggers on the last day, ordering the day after
+        cls.exchange.env.write_data(futures_data=EpexSimulator(
+            '2015-03-28', '2015-03-31', seed=1).asset_metadata())
+        cls.sim_params = create_simulation_parameters(
+            start=cls.simulator.start, end=cls.simulator.end)
+
+    def source(self):
+        chunks = (chunk[(chunk['market'] == 'epex_auction') |
+                        (chunk['market'] == 'cascade')]
+                  for chunk in self.simulator.iter_chunks())
+        return RecordArraySource(chunks, self.simulator.start,
+                                 self.simulator.end)
+
+    def run_algo(self, auction_clock):
+        algo = OrderRecordingAlgorithm(
+            amounts=np.ones(24), auction=order_grid,
+            auction_clock=auction_clock, env=self.exchange.env,
+            sim_params=self.sim_params, data_frequency='minute')
+        algo.run(self.source())
+        return pd.DataFrame(algo.placed, columns=['dt', 'sid', 'amount'])
+
+    def test_clock_triggers(self):
+        placed = self.run_algo(True)
+        self.assertEqual(sorted(set(placed.dt)),
+                         [pd.Timestamp('2015-03-27 10:30', tz='UTC'),
+                          pd.Timestamp('2015-03-28 10:30', tz='UTC'),
+                          pd.Timestamp('2015-03-29 09:30', tz='UTC'),
+                          pd.Timestamp('2015-03-30 09:30', tz='UTC')])
+        self.assertNotIn(clock_sid, set(placed.sid))
+
+        short_day = placed[placed.dt ==
+                           pd.Timestamp('2015-03-28 10:30', tz='UTC')]
+        self.assertEqual(list(short_day.sid),
+                         self.expected_sids('2015-03-29'))
+
+    def test_without_clock(self):
+        self.assertEqual(len(self.run_algo(False)), 0)
+
+    def expected_sids(self, day):
+        return [self.simulator.sid(day, product)
+                for product in day_products(day)]
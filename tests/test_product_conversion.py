@@ -4,7 +4,8 @@ import numpy as np
 from unittest import TestCase
 
 from powerline.utils.hour_quarter_hour_converter import \
-    convert_between_h_and_qh
+    convert_between_h_and_qh, _quarters, day_hours, day_positions, \
+    day_products, long_day_hourly_products, long_day_quarterly_products
 
 from powerline.exchanges.epex_exchange import EpexExchange
 
@@ -72,6 +73,128 @@ class TestProductConversion(TestCase):
 
         self.assertTrue(observed_output.equals(expected_output))
 
+    def test_conversion_in_chunks(self):
+        quarterly_history = pd.DataFrame(np.arange(960.).reshape(10, 96),
+                                         columns=self.quarterly_products,
+                                         index=pd.date_range('2015-01-01',
+                                                             '2015-01-10'))
+        chunks = [quarterly_history[:4], quarterly_history[4:]]
+
+        observed_output = pd.concat(convert_between_h_and_qh(iter(chunks)))
+
+        self.assertTrue(observed_output.equals(
+            convert_between_h_and_qh(quarterly_history)))
+
+    def test_quarters_are_views(self):
+        data = np.arange(192.).reshape(2, 96)
+        for values in [data, np.asfortranarray(data)]:
+            quarters = _quarters(values)
+            self.assertEqual(quarters.shape, (2, 24, 4))
+            self.assertTrue(np.shares_memory(quarters, values))
+            self.assertEqual(quarters[1, 2, 3], 96 + 11)
+
+    def test_volume_weighted_conversion(self):
+        index = pd.date_range('2015-01-01', '2015-01-02')
+        prices = pd.DataFrame(np.tile(np.arange(4.), (2, 24)),
+                              columns=self.quarterly_products, index=index)
+        volume = pd.DataFrame(np.ones((2, 96)),
+                              columns=self.quarterly_products, index=index)
+        volume.iloc[0, :4] = [0, 0, 0, 2]
+        volume.iloc[1, :4] = 0
+        prices.iloc[0, 4] = np.nan
+
+        observed_output = convert_between_h_and_qh(prices, volume)
+
+        self.assertEqual(observed_output.iloc[0, 0], 3)
+        self.assertEqual(observed_output.iloc[0, 1], 2)
+        self.assertTrue(np.isnan(observed_output.iloc[1, 0]))
+        self.assertEqual(observed_output.iloc[1, 1], 1.5)
+
+        self.assertRaises(ValueError, convert_between_h_and_qh,
+                          observed_output, volume)
+
+    def test_dst_days(self):
+        days = pd.DatetimeIndex(['2015-03-28', '2015-03-29', '2015-10-25'],
+                                tz='UTC')
+        np.testing.assert_array_equal(day_hours(days), [24, 23, 25])
+
+        hourly_history = pd.DataFrame(np.arange(75.).reshape(3, 25),
+                                      columns=long_day_hourly_products,
+                                      index=days)
+        observed_output = convert_between_h_and_qh(hourly_history,
+                                                   mask_missing=True)
+        self.assertEqual(list(observed_output.columns),
+                         long_day_quarterly_products)
+
+        missing = observed_output.isnull()
+        self.assertEqual(list(missing.sum(axis=1)), [4, 8, 0])
+        self.assertTrue(missing.loc[days[1], '02Q1':'02Q4b'].all())
+        self.assertTrue(missing.loc[days[0], '02Q1b':'02Q4b'].all())
+        self.assertEqual(observed_output.loc[days[2], '02Q3b'], 53)
+
+        hourly_output = convert_between_h_and_qh(observed_output)
+        self.assertTrue(hourly_output.loc[days[2]].equals(
+            hourly_history.loc[days[2]]))
+
+        hourly_history = pd.DataFrame(np.ones((3, 24)),
+                                      columns=self.hourly_products,
+                                      index=days)
+        short_day = convert_between_h_and_qh(hourly_history,
+                                             mask_missing=True)
+        self.assertEqual(list(short_day.isnull().sum(axis=1)), [0, 4, 0])
+        self.assertFalse(convert_between_h_and_qh(
+            hourly_history).isnull().any().any())
+
+    def test_dst_days_in_utc(self):
+        # Berlin midnights stored in UTC, as in the history
+        days = pd.date_range('2015-03-28', '2015-03-30',
+                             tz='Europe/Berlin').append(
+            pd.date_range('2015-10-24', '2015-10-26',
+                          tz='Europe/Berlin')).tz_convert('UTC')
+        np.testing.assert_array_equal(day_hours(days),
+                                      [24, 23, 24, 24, 25, 24])
+
+        hourly_history = pd.DataFrame(np.ones((6, 25)),
+                                      columns=long_day_hourly_products,
+                                      index=days)
+        missing = convert_between_h_and_qh(hourly_history,
+                                           mask_missing=True).isnull()
+        self.assertEqual(list(missing.sum(axis=1)), [4, 8, 4, 4, 0, 4])
+        self.assertTrue(missing.loc[days[1], '02Q1':'02Q4'].all())
+
+    def test_day_products(self):
+        self.assertEqual(day_products('2015-03-28'),
+                         list(self.hourly_products))
+
+        short_day = day_products('2015-03-29', 'qh')
+        self.assertEqual(len(short_day), 92)
+        self.assertNotIn('02Q1', short_day)
+        self.assertEqual(short_day[8], '03Q1')
+        self.assertNotIn('02-03', day_products('2015-03-29'))
+
+        self.assertEqual(day_products('2015-10-25'), long_day_hourly_products)
+        self.assertEqual(day_products('2015-10-25', 'qh'),
+                         long_day_quarterly_products)
+
+    def test_day_positions(self):
+        self.assertEqual(list(day_positions('2015-03-28', 25)),
+                         [0, 1, 2] + list(range(4, 25)))
+
+        short_day = day_positions('2015-03-29', 24)
+        self.assertEqual(len(short_day), 23)
+        self.assertNotIn(2, short_day)
+        self.assertEqual(list(day_positions('2015-03-29', 96, 'qh')[8:12]),
+                         [12, 13, 14, 15])
+
+        # the 'b' products repeat the hour without a 'b' vector
+        self.assertEqual(list(day_positions('2015-10-25', 24)[:5]),
+                         [0, 1, 2, 2, 3])
+        self.assertEqual(list(day_positions('2015-10-25', 100, 'qh')),
+                         list(range(100)))
+
+        self.assertRaises(ValueError, day_positions, '2015-03-28', 23)
+        self.assertRaises(ValueError, day_positions, '2015-03-28', 96)
+
     def test_no_history(self):
         no_history = pd.DataFrame(np.random.randn(3, 3))
 
@@ -1,12 +1,15 @@
 from unittest import TestCase
 import datetime
+import json
 
 import pandas as pd
 import numpy as np
 import pytz
 from zipline.utils.factory import create_simulation_parameters
 
-from powerline.finance.risk import RiskReport
+from powerline.finance.risk import RiskReport, RiskAccumulator, \
+    batch_risk_report, longest_drawdowns
+from powerline.finance.var import HistoricalVaR
 
 __author__ = "Warren, Max"
 
@@ -52,6 +55,25 @@ class TestRiskReport(TestCase):
         self.assertAlmostEqual(self.metrics.calculate_var(0.99, 10),
                                expected_var_99_10_day)
 
+    def test_expected_shortfall(self):
+        self.assertGreater(self.metrics.expected_shortfall_95,
+                           self.metrics.var_95)
+        self.assertGreater(self.metrics.expected_shortfall_99,
+                           self.metrics.var_99)
+
+    def test_var_engine(self):
+        sim_params = create_simulation_parameters(start=self.period[0],
+                                                  end=self.period[-1])
+        metrics = RiskReport(self.create_mock_perf(), sim_params,
+                             var_engine=HistoricalVaR())
+
+        # worst daily return is -55%
+        profit = self.metrics.profit
+        self.assertAlmostEqual(metrics.calculate_var(0.999), profit * 0.55,
+                               places=1)
+        self.assertAlmostEqual(metrics.calculate_expected_shortfall(0.999),
+                               profit * 0.55)
+
     def test_win_loss(self):
         expected_win_loss = 1.0
         self.assertEqual(self.metrics.win_loss, expected_win_loss)
@@ -65,10 +87,117 @@ class TestRiskReport(TestCase):
         expected_drawdown_duration = 4
         self.assertEqual(self.metrics.longest_drawdown_duration,
                          expected_drawdown_duration)
+        self.assertEqual(self.metrics.longest_drawdown_start,
+                         self.period[0])
+        self.assertEqual(self.metrics.longest_drawdown_end, self.period[4])
+
+    def test_longest_drawdown_duration_business_days(self):
+        sim_params = create_simulation_parameters(start=self.period[0],
+                                                  end=self.period[-1])
+        trading_days = pd.date_range(self.period[0], self.period[-1],
+                                     freq='B')
+        metrics = RiskReport(self.create_mock_perf(), sim_params,
+                             trading_days=trading_days)
+
+        # 2006-01-01 is a Sunday, the drawdown lasts until Thursday
+        self.assertEqual(metrics.longest_drawdown_duration, 4)
 
     def test_display_report(self):
         self.metrics.display_report()
 
+    def test_to_dict(self):
+        report = self.metrics.to_dict()
+        self.assertEqual(report['profit'], self.metrics.profit)
+        self.assertEqual(report['longest_drawdown_duration'], 4)
+        self.assertIsInstance(report['longest_drawdown_duration'], int)
+        self.assertEqual(report['longest_drawdown_start'],
+                         datetime.datetime(2006, 1, 1, tzinfo=pytz.utc))
+        self.assertEqual(report['period'], '2006-01-01 to 2006-01-10')
+
+    def test_to_json(self):
+        report = json.loads(self.metrics.to_json())
+        self.assertAlmostEqual(report['var_95'], self.metrics.var_95)
+        self.assertEqual(report['longest_drawdown_end'],
+                         '2006-01-05T00:00:00+00:00')
+
+    def test_to_arrow(self):
+        try:
+            import pyarrow  # noqa
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+
+        table = self.metrics.to_arrow()
+        self.assertEqual(table.num_rows, 1)
+        self.assertAlmostEqual(table.column('profit')[0].as_py(),
+                               self.metrics.profit)
+
+    def test_batch_risk_report(self):
+        perf = self.create_mock_perf()
+        returns = np.vstack([perf.returns, perf.returns * 0.5])
+        pnl = np.vstack([perf.pnl, perf.pnl])
+        batch = batch_risk_report(returns, pnl, run_ids=['full', 'half'])
+
+        for field in ['profit', 'pnl_max', 'pnl_min', 'returns_max',
+                      'returns_min', 'var_95', 'var_99', 'five_day_var_95',
+                      'five_day_var_99', 'expected_shortfall_95',
+                      'expected_shortfall_99', 'win_loss',
+                      'longest_drawdown_duration']:
+            self.assertAlmostEqual(batch.loc['full', field],
+                                   getattr(self.metrics, field))
+
+        self.assertAlmostEqual(batch.loc['half', 'var_95'],
+                               self.metrics.var_95 / 2)
+
+    def test_risk_accumulator(self):
+        perf = self.create_mock_perf()
+        risk = RiskAccumulator()
+        for dt, row in perf.iterrows():
+            risk.update(row.returns, row.pnl, dt=dt)
+
+        for field in ['profit', 'pnl_max', 'pnl_min', 'returns_max',
+                      'returns_min', 'var_95', 'var_99', 'five_day_var_95',
+                      'five_day_var_99', 'win_loss',
+                      'longest_drawdown_duration', 'longest_drawdown_start',
+                      'longest_drawdown_end', 'max_drawdown']:
+            self.assertAlmostEqual(risk.metrics()[field],
+                                   getattr(self.metrics, field))
+
+        self.assertAlmostEqual(risk.current_drawdown, 0.4285)
+        self.assertEqual(risk.current_drawdown_duration, 2)
+
+    def test_risk_accumulator_mid_run(self):
+        returns = np.random.RandomState(3).normal(0, 0.1, 50)
+        risk = RiskAccumulator()
+        for day, r in enumerate(returns):
+            risk.update(r, r * 100)
+            if day:
+                self.assertAlmostEqual(risk.std,
+                                       returns[:day + 1].std(ddof=1))
+            else:
+                self.assertTrue(np.isnan(risk.std))
+            duration, start, end = longest_drawdowns(returns[:day + 1])
+            self.assertEqual(risk.longest_drawdown_duration, duration[0])
+            if duration[0]:
+                self.assertEqual(risk.longest_drawdown_start, start[0])
+                self.assertEqual(risk.longest_drawdown_end, end[0])
+
+    def test_no_drawdown(self):
+        returns = np.array([[0.1, 0.2, 0.05, 0.], [0.1, -0.1, 0.2, 0.]])
+        duration, start, end = longest_drawdowns(returns)
+        self.assertEqual(list(duration), [0, 2])
+        self.assertEqual(list(start), [-1, 0])
+        self.assertEqual(list(end), [-1, 2])
+
+        risk = RiskAccumulator()
+        for r in returns[0]:
+            risk.update(r, r * 100)
+        self.assertEqual(risk.longest_drawdown_duration, 0)
+        self.assertIsNone(risk.longest_drawdown_start)
+        self.assertIsNone(risk.longest_drawdown_end)
+
+        report = batch_risk_report(returns, returns * 100)
+        self.assertEqual(list(report['longest_drawdown_duration']), [0, 2])
+
     def tearDown(self):
         self.returns = None
         self.sim_params = None
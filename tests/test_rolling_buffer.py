@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from powerline.history.rolling_buffer import DailyRingBuffer
+
+__author__ = 'Max'
+
+
+class TestDailyRingBuffer(TestCase):
+    """
+    Testing the preallocated buffer behind the EPEX history.
+    """
+    def setUp(self):
+        self.days = pd.date_range('2015-07-06', '2015-07-10', tz='UTC')
+        self.products = ["%(a)02d-%(b)02d" % {'a': i, 'b': i + 1}
+                         for i in range(24)]
+        self.buffer = DailyRingBuffer(3, self.products)
+
+    def test_keeps_latest_days(self):
+        columns = np.array([0])
+        for i in [4, 0, 2, 1, 3]:
+            self.buffer.write(self.days[i], columns, np.array([float(i)]))
+
+        frame = self.buffer.to_frame()
+        self.assertEqual(frame.index.tolist(), self.days[2:].tolist())
+        self.assertEqual(frame['00-01'].tolist(), [2., 3., 4.])
+
+    def test_nan_does_not_overwrite(self):
+        columns = np.array([0, 1])
+        self.buffer.write(self.days[0], columns, np.array([1., 2.]))
+        self.buffer.write(self.days[0], columns, np.array([np.nan, 5.]))
+
+        frame = self.buffer.to_frame()
+        self.assertEqual(frame['00-01'][self.days[0]], 1.)
+        self.assertEqual(frame['01-02'][self.days[0]], 5.)
+        self.assertTrue(np.isnan(frame['02-03'][self.days[0]]))
+
+    def test_recycled_rows_are_cleared(self):
+        for i in range(4):
+            self.buffer.write(self.days[i], np.array([i]),
+                              np.array([float(i)]))
+
+        frame = self.buffer.to_frame()
+        self.assertEqual(len(frame), 3)
+        self.assertTrue(np.isnan(frame['00-01'][self.days[3]]))
+        self.assertEqual(frame['04-05'].count(), 0)
+
+    def test_empty_frame(self):
+        frame = self.buffer.to_frame()
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.columns.tolist(), self.products)
+
+    def test_scatter(self):
+        days = [self.days[i] for i in [0, 1, 2, 3, 4, 4]]
+        columns = [0, 1, 2, 3, 4, 5]
+        prices = [0., 1., 2., 3., np.nan, 5.]
+        self.buffer.scatter(days, columns, prices)
+
+        frame = self.buffer.to_frame()
+        self.assertEqual(frame.index.tolist(), self.days[2:].tolist())
+        self.assertEqual(frame.count().sum(), 3)
+        self.assertEqual(frame['02-03'][self.days[2]], 2.)
+        self.assertEqual(frame['03-04'][self.days[3]], 3.)
+        self.assertEqual(frame['05-06'][self.days[4]], 5.)
+        self.assertTrue(np.isnan(frame['04-05'][self.days[4]]))
+
+    def test_versions(self):
+        columns = np.array([0])
+        self.buffer.write(self.days[0], columns, np.array([1.]))
+        version = self.buffer.version
+        frame = self.buffer.to_frame()
+
+        self.buffer.write(self.days[0], columns, np.array([1.]))
+        self.buffer.scatter([self.days[0]], [0], [np.nan])
+        self.assertEqual(self.buffer.version, version)
+        self.assertIs(self.buffer.to_frame(), frame)
+        self.assertEqual(self.buffer.changed_since(version), [])
+
+        self.buffer.scatter([self.days[1], self.days[0]], [0, 0], [2., 1.])
+        self.assertGreater(self.buffer.version, version)
+        self.assertIsNot(self.buffer.to_frame(), frame)
+        self.assertEqual(self.buffer.changed_since(version), [self.days[1]])
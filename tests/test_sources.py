@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from zipline.protocol import DATASOURCE_TYPE
+
+from powerline.data.columnar_store import market_event_dtype
+from powerline.data.sources import AuctionClockSource, MergedSource, \
+    RecordArraySource, clock_sid, trigger_times
+from powerline.finance.auction import BeforeEpexAuction
+
+__author__ = "Warren"
+
+
+class TestRecordArraySource(TestCase):
+
+    def setUp(self):
+        self.records = np.zeros(3, dtype=market_event_dtype)
+        self.records['dt'] = pd.date_range('2015-01-01 11:00', periods=3,
+                                           freq='60min').values
+        self.records['sid'] = [1, 2, 1]
+        self.records['price'] = [1.5, 2.5, np.nan]
+        self.records['volume'] = [1e9, 0, 0]
+        self.records['type'] = [DATASOURCE_TYPE.TRADE, DATASOURCE_TYPE.TRADE,
+                                DATASOURCE_TYPE.CASCADE_POSITION]
+        self.records['market'] = ['epex_auction', 'intraday', 'cascade']
+
+    def test_events(self):
+        source = RecordArraySource(self.records)
+        self.assertEqual(source.start,
+                         pd.Timestamp('2015-01-01 11:00', tz='UTC'))
+        self.assertEqual(source.end,
+                         pd.Timestamp('2015-01-01 13:00', tz='UTC'))
+
+        events = list(source)
+        self.assertEqual([event.sid for event in events], [1, 2, 1])
+        self.assertEqual(events[0].volume, 1e9)
+        self.assertEqual(events[1].market, 'intraday')
+        self.assertEqual(events[2].type, DATASOURCE_TYPE.CASCADE_POSITION)
+        self.assertTrue(np.isnan(events[2].price))
+        self.assertEqual(events[1].dt,
+                         pd.Timestamp('2015-01-01 12:00', tz='UTC'))
+
+    def test_chunks(self):
+        chunks = iter([self.records[:2], self.records[2:]])
+        events = list(RecordArraySource(chunks))
+        self.assertEqual([event.market for event in events],
+                         ['epex_auction', 'intraday', 'cascade'])
+
+    def test_optional_fields(self):
+        records = self.records[['dt', 'sid', 'price', 'type']]
+        event = next(RecordArraySource(records))
+        self.assertEqual(event.volume, 0)
+        self.assertNotIn('market', event.__dict__)
+
+
+class TestAuctionClockSource(TestCase):
+
+    def setUp(self):
+        self.rule = BeforeEpexAuction(minutes=30)
+        self.start = pd.Timestamp('2015-03-28', tz='UTC')
+        self.end = pd.Timestamp('2015-03-30 23:59', tz='UTC')
+
+    def test_heartbeats(self):
+        events = list(AuctionClockSource([self.rule], self.start, self.end))
+        self.assertEqual([event.dt for event in events],
+                         [pd.Timestamp('2015-03-28 10:30', tz='UTC'),
+                          pd.Timestamp('2015-03-29 09:30', tz='UTC'),
+                          pd.Timestamp('2015-03-30 09:30', tz='UTC')])
+        self.assertEqual(events[0].sid, clock_sid)
+        self.assertEqual(events[0].market, 'auction_signal')
+        self.assertEqual(events[0].type, DATASOURCE_TYPE.TRADE)
+        self.assertTrue(np.isnan(events[0].price))
+
+    def test_rules(self):
+        rules = [self.rule, BeforeEpexAuction(minutes=30),
+                 BeforeEpexAuction(hours=2)]
+        times = trigger_times(rules, self.start,
+                              pd.Timestamp('2015-03-28 10:30', tz='UTC'))
+        self.assertEqual(list(times),
+                         [pd.Timestamp('2015-03-28 09:00', tz='UTC'),
+                          pd.Timestamp('2015-03-28 10:30', tz='UTC')])
+
+    def test_merged(self):
+        records = np.zeros(2, dtype=market_event_dtype)
+        records['dt'] = pd.to_datetime(['2015-03-29 09:30',
+                                        '2015-03-29 11:00']).values
+        records['sid'] = [1, 2]
+        records['type'] = DATASOURCE_TYPE.TRADE
+        records['market'] = 'epex_auction'
+        data = RecordArraySource(records)
+        clock = AuctionClockSource([self.rule], self.start, self.end)
+
+        source = MergedSource([data, clock])
+        self.assertEqual(source.start, self.start)
+        self.assertEqual(source.end, self.end)
+        self.assertEqual([event.sid for event in source],
+                         [clock_sid, 1, clock_sid, 2, clock_sid])
@@ -0,0 +1,94 @@
+from unittest import TestCase
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+from zipline.utils.factory import create_simulation_parameters
+
+from powerline.finance.sweep import SweepRunner
+
+__author__ = "Warren"
+
+
+def setup():
+    start = datetime.datetime(year=2006, month=1, day=1, tzinfo=pytz.utc)
+    end = datetime.datetime(year=2006, month=1, day=10, tzinfo=pytz.utc)
+    sim_params = create_simulation_parameters(start=start, end=end)
+    sim_params.capital_base = 200
+    return {'env': None, 'sim_params': sim_params, 'data': lambda: None}
+
+
+class ScaledAlgorithm(object):
+    """
+    Stand-in for an algorithm, returns a fixed perf frame scaled by size.
+    """
+    def __init__(self, env, sim_params, size):
+        self.size = size
+        self.index = pd.date_range(sim_params.period_start,
+                                   sim_params.period_end)
+
+    def run(self, data):
+        returns = pd.Series([0.1, -0.1, 0.2, -0.1, 0.1, -0.2, 0.3, 0.1,
+                             -0.1, 0.2], index=self.index) * self.size
+        zeros = pd.Series(np.zeros(10), index=self.index)
+        return pd.DataFrame({'returns': returns,
+                             'pnl': returns * 200,
+                             'algorithm_period_return': returns.cumsum(),
+                             'max_drawdown': zeros,
+                             'benchmark_period_return': zeros,
+                             'sortino': zeros,
+                             'sharpe': zeros,
+                             'information': zeros})
+
+
+class MutatingAlgorithm(ScaledAlgorithm):
+    """
+    Changes its parameters and the simulation parameters while running.
+    """
+    def __init__(self, env, sim_params, sizes):
+        super(MutatingAlgorithm, self).__init__(
+            env, sim_params, sizes[0] * sim_params.capital_base / 200.)
+        sizes[0] *= 2
+        sim_params.capital_base *= 2
+
+
+class TestSweepRunner(TestCase):
+
+    def setUp(self):
+        self.param_sets = dict((i, {'size': i}) for i in range(1, 5))
+
+    def test_sweep_in_process(self):
+        results = SweepRunner(setup, ScaledAlgorithm, processes=0).run(
+            self.param_sets)
+        self.check_results(results)
+
+    def test_sweep_in_pool(self):
+        perfs = {}
+        results = SweepRunner(setup, ScaledAlgorithm, processes=2,
+                              keep_perf=True).run(
+            self.param_sets,
+            callback=lambda run_id, metrics, perf: perfs.update(
+                {run_id: perf}))
+        self.check_results(results)
+        self.assertEqual(sorted(perfs.keys()), sorted(self.param_sets))
+
+    def test_runs_independent(self):
+        sizes = [1]
+        param_sets = dict((i, {'sizes': sizes}) for i in range(4))
+        in_process = SweepRunner(setup, MutatingAlgorithm,
+                                 processes=0).run(param_sets)
+        in_pool = SweepRunner(setup, MutatingAlgorithm,
+                              processes=2).run(param_sets)
+
+        self.assertTrue(in_process.sort_index().equals(in_pool.sort_index()))
+        self.assertTrue((in_process['returns_max'] == 0.3).all())
+        self.assertEqual(sizes, [1])
+
+    def check_results(self, results):
+        self.assertEqual(sorted(results.index), sorted(self.param_sets))
+        for size in self.param_sets:
+            self.assertAlmostEqual(results.loc[size, 'returns_max'],
+                                   0.3 * size)
+            self.assertAlmostEqual(results.loc[size, 'profit'],
+                                   0.5 * size * 200)
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pandas as pd
 
@@ -95,3 +95,38 @@ class TestTradingCalendarEpex(TestCase):
     @classmethod
     def tearDownClass(cls):
         pass
+
+
+class TestOpenAndCloses(TestCase):
+    """
+    Tests the vectorized open and close times against a timestamp by
+    timestamp construction, including the days of the DST transitions.
+    """
+    def setUp(self):
+        self.days = pd.date_range('2015-03-27', '2015-03-31', tz='UTC')\
+            .append(pd.date_range('2015-10-23', '2015-10-27', tz='UTC'))
+
+    def test_open_and_closes_epex(self):
+        open_and_closes = tradingcalendar_epex.get_open_and_closes(self.days,
+                                                                   [])
+        self.check_times(open_and_closes, timedelta(0), timedelta(days=1))
+
+    def test_open_and_closes_eex(self):
+        open_and_closes = tradingcalendar_eex.get_open_and_closes(self.days,
+                                                                  [])
+        self.check_times(open_and_closes, timedelta(hours=8),
+                         timedelta(hours=18))
+
+    def check_times(self, open_and_closes, open_offset, close_offset):
+        self.assertEqual(open_and_closes.index.tolist(), self.days.tolist())
+        for day in self.days:
+            midnight = datetime(year=day.year, month=day.month, day=day.day)
+            expected_open = pd.Timestamp(midnight + open_offset,
+                                         tz='Europe/Berlin').tz_convert('UTC')
+            expected_close = pd.Timestamp(midnight + close_offset,
+                                          tz='Europe/Berlin').tz_convert('UTC')
+
+            self.assertEqual(open_and_closes.loc[day, 'market_open'],
+                             expected_open)
+            self.assertEqual(open_and_closes.loc[day, 'market_close'],
+                             expected_close)
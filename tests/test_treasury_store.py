@@ -0,0 +1,140 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from powerline.data import loader_power
+from powerline.data.loader_power import generate_benchmark, \
+    load_treasury_curves
+from powerline.data.treasury_store import TreasuryCurveStore
+
+__author__ = "Warren"
+
+
+class TestTreasuryCurveStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TreasuryCurveStore(self.directory)
+
+    def test_empty_store(self):
+        self.assertIsNone(self.store.read())
+
+    def test_round_trip(self):
+        index = pd.date_range('2015-01-01', '2015-01-10', tz='UTC')
+        curves = pd.DataFrame(np.random.rand(len(index), 3), index=index,
+                              columns=['1month', '3month', '1year'])
+        self.store.write(curves)
+        observed = self.store.read()
+
+        self.assertTrue(observed.index.equals(curves.index))
+        self.assertEqual(observed.columns.tolist(), curves.columns.tolist())
+        np.testing.assert_array_equal(observed.values, curves.values)
+
+    def test_single_file(self):
+        self.store.write(curves('2015-01-01', '2015-01-10', 1.))
+        self.store.write(curves('2015-01-01', '2015-01-20', 2.))
+        self.assertEqual(os.listdir(self.directory), ['curves.npz'])
+        self.assertEqual(len(self.store.read()), 20)
+
+    def test_merge(self):
+        self.store.write(curves('2015-01-01', '2015-01-31', 1.))
+        merged = self.store.merge(curves('2015-01-20', '2015-02-10', 2.))
+
+        observed = self.store.read()
+        self.assertTrue(observed.equals(merged))
+        self.assertEqual(observed.index[0],
+                         pd.Timestamp('2015-01-01', tz='UTC'))
+        self.assertEqual(observed.index[-1],
+                         pd.Timestamp('2015-02-10', tz='UTC'))
+        self.assertTrue((observed[:'2015-01-19'].values == 1).all())
+        self.assertTrue((observed['2015-01-20':].values == 2).all())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+def curves(start, end, value):
+    index = pd.date_range(start, end, tz='UTC')
+    return pd.DataFrame(value, index=index,
+                        columns=['1month', '3month', '1year'])
+
+
+class TestLoadTreasuryCurves(TestCase):
+    """
+    Loads treasury curves through a store with the download replaced.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TreasuryCurveStore(self.directory)
+        self.store.write(curves('2015-01-01', '2015-01-31', 1.))
+        self.ensure_treasury_data = loader_power.ensure_treasury_data
+        self.downloads = []
+
+    def load(self, first_date, last_date):
+        return load_treasury_curves('^GSPC',
+                                    pd.Timestamp(first_date, tz='UTC'),
+                                    pd.Timestamp(last_date, tz='UTC'),
+                                    self.store)
+
+    def download(self, curves):
+        def ensure_treasury_data(bm_symbol, first_date, last_date):
+            self.downloads.append((first_date, last_date))
+            if curves is None:
+                raise IOError('offline')
+            return curves
+        loader_power.ensure_treasury_data = ensure_treasury_data
+
+    def test_stored_range(self):
+        self.download(None)
+        observed = self.load('2015-01-05', '2015-01-20')
+        self.assertEqual(len(observed), 31)
+        self.assertEqual(self.downloads, [])
+
+    def test_last_treasury_day(self):
+        # the stored curves end on Friday, the Monday after is a holiday
+        self.store.write(curves('2015-01-01', '2015-01-16', 1.))
+        self.download(None)
+        self.load('2015-01-05', '2015-01-18')
+        self.load('2015-01-05', '2015-01-19')
+        self.assertEqual(self.downloads, [])
+
+        self.load('2015-01-05', '2015-01-20')
+        self.assertEqual(len(self.downloads), 1)
+
+    def test_offline_fallback(self):
+        self.download(None)
+        observed = self.load('2014-12-01', '2015-02-10')
+        self.assertEqual(len(self.downloads), 1)
+        self.assertTrue(observed.equals(self.store.read()))
+        self.assertEqual(len(observed), 31)
+
+    def test_download_merged(self):
+        self.download(curves('2015-01-20', '2015-02-10', 2.))
+        observed = self.load('2015-01-20', '2015-02-10')
+
+        self.assertEqual(len(observed), 41)
+        self.assertEqual(observed.index[0],
+                         pd.Timestamp('2015-01-01', tz='UTC'))
+        self.assertTrue(observed.equals(self.store.read()))
+        self.assertTrue((observed['2015-01-20':].values == 2).all())
+
+    def tearDown(self):
+        loader_power.ensure_treasury_data = self.ensure_treasury_data
+        shutil.rmtree(self.directory)
+
+
+class TestBenchmark(TestCase):
+
+    def test_seeded_benchmark(self):
+        days = pd.date_range('2015-01-01', '2015-12-31', tz='UTC')
+        benchmark = generate_benchmark(days, seed=1)
+
+        self.assertTrue(benchmark.index.equals(days))
+        self.assertTrue(benchmark.equals(generate_benchmark(days, seed=1)))
+        self.assertAlmostEqual(benchmark.mean(), 1.12 ** (1 / 365.) - 1,
+                               places=3)
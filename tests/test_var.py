@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import numpy as np
+from scipy.stats import norm
+
+from powerline.finance.risk import batch_risk_report
+from powerline.finance.var import VaREngine, ScenarioVaR, ParametricVaR, \
+    HistoricalVaR, FilteredHistoricalVaR, MonteCarloVaR, rolling_sums
+
+__author__ = "Warren"
+
+
+class TestVaREngines(TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(1)
+        self.returns = random_state.normal(0.001, 0.02, (200, 500))
+
+    def test_rolling_sums(self):
+        returns = np.arange(6.)
+        np.testing.assert_array_equal(rolling_sums(returns, 1), returns)
+        np.testing.assert_array_equal(rolling_sums(returns, 3),
+                                      [3, 6, 9, 12])
+
+    def test_parametric(self):
+        returns = self.returns[0]
+        mu, sigma = returns.mean(), returns.std(ddof=1)
+        engine = ParametricVaR()
+
+        self.assertAlmostEqual(engine.quantile(returns, 0.99, 5),
+                               norm.ppf(0.01, 5 * mu, np.sqrt(5) * sigma))
+        self.assertAlmostEqual(engine.expected_shortfall(returns, 0.975),
+                               mu - sigma * norm.pdf(norm.ppf(0.025)) /
+                               0.025)
+
+    def test_historical(self):
+        returns = np.arange(-10., 10.) / 100
+        engine = HistoricalVaR()
+
+        quantile, shortfall = engine.quantile_and_shortfall(returns, 0.9)
+        self.assertAlmostEqual(quantile, np.percentile(returns, 10))
+        self.assertAlmostEqual(shortfall, np.mean([-0.1, -0.09]))
+
+        self.assertAlmostEqual(engine.quantile(returns, 0.9, 5),
+                               np.percentile(rolling_sums(returns, 5), 10))
+
+    def test_rows_match_single_runs(self):
+        for engine in [ParametricVaR(), HistoricalVaR(),
+                       FilteredHistoricalVaR(), MonteCarloVaR(seed=3)]:
+            quantiles, shortfalls = engine.quantile_and_shortfall(
+                self.returns, 0.99, 5)
+            self.assertEqual(quantiles.shape, (200,))
+
+            quantile, shortfall = engine.quantile_and_shortfall(
+                self.returns[7], 0.99, 5)
+            self.assertAlmostEqual(quantiles[7], quantile)
+            self.assertAlmostEqual(shortfalls[7], shortfall)
+            self.assertTrue((shortfalls <= quantiles).all())
+
+    def test_engines_agree_on_normal_returns(self):
+        expected = ParametricVaR().quantile(self.returns, 0.95)
+        for engine in [HistoricalVaR(), FilteredHistoricalVaR(),
+                       MonteCarloVaR(seed=3)]:
+            quantiles = engine.quantile(self.returns, 0.95)
+            self.assertAlmostEqual(np.mean(quantiles / expected), 1,
+                                   delta=0.05)
+
+    def test_filtered_historical_follows_volatility(self):
+        returns = self.returns[0].copy()
+        returns[-20:] *= 5
+
+        historical = HistoricalVaR().quantile(returns, 0.99)
+        filtered = FilteredHistoricalVaR().quantile(returns, 0.99)
+        self.assertLess(filtered, 2 * historical)
+
+    def test_monte_carlo(self):
+        engine = MonteCarloVaR(paths=200000, seed=3)
+        returns = self.returns[0]
+        mu, sigma = returns.mean(), returns.std(ddof=1)
+
+        self.assertAlmostEqual(engine.quantile(returns, 0.99, 5),
+                               norm.ppf(0.01, 5 * mu, np.sqrt(5) * sigma),
+                               places=3)
+        np.testing.assert_array_equal(
+            MonteCarloVaR(seed=3).quantile(self.returns, 0.99),
+            MonteCarloVaR(seed=3).quantile(self.returns, 0.99))
+
+        fat_tails = MonteCarloVaR(paths=200000, df=3, seed=3)
+        self.assertLess(fat_tails.expected_shortfall(returns, 0.99),
+                        engine.expected_shortfall(returns, 0.99))
+
+    def test_short_history(self):
+        returns = np.array([0.01, -0.02, 0.03])
+        for engine in [HistoricalVaR(), FilteredHistoricalVaR()]:
+            one_day = engine.quantile_and_shortfall(returns, 0.95)
+            five_day = engine.quantile_and_shortfall(returns, 0.95, 5)
+            np.testing.assert_allclose(five_day,
+                                       np.sqrt(5) * np.array(one_day))
+
+            quantiles = engine.quantile(np.vstack([returns, returns]), 0.95,
+                                        5)
+            np.testing.assert_allclose(quantiles, five_day[0])
+
+            self.assertTrue(np.isnan(engine.quantile([], 0.95, 5)))
+
+        report = batch_risk_report(np.atleast_2d(returns),
+                                   np.atleast_2d(returns * 100),
+                                   var_engine=HistoricalVaR())
+        self.assertFalse(report[['five_day_var_95',
+                                 'five_day_var_99']].isnull().any().any())
+
+    def test_abstract_engines(self):
+        self.assertRaises(TypeError, VaREngine)
+        self.assertRaises(TypeError, ScenarioVaR)